@@ -0,0 +1,143 @@
+import hashlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from transcription import SAMPLE_RATE
+
+# Band-energy fingerprint after Haitsma & Kalker: one 32-bit hash per hop,
+# each bit the sign of an energy difference across adjacent bands and frames.
+# Long, heavily overlapping frames keep hashes stable when a clip's sample
+# grid is shifted against the source's, e.g. after a trim.
+FRAME_SIZE = 2048
+HOP_SIZE = 512
+HOP_SECONDS = HOP_SIZE / SAMPLE_RATE
+BAND_EDGES = np.geomspace(300, 3000, 34)
+
+# In-band energy of roughly -55 dBFS noise; quieter frames carry no usable
+# bits and their hash is stored as 0
+MIN_FRAME_ENERGY = 1e9
+
+
+def _band_matrix() -> np.ndarray:
+    freqs = np.fft.rfftfreq(FRAME_SIZE, 1 / SAMPLE_RATE)
+    bands = np.digitize(freqs, BAND_EDGES) - 1
+    valid = (bands >= 0) & (bands < len(BAND_EDGES) - 1)
+    matrix = np.zeros((len(freqs), len(BAND_EDGES) - 1), dtype=np.float32)
+    matrix[np.flatnonzero(valid), bands[valid]] = 1.0
+    return matrix
+
+
+_BANDS = _band_matrix()
+_WINDOW = np.hanning(FRAME_SIZE).astype(np.float32)
+
+
+def _frame_energy(samples: np.ndarray, frame_count: int, block_frames: int = 2048) -> np.ndarray:
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE][:frame_count]
+    energy = np.empty((frame_count, _BANDS.shape[1]), dtype=np.float32)
+    for first in range(0, frame_count, block_frames):
+        spectrum = np.fft.rfft(frames[first:first + block_frames].astype(np.float32) * _WINDOW, axis=1)
+        energy[first:first + block_frames] = (spectrum.real ** 2 + spectrum.imag ** 2) @ _BANDS
+    return energy
+
+
+def _hashes_from_energy(energy: np.ndarray) -> np.ndarray:
+    """One hash per pair of consecutive energy frames"""
+    band_diff = energy[:, :-1] - energy[:, 1:]
+    bits = (band_diff[1:] - band_diff[:-1]) > 0
+    hashes = np.packbits(bits, axis=1, bitorder='little').view('<u4').ravel().copy()
+
+    total = energy.sum(axis=1)
+    hashes[(total[1:] < MIN_FRAME_ENERGY) | (total[:-1] < MIN_FRAME_ENERGY)] = 0
+    return hashes
+
+
+def frame_hashes(samples: np.ndarray) -> np.ndarray:
+    """uint32 sub-fingerprint per hop of 16 kHz PCM (0 for silent frames)"""
+    frame_count = 1 + (len(samples) - FRAME_SIZE) // HOP_SIZE
+    if frame_count < 2:
+        return np.zeros(0, dtype='<u4')
+    return _hashes_from_energy(_frame_energy(samples, frame_count))
+
+
+class AudioFingerprint:
+    """Exact content hash plus per-frame hashes for locating shared audio"""
+
+    def __init__(self, content_hash: str, hashes: np.ndarray, duration: float):
+        self.content_hash = content_hash
+        self.hashes = hashes
+        self.duration = duration
+
+    @classmethod
+    def from_samples(cls, samples: np.ndarray) -> 'AudioFingerprint':
+        return cls(
+            hashlib.sha256(samples.tobytes()).hexdigest(),
+            frame_hashes(samples),
+            len(samples) / SAMPLE_RATE
+        )
+
+
+def bit_error_rate(a: np.ndarray, b: np.ndarray) -> float:
+    """Fraction of differing bits; ~0.5 for unrelated audio"""
+    if not len(a):
+        return 1.0
+    return float(np.unpackbits(np.bitwise_xor(a, b).view(np.uint8)).mean())
+
+
+def matching_ranges(query: np.ndarray, source: np.ndarray, offset: int,
+                    block: int = 64, max_ber: float = 0.3) -> List[Tuple[int, int]]:
+    """Frame ranges [start, end) of query that match source shifted by offset frames"""
+    first = max(0, -offset)
+    last = min(len(query), len(source) - offset)
+    ranges: List[Tuple[int, int]] = []
+    for start in range(first, last, block):
+        end = min(last, start + block)
+        q = query[start:end]
+        s = source[start + offset:end + offset]
+        # Silent frames hash to 0 on both sides; judge the block by its audible frames
+        audible = (q != 0) | (s != 0)
+        if audible.sum() < block // 4:
+            matched = bool(np.array_equal(q == 0, s == 0))
+        else:
+            matched = bit_error_rate(q[audible], s[audible]) <= max_ber
+        if not matched:
+            continue
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+class FingerprintBuilder:
+    """Fingerprint PCM incrementally, block by block, as it is decoded"""
+
+    def __init__(self):
+        self._sha = hashlib.sha256()
+        self._tail = np.zeros(0, dtype='<i2')
+        self._last_energy: Optional[np.ndarray] = None
+        self._hashes: List[np.ndarray] = []
+        self.sample_count = 0
+
+    def feed(self, samples: np.ndarray):
+        self._sha.update(samples.tobytes())
+        self.sample_count += len(samples)
+
+        buffer = np.concatenate((self._tail, samples))
+        frame_count = 1 + (len(buffer) - FRAME_SIZE) // HOP_SIZE if len(buffer) >= FRAME_SIZE else 0
+        if not frame_count:
+            self._tail = buffer
+            return
+
+        energy = _frame_energy(buffer, frame_count)
+        # Keep the samples the next frame still needs
+        self._tail = buffer[frame_count * HOP_SIZE:]
+        if self._last_energy is not None:
+            energy = np.concatenate((self._last_energy, energy))
+        if len(energy) > 1:
+            self._hashes.append(_hashes_from_energy(energy))
+        self._last_energy = energy[-1:]
+
+    def result(self) -> AudioFingerprint:
+        hashes = np.concatenate(self._hashes) if self._hashes else np.zeros(0, dtype='<u4')
+        return AudioFingerprint(self._sha.hexdigest(), hashes, self.sample_count / SAMPLE_RATE)
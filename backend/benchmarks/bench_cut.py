@@ -0,0 +1,115 @@
+"""
+Benchmark VideoProcessor.cut_video across segment counts.
+
+Generates a synthetic test video with ffmpeg's lavfi sources, then times the
+previous approach (one ffmpeg per segment + temp files + a concat pass)
+against the single-pass cut in copy and re-encode modes.
+
+    python benchmarks/bench_cut.py --duration 120 --segments 2 8 32
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ffmpeg
+
+from video_processor import VideoProcessor
+
+
+def make_test_video(path: str, duration: float, gop: int):
+    subprocess.run(
+        [
+            'ffmpeg', '-y', '-v', 'error',
+            '-f', 'lavfi', '-i', f'testsrc2=size=1280x720:rate=30:duration={duration}',
+            '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+            '-c:v', 'libx264', '-preset', 'veryfast', '-g', str(gop),
+            '-c:a', 'aac', '-shortest', path
+        ],
+        check=True
+    )
+
+
+def legacy_cut(upload_dir: Path, input_path: str, segments, output_path: str):
+    """The original N+1 process implementation, kept here for comparison"""
+    temp_files = []
+    concat_file = str(upload_dir / f"concat_{uuid.uuid4()}.txt")
+    for i, segment in enumerate(segments):
+        temp_output = str(upload_dir / f"temp_segment_{i}_{uuid.uuid4()}.mp4")
+        (
+            ffmpeg
+            .input(input_path, ss=segment['start'], to=segment['end'])
+            .output(temp_output, codec='copy', avoid_negative_ts='make_zero')
+            .overwrite_output()
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+        temp_files.append(temp_output)
+    with open(concat_file, 'w') as f:
+        for temp_file in temp_files:
+            f.write(f"file '{temp_file}'\n")
+    (
+        ffmpeg
+        .input(concat_file, format='concat', safe=0)
+        .output(output_path, codec='copy')
+        .overwrite_output()
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    for temp_file in temp_files:
+        os.remove(temp_file)
+    os.remove(concat_file)
+
+
+def make_segments(duration: float, count: int, keyframe_interval: float, aligned: bool):
+    """count evenly spaced segments covering half the video"""
+    span = duration / count
+    segments = []
+    for i in range(count):
+        start = i * span
+        if aligned:
+            start = round(start / keyframe_interval) * keyframe_interval
+        else:
+            start += keyframe_interval / 3
+        segments.append({'start': start, 'end': min(duration, start + span / 2)})
+    return segments
+
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duration', type=float, default=120)
+    parser.add_argument('--gop', type=int, default=60, help='keyframe interval in frames (30 fps)')
+    parser.add_argument('--segments', type=int, nargs='+', default=[2, 8, 32])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        upload_dir = Path(tmp)
+        source = str(upload_dir / 'source.mp4')
+        make_test_video(source, args.duration, args.gop)
+        processor = VideoProcessor(tmp)
+        keyframes = processor.get_keyframes(source)
+        keyframe_interval = args.gop / 30
+
+        print(f"{'segments':>8}  {'legacy':>9}  {'copy':>9}  {'reencode':>9}")
+        for count in args.segments:
+            aligned = make_segments(args.duration, count, keyframe_interval, aligned=True)
+            unaligned = make_segments(args.duration, count, keyframe_interval, aligned=False)
+
+            legacy = timed(legacy_cut, upload_dir, source, aligned, str(upload_dir / 'legacy.mp4'))
+            copy = timed(processor.cut_video, source, aligned, 'copy.mp4', mode='copy', keyframes=keyframes)
+            reencode = timed(processor.cut_video, source, unaligned, 'reencode.mp4', mode='reencode')
+            print(f"{count:>8}  {legacy:>8.2f}s  {copy:>8.2f}s  {reencode:>8.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark matrix for the encoding profiles.
+
+Re-encodes a synthetic test video with every profile at each concurrency
+level, running that many encodes side by side with threads derived the way
+the server derives them (cores / concurrent encodes). A row with ffmpeg's
+own libx264 defaults and automatic threading is the baseline. Records wall
+time, aggregate speed (x realtime across all jobs) and output size.
+
+    python benchmarks/bench_encoding_profiles.py --duration 60 --jobs 1 2 4 --json results.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from encoding_profiles import ENCODING_PROFILES, encoder_threads
+from video_processor import VideoProcessor
+
+
+def make_test_video(path: str, duration: float, size: str):
+    # testsrc2 moves enough to give the encoder real work, unlike a still pattern
+    subprocess.run(
+        [
+            'ffmpeg', '-y', '-v', 'error',
+            '-f', 'lavfi', '-i', f'testsrc2=size={size}:rate=30:duration={duration}',
+            '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+            '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '18',
+            '-c:a', 'aac', '-shortest', path
+        ],
+        check=True
+    )
+
+
+def default_encode(source: str, output_path: str):
+    """What add_subtitles used to do: libx264 and aac with ffmpeg's defaults"""
+    subprocess.run(
+        ['ffmpeg', '-y', '-v', 'error', '-i', source, '-c:v', 'libx264', '-c:a', 'aac', output_path],
+        check=True
+    )
+
+
+def run_concurrently(jobs: int, encode):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        outputs = list(pool.map(encode, range(jobs)))
+    return time.perf_counter() - started, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duration', type=float, default=60)
+    parser.add_argument('--size', default='1920x1080')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4],
+                        help='concurrent encodes (the media worker pool size)')
+    parser.add_argument('--profiles', nargs='+', default=list(ENCODING_PROFILES), choices=list(ENCODING_PROFILES))
+    parser.add_argument('--json', help='also write the matrix to this file')
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        source = str(Path(tmp) / 'source.mp4')
+        make_test_video(source, args.duration, args.size)
+        segments = [{'start': 0, 'end': args.duration}]
+
+        print(f"{os.cpu_count()} cores, {args.duration:g}s {args.size} source")
+        print(f"{'profile':>12}  {'jobs':>4}  {'threads':>7}  {'wall':>8}  {'speed':>7}  {'size':>9}")
+        for jobs in args.jobs:
+            threads = encoder_threads(jobs)
+            candidates = [('ffmpeg-default', None)] + [(name, name) for name in args.profiles]
+            for label, profile in candidates:
+                processor = VideoProcessor(tmp, threads=threads)
+
+                def encode(index):
+                    output_path = str(Path(tmp) / f"{label}_{index}.mp4")
+                    if profile is None:
+                        default_encode(source, output_path)
+                    else:
+                        processor.cut_video(
+                            source, segments, f"{label}_{index}.mp4", mode='reencode', profile=profile
+                        )
+                    return output_path
+
+                wall, outputs = run_concurrently(jobs, encode)
+                size = sum(os.path.getsize(path) for path in outputs) / len(outputs)
+                speed = args.duration * jobs / wall
+                rows.append({
+                    'profile': label, 'jobs': jobs, 'threads': threads if profile else 'auto',
+                    'wall_seconds': round(wall, 3), 'speed': round(speed, 2), 'output_bytes': int(size),
+                })
+                print(f"{label:>12}  {jobs:>4}  {rows[-1]['threads']:>7}  {wall:>7.2f}s  "
+                      f"{speed:>6.2f}x  {size / 1e6:>7.2f}MB")
+                for path in outputs:
+                    os.remove(path)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'cpu_count': os.cpu_count(), 'duration': args.duration, 'size': args.size, 'rows': rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Lookup latency on a large `videos` collection.
+
+Seeds a scratch database with video documents shaped like the real ones
+(including the `media` record), then measures find_one by video_id with
+concurrent callers:
+
+  no index     collection scan (few samples; each one reads every document)
+  indexed      unique index on video_id, full document
+  projection   the index plus a one-field projection, as resolve_media_path does
+  cached       DocumentCache in front of the indexed query, with a skewed key
+               distribution (most requests go to a small set of hot videos)
+
+Needs a running MongoDB; the scratch database is dropped afterwards unless
+--keep is given (a kept database is reused by the next run).
+
+    python benchmarks/bench_lookups.py --documents 1000000 --lookups 20000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from db_indexes import INDEXES
+from document_cache import DocumentCache
+
+
+def video_document(i: int) -> dict:
+    return {
+        'video_id': f"video-{i:08d}",
+        'filename': f"upload_{i}.mp4",
+        'stored_filename': f"{i:064x}.mp4",
+        'content_hash': f"{i:064x}",
+        'status': 'ready',
+        'file_size': 50_000_000 + i,
+        'duration': 120.0,
+        'width': 1920,
+        'height': 1080,
+        'fps': 29.97,
+        'codec': 'h264',
+        'bitrate': 3_500_000,
+        'has_audio': True,
+        'uploaded_at': f"2024-01-01T00:00:{i % 60:02d}+00:00",
+        'media': {
+            'container': 'mov,mp4,m4a,3gp,3g2,mj2', 'duration': 120.0, 'width': 1920, 'height': 1080,
+            'rotation': 0, 'fps': 29.97, 'vfr': False, 'codec': 'h264', 'pix_fmt': 'yuv420p',
+            'streams': [
+                {'index': 0, 'type': 'video', 'codec': 'h264', 'width': 1920, 'height': 1080},
+                {'index': 1, 'type': 'audio', 'codec': 'aac', 'sample_rate': 48000, 'channels': 2},
+            ],
+        },
+    }
+
+
+async def seed(collection, documents: int, batch: int = 10_000):
+    existing = await collection.estimated_document_count()
+    if existing >= documents:
+        print(f"Reusing {existing} documents")
+        return
+    started = time.perf_counter()
+    for first in range(existing, documents, batch):
+        await collection.insert_many(
+            [video_document(i) for i in range(first, min(first + batch, documents))], ordered=False
+        )
+    print(f"Seeded {documents - existing} documents in {time.perf_counter() - started:.1f}s")
+
+
+def pick_keys(documents: int, count: int, hot_fraction: float, hot_share: float):
+    """hot_share of the lookups go to the first hot_fraction of the videos"""
+    hot = max(1, int(documents * hot_fraction))
+    return [
+        f"video-{(random.randrange(hot) if random.random() < hot_share else random.randrange(documents)):08d}"
+        for _ in range(count)
+    ]
+
+
+async def measure(lookup, keys, concurrency: int):
+    queue = list(keys)
+    samples = []
+
+    async def worker():
+        while queue:
+            key = queue.pop()
+            started = time.perf_counter()
+            await lookup(key)
+            samples.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    return {
+        'p50': statistics.median(samples),
+        'p99': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        'max': samples[-1],
+        'rate': len(samples) / elapsed,
+    }
+
+
+def report(name: str, result: dict):
+    print(f"{name:>12}  {result['p50']:>8.3f}  {result['p99']:>8.3f}  {result['max']:>8.2f}  {result['rate']:>9.0f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-url', default=os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    parser.add_argument('--db', default='clipix_bench_lookups')
+    parser.add_argument('--documents', type=int, default=1_000_000)
+    parser.add_argument('--lookups', type=int, default=20_000)
+    parser.add_argument('--scan-lookups', type=int, default=20, help='lookups without an index')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--hot-fraction', type=float, default=0.01)
+    parser.add_argument('--hot-share', type=float, default=0.9)
+    parser.add_argument('--keep', action='store_true', help='keep the scratch database')
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(args.mongo_url)
+    db = client[args.db]
+    videos = db.videos
+    try:
+        await seed(videos, args.documents)
+        keys = pick_keys(args.documents, args.lookups, args.hot_fraction, args.hot_share)
+
+        print(f"{'lookup':>12}  {'p50 ms':>8}  {'p99 ms':>8}  {'max ms':>8}  {'lookups/s':>9}")
+
+        await videos.drop_indexes()
+        result = await measure(
+            lambda key: videos.find_one({'video_id': key}), keys[:args.scan_lookups], min(args.concurrency, 4)
+        )
+        report('no index', result)
+
+        for keys_spec, options in INDEXES['videos']:
+            await videos.create_index(keys_spec, **options)
+
+        report('indexed', await measure(lambda key: videos.find_one({'video_id': key}), keys, args.concurrency))
+        report('projection', await measure(
+            lambda key: videos.find_one({'video_id': key}, {'_id': 0, 'stored_filename': 1}), keys, args.concurrency
+        ))
+
+        cache = DocumentCache(videos, 'video_id', maxsize=2048, ttl=300)
+        report('cached', await measure(cache.get, keys, args.concurrency))
+        stats = cache.stats()
+        print(f"cache hit rate {stats['hits'] / max(1, stats['hits'] + stats['misses']):.1%}")
+    finally:
+        if not args.keep:
+            await client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""
+Load benchmark for MediaExecutor.
+
+Runs N simulated encodes (a blocking subprocess, like ffmpeg .run()) while a
+probe coroutine measures event loop latency, once with the encodes called
+inline from async code and once through MediaExecutor.
+
+    python benchmarks/bench_media_executor.py --encodes 4 --seconds 2
+"""
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from media_executor import MediaExecutor
+
+
+def blocking_encode(seconds: float):
+    """Stand-in for an ffmpeg run: a child process the caller waits on"""
+    subprocess.run([sys.executable, '-c', f'import time; time.sleep({seconds})'], check=True)
+
+
+async def measure_latency(stop: asyncio.Event, interval: float = 0.01):
+    """Sample how late the event loop wakes us up"""
+    samples = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - started - interval) * 1000)
+    return samples
+
+
+async def run_scenario(encodes: int, seconds: float, executor: MediaExecutor = None):
+    stop = asyncio.Event()
+    probe = asyncio.create_task(measure_latency(stop))
+    await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    if executor is None:
+        for _ in range(encodes):
+            blocking_encode(seconds)
+    else:
+        await asyncio.gather(*[
+            executor.run('cut', blocking_encode, seconds) for _ in range(encodes)
+        ])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    samples = await probe
+    return elapsed, samples
+
+
+def report(name: str, elapsed: float, samples):
+    samples = sorted(samples) or [0.0]
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(
+        f"{name:<10} wall={elapsed:6.2f}s  loop latency "
+        f"p50={statistics.median(samples):8.2f}ms  p99={p99:8.2f}ms  max={samples[-1]:8.2f}ms  "
+        f"samples={len(samples)}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--encodes', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--kind', choices=['thread', 'process'], default='thread')
+    args = parser.parse_args()
+
+    report('inline', *await run_scenario(args.encodes, args.seconds))
+
+    executor = MediaExecutor(
+        kind=args.kind,
+        max_workers=args.workers,
+        operation_limits={'cut': args.workers},
+    )
+    executor.start()
+    try:
+        report('executor', *await run_scenario(args.encodes, args.seconds, executor))
+    finally:
+        executor.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""
+Compare speech-to-text backends by throughput (audio seconds per wall second).
+
+Runs the same 16 kHz mono WAV through the chunked transcription pipeline
+with each backend. The first call to the local backend includes model
+loading, so it is reported separately from the timed run. Backends are
+picked on the command line; STT_BACKEND is ignored.
+
+    ffmpeg -i talk.mp4 -vn -ac 1 -ar 16000 -acodec pcm_s16le talk.wav
+    python benchmarks/bench_stt_backends.py talk.wav --backends local openai
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv
+
+from stt_backends import LocalWhisperBackend, create_backend
+from transcription import SAMPLE_RATE, ChunkedTranscriber, encode_wav, read_wav
+
+load_dotenv(Path(__file__).resolve().parent.parent / '.env')
+
+
+async def bench(name: str, samples, args):
+    backend = create_backend(name)
+
+    load_time = 0.0
+    if isinstance(backend, LocalWhisperBackend):
+        started = time.perf_counter()
+        backend.load()
+        # Warm-up call so one-off allocations don't count against throughput
+        await backend.transcribe(encode_wav(samples[:SAMPLE_RATE * 5]), args.language)
+        load_time = time.perf_counter() - started
+
+    transcriber = ChunkedTranscriber(
+        backend,
+        concurrency=args.concurrency or backend.concurrency,
+        chunk_seconds=args.chunk_seconds
+    )
+    started = time.perf_counter()
+    result = await transcriber.transcribe_samples(samples, args.language)
+    wall = time.perf_counter() - started
+    return backend.model_id, load_time, wall, len(result['segments'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('audio', help='16 kHz mono 16-bit WAV file')
+    parser.add_argument('--backends', nargs='+', default=['local', 'openai'])
+    parser.add_argument('--language', default=None)
+    parser.add_argument('--chunk-seconds', type=float, default=120)
+    parser.add_argument('--concurrency', type=int, default=0, help='default: the backend\'s own hint')
+    args = parser.parse_args()
+
+    samples = read_wav(args.audio)
+    audio_seconds = len(samples) / SAMPLE_RATE
+    print(f"{audio_seconds:.0f}s of audio")
+    print(f"{'backend':<28}  {'load':>7}  {'wall':>8}  {'audio s / wall s':>16}  {'segments':>8}")
+    for name in args.backends:
+        model_id, load_time, wall, segments = asyncio.run(bench(name, samples, args))
+        print(f"{model_id:<28}  {load_time:>6.1f}s  {wall:>7.1f}s  {audio_seconds / wall:>16.1f}  {segments:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark the chunked transcription pipeline against the offline fake backend.
+
+Synthesizes speech-like audio (noise bursts separated by short pauses) and
+transcribes it with increasing concurrency. The fake backend sleeps for
+`latency + chunk_duration * realtime_factor`, which stands in for the
+upload and inference time of a hosted Whisper call.
+
+    python benchmarks/bench_transcription.py --minutes 30 --concurrency 1 4 8
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from stt_backends import FakeSpeechToText
+from transcription import SAMPLE_RATE, ChunkedTranscriber
+
+
+def synthesize(minutes: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    parts = []
+    total = 0
+    while total < minutes * 60 * SAMPLE_RATE:
+        speech = int(rng.uniform(2, 8) * SAMPLE_RATE)
+        pause = int(rng.uniform(0.2, 1.0) * SAMPLE_RATE)
+        parts.append(rng.normal(0, 3000, speech).astype('<i2'))
+        parts.append(np.zeros(pause, dtype='<i2'))
+        total += speech + pause
+    return np.concatenate(parts)
+
+
+async def run(samples, concurrency, args):
+    backend = FakeSpeechToText(
+        latency=args.latency, realtime_factor=args.realtime_factor, failure_rate=args.failure_rate
+    )
+    transcriber = ChunkedTranscriber(
+        backend, concurrency=concurrency, chunk_seconds=args.chunk_seconds, retry_backoff=0.1
+    )
+    started = time.perf_counter()
+    result = await transcriber.transcribe_samples(samples, language='en')
+    return time.perf_counter() - started, len(result['segments'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--minutes', type=float, default=30)
+    parser.add_argument('--chunk-seconds', type=float, default=120)
+    parser.add_argument('--latency', type=float, default=0.5, help='fixed seconds per backend call')
+    parser.add_argument('--realtime-factor', type=float, default=0.02, help='backend seconds per audio second')
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    samples = synthesize(args.minutes)
+    audio_seconds = len(samples) / SAMPLE_RATE
+    print(f"{audio_seconds:.0f}s of audio, {args.chunk_seconds:.0f}s chunks")
+    print(f"{'concurrency':>11}  {'wall':>8}  {'audio s / wall s':>16}  {'segments':>8}")
+    for concurrency in args.concurrency:
+        wall, segments = asyncio.run(run(samples, concurrency, args))
+        print(f"{concurrency:>11}  {wall:>7.2f}s  {audio_seconds / wall:>16.1f}  {segments:>8}")
+
+
+if __name__ == '__main__':
+    main()
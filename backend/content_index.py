@@ -0,0 +1,128 @@
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+def canonical_params(params: Dict[str, Any]) -> str:
+    """Stable string form of operation parameters, used as part of a memo key"""
+
+    def normalize(value):
+        if isinstance(value, float):
+            # Millisecond precision: 1.0 and 1.0000001 are the same edit
+            return round(value, 3)
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items() if v is not None}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        return value
+
+    return json.dumps(normalize(params), sort_keys=True, separators=(',', ':'))
+
+
+class ContentIndex:
+    """Map identical uploads to one stored blob and memoize derived results"""
+
+    def __init__(self, db):
+        self.blobs = db.blobs
+        self.derived = db.derived_results
+
+    async def ensure_indexes(self):
+        await self.blobs.create_index('content_hash', unique=True)
+        await self.derived.create_index('key', unique=True)
+        await self.derived.create_index('source_hash')
+
+    async def acquire_blob(self, content_hash: str, stored_filename: str, size: int) -> Tuple[str, bool]:
+        """Take a reference on the blob for content_hash.
+
+        stored_filename is the freshly written copy. Returns the filename to
+        use and whether it is new; when it isn't, the caller should delete
+        its copy.
+        """
+        for attempt in range(2):
+            try:
+                blob = await self.blobs.find_one_and_update(
+                    {'content_hash': content_hash},
+                    {
+                        '$inc': {'refcount': 1},
+                        '$setOnInsert': {
+                            'stored_filename': stored_filename,
+                            'size': size,
+                            'created_at': datetime.now(timezone.utc).isoformat()
+                        }
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                break
+            except DuplicateKeyError:
+                # Two uploads of the same bytes raced on the upsert; retry as an update
+                if attempt:
+                    raise
+
+        is_new = blob['stored_filename'] == stored_filename
+        if not is_new:
+            logger.info(f"Deduplicated upload {content_hash[:12]} -> {blob['stored_filename']}")
+        return blob['stored_filename'], is_new
+
+    async def release_blob(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Drop a reference. Returns the blob doc when it was the last one"""
+        blob = await self.blobs.find_one_and_update(
+            {'content_hash': content_hash},
+            {'$inc': {'refcount': -1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not blob or blob['refcount'] > 0:
+            return None
+
+        # An upload may have taken a new reference since; then the file stays
+        result = await self.blobs.delete_one({'content_hash': content_hash, 'refcount': {'$lte': 0}})
+        return blob if result.deleted_count == 1 else None
+
+    @staticmethod
+    def derived_key(source_hash: str, operation: str, params: Dict[str, Any]) -> str:
+        return f"{source_hash}:{operation}:{canonical_params(params)}"
+
+    async def lookup_derived(self, source_hash: Optional[str], operation: str,
+                             params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Previously stored result for (source, operation, params), if any"""
+        if not source_hash:
+            return None
+        doc = await self.derived.find_one(
+            {'key': self.derived_key(source_hash, operation, params)},
+            {'_id': 0, 'result': 1}
+        )
+        return doc['result'] if doc else None
+
+    async def store_derived(self, source_hash: Optional[str], operation: str,
+                            params: Dict[str, Any], result: Dict[str, Any]):
+        if not source_hash:
+            return
+        key = self.derived_key(source_hash, operation, params)
+        await self.derived.update_one(
+            {'key': key},
+            {'$set': {
+                'key': key,
+                'source_hash': source_hash,
+                'operation': operation,
+                'parameters': canonical_params(params),
+                'result': result,
+                'created_at': datetime.now(timezone.utc).isoformat()
+            }},
+            upsert=True
+        )
+
+    async def forget_derived(self, source_hash: str, operation: str, params: Dict[str, Any]):
+        """Drop a memo entry whose result no longer exists"""
+        await self.derived.delete_one({'key': self.derived_key(source_hash, operation, params)})
+
+    async def release_derived(self, source_hash: str) -> List[Dict[str, Any]]:
+        """Remove and return every memo entry derived from source_hash"""
+        entries = await self.derived.find({'source_hash': source_hash}, {'_id': 0}).to_list(None)
+        await self.derived.delete_many({'source_hash': source_hash})
+        return entries
@@ -0,0 +1,54 @@
+import logging
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Indexes on the collections server.py owns; components with their own
+# collections (jobs, uploads, blobs, transcripts) create theirs.
+# collection -> [(keys, options)]
+INDEXES: Dict[str, List[Tuple[Any, Dict[str, Any]]]] = {
+    'videos': [
+        ('video_id', {'unique': True}),
+        # Dedup sibling lookups and proxy updates across uploads of the same bytes
+        ([('content_hash', ASCENDING), ('status', ASCENDING)], {}),
+        # Keyset pagination of /videos: (sort key, tiebreak); one index serves both orders
+        ([('uploaded_at', ASCENDING), ('video_id', ASCENDING)], {}),
+        ([('duration', ASCENDING), ('video_id', ASCENDING)], {}),
+        ([('file_size', ASCENDING), ('video_id', ASCENDING)], {}),
+        ([('codec', ASCENDING), ('uploaded_at', ASCENDING), ('video_id', ASCENDING)], {}),
+    ],
+    'captions': [
+        ('caption_id', {'unique': True}),
+        ('video_id', {}),
+    ],
+    'processed_videos': [
+        ('result_id', {'unique': True}),
+        ('original_video_id', {}),
+    ],
+    'projects': [
+        ('project_id', {'unique': True}),
+        ('video_id', {}),
+    ],
+    'batches': [
+        ('batch_id', {'unique': True}),
+    ],
+    'status_checks': [
+        ([('timestamp', ASCENDING), ('id', ASCENDING)], {}),
+        ([('client_name', ASCENDING), ('timestamp', ASCENDING), ('id', ASCENDING)], {}),
+    ],
+}
+
+
+async def ensure_indexes(db):
+    """Create any missing indexes; existing ones are left alone (create_index is idempotent)"""
+    for collection, indexes in INDEXES.items():
+        for keys, options in indexes:
+            try:
+                await db[collection].create_index(keys, **options)
+            except OperationFailure as e:
+                # e.g. duplicates left over from before a unique index existed;
+                # serve without it rather than refuse to start
+                logger.error(f"Could not create index {keys} on {collection}: {e}")
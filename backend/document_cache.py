@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+from lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentCache:
+    """Read-through LRU/TTL cache of MongoDB documents looked up by one unique field.
+
+    Every lookup uses the same projection, so the cache never holds fields
+    its callers don't read. Concurrent misses on a key share a single query.
+    Writers call invalidate() after changing a document; the TTL bounds how
+    long a change made by another process can go unseen.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, collection, key_field: str, projection: Optional[Dict[str, Any]] = None,
+                 maxsize: int = 1024, ttl: Optional[float] = None,
+                 cacheable: Optional[Callable[[Dict[str, Any]], bool]] = None):
+        self.collection = collection
+        self.key_field = key_field
+        self.projection = {'_id': 0, **(projection or {})}
+        # Documents still changing (e.g. mid-ingest) are returned but not kept
+        self.cacheable = cacheable
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+        # Bumped by every invalidation, so a bulk read can tell whether one overtook it
+        self._generation = 0
+
+    async def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """The document, from memory when possible; treat it as read-only"""
+        doc = self._cache.get(key, self._MISSING)
+        if doc is not self._MISSING:
+            return doc
+
+        task = self._loading.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key))
+            self._loading[key] = task
+            task.add_done_callback(lambda done: self._loaded(key, done))
+        # A cancelled caller mustn't cancel the query others are waiting on
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        doc = await self.collection.find_one({self.key_field: key}, self.projection)
+        # Misses aren't cached: the document may be inserted any moment. Nor is a
+        # read that an invalidate() overtook, as it may predate the write.
+        if doc is not None and (self.cacheable is None or self.cacheable(doc)) \
+                and self._loading.get(key) is asyncio.current_task():
+            self._cache.set(key, doc)
+        return doc
+
+    async def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Dict[str, Any]]:
+        """Documents for several keys: hits from memory, every miss in one $in query.
+        Keys with no document are left out.
+        """
+        found, missing = {}, []
+        for key in dict.fromkeys(keys):
+            doc = self._cache.get(key, self._MISSING)
+            if doc is self._MISSING:
+                missing.append(key)
+            else:
+                found[key] = doc
+        if not missing:
+            return found
+
+        generation = self._generation
+        cursor = self.collection.find({self.key_field: {'$in': missing}}, self.projection)
+        async for doc in cursor:
+            key = doc[self.key_field]
+            found[key] = doc
+            if generation == self._generation and (self.cacheable is None or self.cacheable(doc)):
+                self._cache.set(key, doc)
+        return found
+
+    def _loaded(self, key: Hashable, task: asyncio.Future):
+        if self._loading.get(key) is task:
+            del self._loading[key]
+        if not task.cancelled():
+            # Retrieve the error so it isn't reported as unhandled when every caller gave up
+            task.exception()
+
+    def set(self, key: Hashable, doc: Dict[str, Any]):
+        """Store a document the caller just wrote or completed"""
+        self._cache.set(key, doc)
+
+    def invalidate(self, key: Hashable):
+        self._cache.invalidate(key)
+        self._generation += 1
+        # Later readers start a fresh query instead of joining one from before the write
+        self._loading.pop(key, None)
+
+    def clear(self):
+        self._cache.clear()
+        self._generation += 1
+        self._loading.clear()
+
+    def stats(self) -> dict:
+        return {'collection': self.collection.name, **self._cache.stats()}
@@ -0,0 +1,59 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Segments shorter than this are dropped: they'd render as a single frame at most
+MIN_SEGMENT_SECONDS = 0.04
+
+
+class EditListError(ValueError):
+    """An edit list that can't be rendered against its source"""
+
+
+def normalize_segments(segments: List[Dict[str, float]], duration: Optional[float] = None) -> List[Dict[str, float]]:
+    """Validate ordered source ranges, clamped to the source and rounded to milliseconds.
+
+    Order is kept (segments may repeat or go backwards in the source); the
+    rounding makes equal edit lists compare, and memoize, equal.
+    """
+    normalized = []
+    for index, segment in enumerate(segments):
+        start = round(max(0.0, float(segment['start'])), 3)
+        end = float(segment['end'])
+        if duration is not None:
+            if start >= duration:
+                raise EditListError(f"Segment {index} starts after the end of the video")
+            end = min(end, duration)
+        end = round(end, 3)
+        if end - start < MIN_SEGMENT_SECONDS:
+            raise EditListError(f"Segment {index} is empty")
+        normalized.append({'start': start, 'end': end})
+    if not normalized:
+        raise EditListError("An edit list needs at least one segment")
+    return normalized
+
+
+def map_cues(cues: List[Dict[str, Any]], segments: List[Dict[str, float]]) -> List[Dict[str, Any]]:
+    """Move caption cues from the source timeline onto the edited output.
+
+    Each segment keeps the cues overlapping it, clipped to the segment and
+    shifted to where the segment lands in the output; a cue spanning a cut
+    shows on both sides of it.
+    """
+    if not cues:
+        return []
+    starts = np.array([cue['start'] for cue in cues], dtype=np.float64)
+    ends = np.array([cue['end'] for cue in cues], dtype=np.float64)
+
+    mapped = []
+    offset = 0.0
+    for segment in segments:
+        start, end = segment['start'], segment['end']
+        for index in np.flatnonzero((ends > start) & (starts < end)).tolist():
+            mapped.append({
+                'start': offset + max(starts[index], start) - start,
+                'end': offset + min(ends[index], end) - start,
+                'text': cues[index]['text'],
+            })
+        offset += end - start
+    return mapped
@@ -0,0 +1,60 @@
+import os
+from typing import Any, Dict, Optional
+
+
+class EncodingProfile:
+    """Named x264/x265 speed/quality trade-off shared by every re-encode path"""
+
+    def __init__(self, name: str, preset: str, crf: int, audio_kbps: int, tune: Optional[str] = None):
+        self.name = name
+        self.preset = preset
+        self.crf = crf
+        self.audio_kbps = audio_kbps
+        self.tune = tune
+
+    def video_options(self, threads: int = 0, crf: Optional[int] = None,
+                      preset: Optional[str] = None) -> Dict[str, Any]:
+        """Encoder options without the codec, so they apply to libx264 and libx265 alike"""
+        options = {'preset': preset or self.preset, 'crf': self.crf if crf is None else crf}
+        if self.tune:
+            options['tune'] = self.tune
+        if threads:
+            options['threads'] = threads
+        return options
+
+    def audio_options(self) -> Dict[str, Any]:
+        return {'c:a': 'aac', 'b:a': f"{self.audio_kbps}k"}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'preset': self.preset,
+            'crf': self.crf,
+            'tune': self.tune,
+            'audio_kbps': self.audio_kbps,
+        }
+
+
+# Presets above 'faster' buy little quality per CPU second on many-core
+# nodes, where jobs run side by side; 'archive' is the exception on purpose.
+ENCODING_PROFILES = {
+    'fast-preview': EncodingProfile('fast-preview', preset='veryfast', crf=28, audio_kbps=96, tune='fastdecode'),
+    'balanced': EncodingProfile('balanced', preset='faster', crf=22, audio_kbps=128),
+    'archive': EncodingProfile('archive', preset='slow', crf=18, audio_kbps=192),
+}
+
+DEFAULT_PROFILE = 'balanced'
+
+
+def get_profile(name: Optional[str] = None) -> EncodingProfile:
+    if name is None:
+        name = DEFAULT_PROFILE
+    if name not in ENCODING_PROFILES:
+        raise ValueError(f"Unknown encoding profile: {name}")
+    return ENCODING_PROFILES[name]
+
+
+def encoder_threads(workers: int, cpu_count: Optional[int] = None) -> int:
+    """Threads per encode so `workers` concurrent encodes share the cores without oversubscribing"""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, cpu_count // max(1, workers))
@@ -0,0 +1,93 @@
+import time
+import logging
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[Dict[str, Optional[float]]], None]
+
+
+def parse_speed(value: str) -> Optional[float]:
+    """Parse ffmpeg's speed field ("1.53x", "N/A")"""
+    value = value.strip().rstrip('x')
+    try:
+        speed = float(value)
+    except ValueError:
+        return None
+    return speed if speed > 0 else None
+
+
+class ProgressParser:
+    """Turn ffmpeg `-progress` key=value blocks into throttled progress updates"""
+
+    def __init__(
+        self,
+        duration: Optional[float],
+        on_progress: ProgressCallback,
+        min_interval: float = 1.0,
+        start: float = 0.0,
+        span: float = 1.0,
+    ):
+        self.duration = duration if duration and duration > 0 else None
+        self.on_progress = on_progress
+        self.min_interval = min_interval
+        # Maps this run onto [start, start + span] of the overall operation
+        self.start = start
+        self.span = span
+
+        self._block: Dict[str, str] = {}
+        self._last_emit = 0.0
+
+    def feed_line(self, line: str):
+        """Consume one line of ffmpeg progress output"""
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            return
+        self._block[key] = value
+        # Every block ends with progress=continue or progress=end
+        if key == 'progress':
+            self._flush(final=value == 'end')
+            self._block = {}
+
+    def _flush(self, final: bool):
+        now = time.monotonic()
+        if not final and now - self._last_emit < self.min_interval:
+            return
+        self._last_emit = now
+
+        out_time = self._out_time()
+        speed = parse_speed(self._block.get('speed', ''))
+
+        fraction = None
+        eta = None
+        if final:
+            fraction = 1.0
+            eta = 0.0
+        elif self.duration and out_time is not None:
+            fraction = min(1.0, max(0.0, out_time / self.duration))
+            if speed:
+                eta = max(0.0, (self.duration - out_time) / speed)
+
+        if fraction is None:
+            return
+
+        try:
+            self.on_progress({
+                'progress': self.start + fraction * self.span,
+                'speed': speed,
+                'eta': eta,
+                'out_time': out_time,
+            })
+        except Exception as e:
+            logger.error(f"Progress callback failed: {e}")
+
+    def _out_time(self) -> Optional[float]:
+        # out_time_ms is in microseconds too, despite its name
+        for key in ('out_time_us', 'out_time_ms'):
+            value = self._block.get(key)
+            if value and value != 'N/A':
+                try:
+                    return int(value) / 1_000_000
+                except ValueError:
+                    continue
+        return None
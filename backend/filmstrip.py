@@ -0,0 +1,68 @@
+import math
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from subtitle_renderer import format_timestamps, to_millis
+
+# Intervals picked automatically, so sheets for similar videos line up
+AUTO_INTERVALS = (1, 2, 5, 10, 15, 30, 60, 120, 300)
+
+
+class FilmstripLayout:
+    """Grid of a filmstrip sprite sheet: one tile every `interval` seconds, row by row"""
+
+    def __init__(self, duration: float, interval: float, tile_width: int, tile_height: int, columns: int):
+        self.duration = duration
+        self.interval = interval
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.count = max(1, math.ceil(duration / interval))
+        self.columns = min(columns, self.count)
+        self.rows = math.ceil(self.count / self.columns)
+
+    @classmethod
+    def plan(cls, duration: float, width: int, height: int, interval: Optional[float] = None,
+             tile_width: int = 160, columns: int = 10, target_tiles: int = 200,
+             max_tiles: int = 1000) -> 'FilmstripLayout':
+        """Layout for a video; without an interval, aim for about `target_tiles` tiles"""
+        if interval is None:
+            interval = next(
+                (step for step in AUTO_INTERVALS if duration / step <= target_tiles), AUTO_INTERVALS[-1]
+            )
+        # Keep the sheet well inside JPEG's 65535 px limit
+        interval = max(interval, math.ceil(duration / max_tiles * 1000) / 1000)
+        # Even dimensions keep the scaler and chroma subsampling happy
+        tile_height = max(2, round(tile_width * height / max(width, 1) / 2) * 2)
+        return cls(duration, interval, tile_width, tile_height, columns)
+
+    @property
+    def sheet_size(self):
+        return self.columns * self.tile_width, self.rows * self.tile_height
+
+    def to_vtt(self, image_url: str) -> str:
+        """WebVTT thumbnails index: each cue points at its tile with a #xywh fragment"""
+        index = np.arange(self.count)
+        starts = to_millis(index * self.interval)
+        ends = to_millis(np.minimum((index + 1) * self.interval, max(self.duration, 0.001)))
+        start_times = format_timestamps(starts, '%02d:%02d:%02d.%03d')
+        end_times = format_timestamps(ends, '%02d:%02d:%02d.%03d')
+        xs = ((index % self.columns) * self.tile_width).tolist()
+        ys = ((index // self.columns) * self.tile_height).tolist()
+        return "WEBVTT\n\n" + ''.join(
+            f"{start} --> {end}\n{image_url}#xywh={x},{y},{self.tile_width},{self.tile_height}\n\n"
+            for start, end, x, y in zip(start_times, end_times, xs, ys)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        width, height = self.sheet_size
+        return {
+            'interval': self.interval,
+            'count': self.count,
+            'columns': self.columns,
+            'rows': self.rows,
+            'tile_width': self.tile_width,
+            'tile_height': self.tile_height,
+            'sheet_width': width,
+            'sheet_height': height,
+        }
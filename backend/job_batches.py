@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from job_store import FINISHED_STATUSES, JobStore, public_job
+
+logger = logging.getLogger(__name__)
+
+
+def item_state(item: Dict[str, Any], job: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """A batch item with its job's public state; items rejected at submit have no job"""
+    state = {'index': item['index'], 'video_id': item['video_id'], 'operation': item['operation']}
+    if job is not None:
+        state.update(public_job(job))
+    elif item.get('job_id'):
+        # Finished jobs are evicted after JOB_TTL_SECONDS
+        state.update(job_id=item['job_id'], status='expired', progress=None)
+    else:
+        state.update(job_id=None, status='failed', progress=1.0, error=item.get('error'))
+    return state
+
+
+def batch_progress(items: List[Dict[str, Any]], jobs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate status and progress of a batch from its items' jobs"""
+    states = [item_state(item, jobs.get(item.get('job_id'))) for item in items]
+    counts: Dict[str, int] = {}
+    for state in states:
+        counts[state['status']] = counts.get(state['status'], 0) + 1
+
+    finished = sum(1 for state in states if state['status'] in FINISHED_STATUSES + ('expired',))
+    failed = counts.get('failed', 0)
+    if finished < len(states):
+        status = 'processing' if counts.get('processing') or finished else 'pending'
+    elif failed == 0:
+        status = 'completed'
+    else:
+        status = 'failed' if failed == len(states) else 'partial'
+
+    done = sum(1.0 if state['status'] in FINISHED_STATUSES + ('expired',) else state['progress'] or 0.0
+               for state in states)
+    return {
+        'status': status,
+        'progress': round(done / len(states), 4) if states else 1.0,
+        'total': len(states),
+        'finished': finished,
+        'counts': counts,
+        'items': states,
+    }
+
+
+async def finished_items(store: JobStore, items: List[Dict[str, Any]],
+                         is_disconnected: Callable[[], Awaitable[bool]],
+                         resync_interval: float = 2.0) -> AsyncIterator[Dict[str, Any]]:
+    """Yield each item's final state as its job finishes, in completion order.
+
+    Unfinished jobs are re-read with one query whenever this process changes one
+    of them, and every resync_interval for jobs run by other workers.
+    """
+    waiting = {item['job_id']: item for item in items if item.get('job_id')}
+    for item in items:
+        if not item.get('job_id'):
+            yield item_state(item, None)
+
+    changed = asyncio.Event()
+
+    def on_job_change(job_id: str, fields: Dict[str, Any]):
+        if job_id in waiting and fields.get('status') in FINISHED_STATUSES:
+            changed.set()
+
+    store.add_listener(on_job_change)
+    try:
+        while waiting and not await is_disconnected():
+            changed.clear()
+            jobs = await store.get_many(list(waiting))
+            for job_id in list(waiting):
+                job = jobs.get(job_id)
+                if job is None or job['status'] in FINISHED_STATUSES:
+                    yield item_state(waiting.pop(job_id), job)
+            if waiting:
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=resync_interval)
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        store.remove_listener(on_job_change)
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set
+
+from job_store import JobStore, FINISHED_STATUSES, PUBLIC_JOB_FIELDS, public_job
+
+logger = logging.getLogger(__name__)
+
+
+class JobSubscription:
+    """A bounded queue of job state snapshots for one subscriber"""
+
+    def __init__(self, job_id: str, maxsize: int):
+        self.job_id = job_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, state: Dict[str, Any]):
+        """Enqueue a snapshot without ever blocking the publisher"""
+        if self.queue.full():
+            # Snapshots are complete states, so a slow reader only needs the latest
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(state)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next snapshot, or None on timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class JobEventBroadcaster:
+    """Fan job state changes out to every subscriber of a job"""
+
+    def __init__(self, store: JobStore, queue_size: int = 16, resync_interval: float = 2.0):
+        self.store = store
+        self.queue_size = queue_size
+        self.resync_interval = resync_interval
+
+        self._subscribers: Dict[str, Set[JobSubscription]] = {}
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._resync_task: Optional[asyncio.Task] = None
+
+        store.add_listener(self.on_job_change)
+
+    def start(self):
+        self._resync_task = asyncio.create_task(self._resync_loop(), name='job-events-resync')
+
+    async def stop(self):
+        if self._resync_task:
+            self._resync_task.cancel()
+            await asyncio.gather(self._resync_task, return_exceptions=True)
+            self._resync_task = None
+
+    async def subscribe(self, job_id: str) -> Optional[JobSubscription]:
+        """Subscribe to a job; the current state is queued first. None if unknown"""
+        job = await self.store.get(job_id)
+        if not job:
+            return None
+
+        subscription = JobSubscription(job_id, self.queue_size)
+        self._subscribers.setdefault(job_id, set()).add(subscription)
+        self._states.setdefault(job_id, public_job(job))
+        subscription.offer(dict(self._states[job_id]))
+        return subscription
+
+    def unsubscribe(self, subscription: JobSubscription):
+        subscribers = self._subscribers.get(subscription.job_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.job_id]
+            self._states.pop(subscription.job_id, None)
+
+    def on_job_change(self, job_id: str, fields: Dict[str, Any]):
+        """JobStore listener: merge changed fields and publish the new state"""
+        if job_id not in self._subscribers:
+            return
+        state = self._states[job_id]
+        state.update({k: v for k, v in fields.items() if k in PUBLIC_JOB_FIELDS})
+        self._publish(job_id, state)
+
+    def _publish(self, job_id: str, state: Dict[str, Any]):
+        for subscription in self._subscribers.get(job_id, ()):
+            subscription.offer(dict(state))
+
+    async def _resync_loop(self):
+        # Jobs running in another worker process never reach our listener,
+        # so re-read subscribed jobs from the store at a slow interval.
+        while True:
+            await asyncio.sleep(self.resync_interval)
+            for job_id in list(self._subscribers):
+                try:
+                    job = await self.store.get(job_id)
+                except Exception as e:
+                    logger.error(f"Failed to resync job {job_id}: {e}")
+                    continue
+                if job is None or job_id not in self._subscribers:
+                    continue
+                state = public_job(job)
+                if state != self._states.get(job_id):
+                    self._states[job_id] = state
+                    self._publish(job_id, state)
+
+
+def is_finished(state: Dict[str, Any]) -> bool:
+    return state.get('status') in FINISHED_STATUSES
@@ -0,0 +1,486 @@
+import os
+import copy
+import uuid
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# Fields exposed through /api/job/{job_id}
+PUBLIC_JOB_FIELDS = ('job_id', 'status', 'progress', 'speed', 'eta', 'message', 'result', 'error')
+
+FINISHED_STATUSES = ('completed', 'failed')
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip scheduler bookkeeping from a job document"""
+    return {field: job.get(field) for field in PUBLIC_JOB_FIELDS}
+
+
+class NonRetryableJobError(Exception):
+    """Raised by a job handler when retrying cannot help (e.g. missing video)"""
+
+
+class JobStore(ABC):
+    """Persistent job state shared by every worker"""
+
+    def __init__(self, ttl_seconds: int = 86400):
+        self.ttl_seconds = ttl_seconds
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+    def add_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        """Call listener(job_id, changed_fields) after every job state change"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, job_id: str, fields: Dict[str, Any]):
+        for listener in self._listeners:
+            try:
+                listener(job_id, fields)
+            except Exception as e:
+                logger.error(f"Job listener failed: {e}")
+
+    def _new_job(self, job_type: str, payload: Dict[str, Any], message: str,
+                 priority: int, max_attempts: int,
+                 result: Optional[Dict[str, Any]] = None, turn: int = 0) -> Dict[str, Any]:
+        now = _now()
+        job = {
+            'job_id': str(uuid.uuid4()),
+            'type': job_type,
+            'payload': payload,
+            'status': 'pending',
+            'progress': 0.0,
+            'speed': None,
+            'eta': None,
+            'message': message,
+            'result': None,
+            'error': None,
+            'priority': priority,
+            'turn': turn,
+            'attempts': 0,
+            'max_attempts': max_attempts,
+            'lease_owner': None,
+            'lease_expires_at': None,
+            'available_at': now,
+            'created_at': now,
+            'updated_at': now,
+            'finished_at': None,
+            'expires_at': None,
+        }
+        if result is not None:
+            job.update(self._finished_fields('completed'), progress=1.0, eta=0.0, result=result)
+        return job
+
+    def _finished_fields(self, status: str) -> Dict[str, Any]:
+        now = _now()
+        return {
+            'status': status,
+            'lease_owner': None,
+            'lease_expires_at': None,
+            'updated_at': now,
+            'finished_at': now,
+            'expires_at': now + timedelta(seconds=self.ttl_seconds),
+        }
+
+    async def ensure_indexes(self):
+        """Create any indexes the store relies on"""
+
+    @abstractmethod
+    async def create(self, job_type: str, payload: Dict[str, Any], message: str = '',
+                     priority: int = 0, max_attempts: int = 3,
+                     result: Optional[Dict[str, Any]] = None, turn: int = 0) -> Dict[str, Any]:
+        """Insert a pending job (or a completed one when result is given) and return it.
+
+        Among jobs of equal priority, lower turns are claimed first: giving a
+        batch's jobs turns 0, 1, 2, ... interleaves concurrent batches and lets
+        single jobs (turn 0) overtake a long batch.
+        """
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a job by id"""
+
+    async def get_many(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch several jobs by id; unknown ids are left out"""
+        jobs = {}
+        for job_id in job_ids:
+            job = await self.get(job_id)
+            if job:
+                jobs[job_id] = job
+        return jobs
+
+    @abstractmethod
+    async def update(self, job_id: str, **fields) -> None:
+        """Set fields on a job (progress, message, ...)"""
+
+    @abstractmethod
+    async def claim(self, worker_id: str, lease_seconds: float,
+                    job_types: List[str]) -> Optional[Dict[str, Any]]:
+        """Atomically lease the next runnable job: highest priority, then lowest turn, then oldest"""
+
+    @abstractmethod
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend a lease; False if the worker no longer owns the job"""
+
+    @abstractmethod
+    async def complete(self, job_id: str, result: Optional[Dict[str, Any]], message: str) -> None:
+        """Mark a job completed"""
+
+    @abstractmethod
+    async def fail(self, job_id: str, error: str, retry_delay: Optional[float]) -> str:
+        """Fail a job, or requeue it after retry_delay seconds. Returns the new status"""
+
+    @abstractmethod
+    async def evict_finished(self) -> int:
+        """Delete finished jobs past their TTL"""
+
+
+class InMemoryJobStore(JobStore):
+    """Process-local job store, for tests and single-worker development"""
+
+    def __init__(self, ttl_seconds: int = 86400):
+        super().__init__(ttl_seconds)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+
+    async def create(self, job_type, payload, message='', priority=0, max_attempts=3, result=None, turn=0):
+        job = self._new_job(job_type, payload, message, priority, max_attempts, result, turn)
+        self._jobs[job['job_id']] = job
+        return copy.deepcopy(job)
+
+    async def get(self, job_id):
+        job = self._jobs.get(job_id)
+        return copy.deepcopy(job) if job else None
+
+    async def update(self, job_id, **fields):
+        job = self._jobs.get(job_id)
+        if job:
+            job.update(fields, updated_at=_now())
+            self._notify(job_id, fields)
+
+    async def claim(self, worker_id, lease_seconds, job_types):
+        async with self._lock:
+            now = _now()
+            runnable = [
+                job for job in self._jobs.values()
+                if job['type'] in job_types and (
+                    (job['status'] == 'pending' and job['available_at'] <= now) or
+                    (job['status'] == 'processing' and job['lease_expires_at'] < now)
+                )
+            ]
+            if not runnable:
+                return None
+
+            job = min(runnable, key=lambda j: (-j['priority'], j.get('turn', 0), j['created_at']))
+            job.update(
+                status='processing',
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=job['attempts'] + 1,
+                updated_at=now,
+            )
+            self._notify(job['job_id'], {'status': 'processing'})
+            return copy.deepcopy(job)
+
+    async def heartbeat(self, job_id, worker_id, lease_seconds):
+        job = self._jobs.get(job_id)
+        if not job or job['lease_owner'] != worker_id or job['status'] != 'processing':
+            return False
+        job['lease_expires_at'] = _now() + timedelta(seconds=lease_seconds)
+        return True
+
+    async def complete(self, job_id, result, message):
+        job = self._jobs.get(job_id)
+        if job:
+            job.update(self._finished_fields('completed'), progress=1.0, eta=0.0, result=result, message=message)
+            self._notify(job_id, job)
+
+    async def fail(self, job_id, error, retry_delay):
+        job = self._jobs.get(job_id)
+        if not job:
+            return 'failed'
+        if retry_delay is not None:
+            job.update(
+                status='pending',
+                error=error,
+                lease_owner=None,
+                lease_expires_at=None,
+                available_at=_now() + timedelta(seconds=retry_delay),
+                updated_at=_now(),
+            )
+            self._notify(job_id, job)
+            return 'pending'
+        job.update(self._finished_fields('failed'), error=error, message=f'Failed: {error}')
+        self._notify(job_id, job)
+        return 'failed'
+
+    async def evict_finished(self):
+        now = _now()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['expires_at'] is not None and job['expires_at'] <= now
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+
+class MongoJobStore(JobStore):
+    """Job store backed by the `jobs` collection, shared across workers"""
+
+    def __init__(self, db, ttl_seconds: int = 86400):
+        super().__init__(ttl_seconds)
+        self.collection = db.jobs
+
+    async def ensure_indexes(self):
+        await self.collection.create_index('job_id', unique=True)
+        await self.collection.create_index([
+            ('status', ASCENDING),
+            ('type', ASCENDING),
+            ('priority', DESCENDING),
+            ('turn', ASCENDING),
+            ('created_at', ASCENDING),
+        ])
+        # Mongo's TTL monitor removes finished jobs once expires_at passes
+        await self.collection.create_index('expires_at', expireAfterSeconds=0)
+
+    async def create(self, job_type, payload, message='', priority=0, max_attempts=3, result=None, turn=0):
+        job = self._new_job(job_type, payload, message, priority, max_attempts, result, turn)
+        await self.collection.insert_one(dict(job))
+        return job
+
+    async def get(self, job_id):
+        return await self.collection.find_one({'job_id': job_id}, {'_id': 0})
+
+    async def get_many(self, job_ids):
+        cursor = self.collection.find({'job_id': {'$in': list(job_ids)}}, {'_id': 0})
+        return {job['job_id']: job async for job in cursor}
+
+    async def update(self, job_id, **fields):
+        fields['updated_at'] = _now()
+        await self.collection.update_one({'job_id': job_id}, {'$set': fields})
+        self._notify(job_id, fields)
+
+    async def claim(self, worker_id, lease_seconds, job_types):
+        now = _now()
+        job = await self.collection.find_one_and_update(
+            {
+                'type': {'$in': job_types},
+                '$or': [
+                    {'status': 'pending', 'available_at': {'$lte': now}},
+                    {'status': 'processing', 'lease_expires_at': {'$lt': now}},
+                ],
+            },
+            {
+                '$set': {
+                    'status': 'processing',
+                    'lease_owner': worker_id,
+                    'lease_expires_at': now + timedelta(seconds=lease_seconds),
+                    'updated_at': now,
+                },
+                '$inc': {'attempts': 1},
+            },
+            projection={'_id': 0},
+            # Jobs from before turns existed sort as turn null, i.e. first
+            sort=[('priority', DESCENDING), ('turn', ASCENDING), ('created_at', ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if job:
+            self._notify(job['job_id'], {'status': 'processing'})
+        return job
+
+    async def heartbeat(self, job_id, worker_id, lease_seconds):
+        result = await self.collection.update_one(
+            {'job_id': job_id, 'lease_owner': worker_id, 'status': 'processing'},
+            {'$set': {'lease_expires_at': _now() + timedelta(seconds=lease_seconds)}},
+        )
+        return result.matched_count == 1
+
+    async def complete(self, job_id, result, message):
+        fields = self._finished_fields('completed')
+        fields.update(progress=1.0, eta=0.0, result=result, message=message)
+        await self.collection.update_one({'job_id': job_id}, {'$set': fields})
+        self._notify(job_id, fields)
+
+    async def fail(self, job_id, error, retry_delay):
+        if retry_delay is not None:
+            fields = {
+                'status': 'pending',
+                'error': error,
+                'lease_owner': None,
+                'lease_expires_at': None,
+                'available_at': _now() + timedelta(seconds=retry_delay),
+                'updated_at': _now(),
+            }
+            await self.collection.update_one({'job_id': job_id}, {'$set': fields})
+            self._notify(job_id, fields)
+            return 'pending'
+
+        fields = self._finished_fields('failed')
+        fields.update(error=error, message=f'Failed: {error}')
+        await self.collection.update_one({'job_id': job_id}, {'$set': fields})
+        self._notify(job_id, fields)
+        return 'failed'
+
+    async def evict_finished(self):
+        result = await self.collection.delete_many({'expires_at': {'$lte': _now()}})
+        return result.deleted_count
+
+
+JobHandler = Callable[..., Awaitable[Optional[Dict[str, Any]]]]
+
+
+class JobScheduler:
+    """Lease jobs from a JobStore and run them with heartbeats and retries"""
+
+    def __init__(
+        self,
+        store: JobStore,
+        concurrency: int = 2,
+        lease_seconds: float = 60.0,
+        poll_interval: float = 1.0,
+        retry_backoff: float = 5.0,
+        evict_interval: float = 300.0,
+    ):
+        self.store = store
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_backoff = retry_backoff
+        self.evict_interval = evict_interval
+        self.worker_id = f"{os.uname().nodename}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._completed_messages: Dict[str, str] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    @classmethod
+    def from_env(cls, store: JobStore) -> 'JobScheduler':
+        """Build a scheduler from JOB_* environment variables"""
+        return cls(
+            store,
+            concurrency=int(os.environ.get('JOB_WORKERS', '2')),
+            lease_seconds=float(os.environ.get('JOB_LEASE_SECONDS', '60')),
+            poll_interval=float(os.environ.get('JOB_POLL_INTERVAL', '1.0')),
+        )
+
+    def register(self, job_type: str, handler: JobHandler, completed_message: str = ''):
+        """Handle jobs of job_type with handler(job_id, **payload)"""
+        self._handlers[job_type] = handler
+        self._completed_messages[job_type] = completed_message or f"{job_type.capitalize()} completed"
+
+    async def submit(self, job_type: str, payload: Dict[str, Any], message: str = '',
+                     priority: int = 0, max_attempts: int = 3, turn: int = 0) -> Dict[str, Any]:
+        """Queue a job and wake a local worker"""
+        if job_type not in self._handlers:
+            raise ValueError(f"No handler registered for job type: {job_type}")
+        job = await self.store.create(job_type, payload, message, priority, max_attempts, turn=turn)
+        self._wakeup.set()
+        return job
+
+    async def record_completed(self, job_type: str, payload: Dict[str, Any],
+                               result: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a job that is already done, e.g. for a memoized result"""
+        return await self.store.create(
+            job_type, payload, self._completed_messages.get(job_type, ''), result=result
+        )
+
+    def start(self):
+        self._stopping = False
+        for i in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._worker_loop(), name=f'job-worker-{i}'))
+        self._tasks.append(asyncio.create_task(self._evict_loop(), name='job-evictor'))
+        logger.info(f"Job scheduler started ({self.concurrency} workers, id {self.worker_id})")
+
+    async def stop(self):
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Job scheduler stopped")
+
+    async def _worker_loop(self):
+        while not self._stopping:
+            try:
+                job = await self.store.claim(self.worker_id, self.lease_seconds, list(self._handlers))
+            except Exception as e:
+                logger.error(f"Failed to claim job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(job)
+
+    async def _run_job(self, job: Dict[str, Any]):
+        job_id = job['job_id']
+
+        if job['attempts'] > job['max_attempts']:
+            # Lease expired on the last attempt, the previous worker likely crashed
+            await self.store.fail(job_id, job.get('error') or 'Worker lost during processing', None)
+            return
+
+        handler = self._handlers[job['type']]
+        task = asyncio.create_task(handler(job_id, **job['payload']))
+        heartbeat = asyncio.create_task(self._heartbeat_loop(job_id, task))
+        try:
+            result = await task
+            await self.store.complete(job_id, result, self._completed_messages[job['type']])
+        except asyncio.CancelledError:
+            if self._stopping:
+                raise
+            logger.warning(f"Job {job_id} lost its lease, abandoning")
+        except NonRetryableJobError as e:
+            logger.error(f"{job['type'].capitalize()} job failed: {e}")
+            await self.store.fail(job_id, str(e), None)
+        except Exception as e:
+            logger.error(f"{job['type'].capitalize()} job failed: {e}")
+            retry_delay = None
+            if job['attempts'] < job['max_attempts']:
+                retry_delay = self.retry_backoff * (2 ** (job['attempts'] - 1))
+            status = await self.store.fail(job_id, str(e), retry_delay)
+            if status == 'pending':
+                await self.store.update(
+                    job_id,
+                    message=f"Retrying (attempt {job['attempts'] + 1}/{job['max_attempts']})"
+                )
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat_loop(self, job_id: str, task: asyncio.Task):
+        interval = self.lease_seconds / 3
+        while not task.done():
+            await asyncio.sleep(interval)
+            if not await self.store.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                task.cancel()
+                return
+
+    async def _evict_loop(self):
+        while not self._stopping:
+            try:
+                evicted = await self.store.evict_finished()
+                if evicted:
+                    logger.info(f"Evicted {evicted} finished jobs")
+            except Exception as e:
+                logger.error(f"Job eviction failed: {e}")
+            await asyncio.sleep(self.evict_interval)
@@ -0,0 +1,65 @@
+import os
+import sys
+import bisect
+import logging
+from array import array
+from pathlib import Path
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class KeyframeIndex:
+    """Sorted keyframe timestamps of one video, stored as a packed array of doubles.
+
+    A two hour video at a 2s GOP is ~3600 entries, about 28KB on disk and in
+    memory, so the index is cheap to keep next to the blob and to cache.
+    """
+
+    def __init__(self, timestamps: Iterable[float] = ()):
+        self.timestamps = array('d', sorted(timestamps))
+
+    @classmethod
+    def load(cls, path: Path) -> 'KeyframeIndex':
+        index = cls()
+        with open(path, 'rb') as f:
+            index.timestamps.frombytes(f.read())
+        # Sidecars are little-endian regardless of the host
+        if sys.byteorder == 'big':
+            index.timestamps.byteswap()
+        return index
+
+    def save(self, path: Path):
+        """Write the sidecar atomically so readers never see a partial index"""
+        data = array('d', self.timestamps)
+        if sys.byteorder == 'big':
+            data.byteswap()
+        tmp_path = Path(f"{path}.tmp")
+        with open(tmp_path, 'wb') as f:
+            data.tofile(f)
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def at_or_before(self, timestamp: float) -> Optional[float]:
+        """Last keyframe at or before timestamp"""
+        i = bisect.bisect_right(self.timestamps, timestamp)
+        return self.timestamps[i - 1] if i else None
+
+    def at_or_after(self, timestamp: float) -> Optional[float]:
+        """First keyframe at or after timestamp"""
+        i = bisect.bisect_left(self.timestamps, timestamp)
+        return self.timestamps[i] if i < len(self.timestamps) else None
+
+    def is_keyframe(self, timestamp: float, tolerance: float = 0.05) -> bool:
+        nearest = self.at_or_after(timestamp - tolerance)
+        return nearest is not None and nearest <= timestamp + tolerance
+
+    def stats(self) -> dict:
+        count = len(self.timestamps)
+        span = self.timestamps[-1] - self.timestamps[0] if count > 1 else 0.0
+        return {
+            'count': count,
+            'average_gop': round(span / (count - 1), 3) if count > 1 else None,
+        }
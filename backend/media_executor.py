@@ -0,0 +1,153 @@
+import os
+import asyncio
+import functools
+import logging
+from contextlib import asynccontextmanager
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Default number of concurrent runs per operation. Encodes are the heavy ones,
+# probing and thumbnails are short and should not queue behind a long cut.
+DEFAULT_OPERATION_LIMITS = {
+    'probe': 8,
+    'thumbnail': 4,
+    'trim': 2,
+    'cut': 2,
+    'extract_audio': 2,
+    'add_subtitles': 1,
+    'filmstrip': 2,
+    'renditions': 1,
+    'proxy': 1,
+    'render': 1,
+}
+
+
+class QueueFullError(Exception):
+    """Raised when an operation queue is at its configured depth"""
+
+    def __init__(self, operation: str, depth: int):
+        self.operation = operation
+        self.depth = depth
+        super().__init__(f"Too many queued '{operation}' operations (max {depth})")
+
+
+class MediaExecutor:
+    """Run blocking VideoProcessor calls on a bounded worker pool"""
+
+    def __init__(
+        self,
+        kind: str = 'thread',
+        max_workers: Optional[int] = None,
+        queue_depth: int = 32,
+        operation_limits: Optional[Dict[str, int]] = None,
+    ):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor kind: {kind}")
+
+        self.kind = kind
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.queue_depth = queue_depth
+        self.operation_limits = {**DEFAULT_OPERATION_LIMITS, **(operation_limits or {})}
+
+        self._executor: Optional[Executor] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._queued: Dict[str, int] = {}
+        self._running: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> 'MediaExecutor':
+        """Build an executor from MEDIA_* environment variables"""
+        limits = {}
+        for key, value in os.environ.items():
+            if key.startswith('MEDIA_LIMIT_'):
+                limits[key[len('MEDIA_LIMIT_'):].lower()] = int(value)
+
+        max_workers = os.environ.get('MEDIA_WORKERS')
+        return cls(
+            kind=os.environ.get('MEDIA_EXECUTOR', 'thread'),
+            max_workers=int(max_workers) if max_workers else None,
+            queue_depth=int(os.environ.get('MEDIA_QUEUE_DEPTH', '32')),
+            operation_limits=limits,
+        )
+
+    def start(self):
+        """Create the underlying worker pool"""
+        if self._executor is not None:
+            return
+        if self.kind == 'process':
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='media-worker'
+            )
+        logger.info(f"Media executor started ({self.kind}, {self.max_workers} workers)")
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+            logger.info("Media executor stopped")
+
+    def _semaphore(self, operation: str) -> asyncio.Semaphore:
+        if operation not in self._semaphores:
+            limit = self.operation_limits.get(operation, self.max_workers)
+            self._semaphores[operation] = asyncio.Semaphore(max(1, limit))
+        return self._semaphores[operation]
+
+    @asynccontextmanager
+    async def slot(self, operation: str):
+        """Hold one of operation's slots for work that doesn't run on the pool,
+        such as an ffmpeg process streamed from the event loop"""
+        queued = self._queued.get(operation, 0)
+        if queued >= self.queue_depth:
+            raise QueueFullError(operation, self.queue_depth)
+
+        semaphore = self._semaphore(operation)
+        self._queued[operation] = queued + 1
+        try:
+            await semaphore.acquire()
+        finally:
+            # Leave the queue whether we got a slot or were cancelled waiting
+            self._queued[operation] -= 1
+
+        self._running[operation] = self._running.get(operation, 0) + 1
+        try:
+            yield
+        finally:
+            self._running[operation] -= 1
+            semaphore.release()
+
+    async def run(self, operation: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run func(*args, **kwargs) on the pool, limited per operation"""
+        if self._executor is None:
+            self.start()
+
+        if self.kind == 'process' and kwargs.get('on_progress') is not None:
+            # Callbacks can't cross the process boundary; jobs keep their coarse progress
+            kwargs['on_progress'] = None
+
+        async with self.slot(operation):
+            loop = asyncio.get_running_loop()
+            call = functools.partial(func, *args, **kwargs)
+            return await loop.run_in_executor(self._executor, call)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queued and running operations"""
+        operations = set(self._queued) | set(self._running)
+        return {
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            'queue_depth': self.queue_depth,
+            'operations': {
+                op: {
+                    'queued': self._queued.get(op, 0),
+                    'running': self._running.get(op, 0),
+                    'limit': self.operation_limits.get(op, self.max_workers),
+                }
+                for op in sorted(operations)
+            },
+        }
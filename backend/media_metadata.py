@@ -0,0 +1,137 @@
+import os
+from fractions import Fraction
+from typing import Any, Dict, List, Optional
+
+import ffmpeg
+
+# Streams whose frame rates differ by more than this are treated as variable frame rate
+VFR_TOLERANCE = 0.01
+
+
+def parse_rational(value: Any) -> Optional[float]:
+    """ffprobe rationals ('30000/1001', '25', '0/0', 'N/A') as floats; None when undefined"""
+    if value in (None, '', 'N/A'):
+        return None
+    try:
+        numerator, _, denominator = str(value).partition('/')
+        if denominator and float(denominator) == 0:
+            return None
+        result = float(Fraction(int(numerator), int(denominator or 1))) if denominator else float(numerator)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return result if result > 0 else None
+
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value: Any) -> Optional[int]:
+    number = _float(value)
+    return int(number) if number is not None else None
+
+
+def _rotation(stream: Dict[str, Any]) -> int:
+    """Clockwise display rotation in degrees (0, 90, 180 or 270)"""
+    rotate = _float(stream.get('tags', {}).get('rotate'))
+    if rotate is None:
+        # Newer ffprobe reports a display matrix instead, counter-clockwise
+        for side_data in stream.get('side_data_list', []):
+            if 'rotation' in side_data:
+                rotate = -_float(side_data['rotation'] or 0)
+                break
+    return int(round(rotate or 0)) % 360 // 90 * 90
+
+
+def _stream_record(stream: Dict[str, Any]) -> Dict[str, Any]:
+    record = {
+        'index': stream.get('index'),
+        'type': stream.get('codec_type'),
+        'codec': stream.get('codec_name'),
+        'profile': stream.get('profile'),
+        'bitrate': _int(stream.get('bit_rate')),
+        'duration': _float(stream.get('duration')),
+        'language': stream.get('tags', {}).get('language'),
+    }
+    if stream.get('codec_type') == 'video':
+        record.update({
+            'width': _int(stream.get('width')),
+            'height': _int(stream.get('height')),
+            'pix_fmt': stream.get('pix_fmt'),
+            'fps': parse_rational(stream.get('r_frame_rate')),
+            'avg_fps': parse_rational(stream.get('avg_frame_rate')),
+            'time_base': stream.get('time_base'),
+            'rotation': _rotation(stream),
+            'attached_pic': bool(stream.get('disposition', {}).get('attached_pic')),
+        })
+    elif stream.get('codec_type') == 'audio':
+        record.update({
+            'sample_rate': _int(stream.get('sample_rate')),
+            'channels': _int(stream.get('channels')),
+            'channel_layout': stream.get('channel_layout'),
+        })
+    return record
+
+
+def normalize_probe(probe: Dict[str, Any], path: Optional[str] = None) -> Dict[str, Any]:
+    """One flat, JSON/BSON-safe record from ffprobe's output.
+
+    Every field ffprobe may omit (bit_rate and size are often missing for
+    MKV/WebM) is derived or left None rather than raising.
+    """
+    fmt = probe.get('format', {})
+    streams: List[Dict[str, Any]] = [_stream_record(s) for s in probe.get('streams', [])]
+    # Cover art shows up as a one-frame video stream; it isn't the picture
+    video = next((s for s in streams if s['type'] == 'video' and not s['attached_pic']), None)
+    audio = next((s for s in streams if s['type'] == 'audio'), None)
+    if video is None:
+        raise ValueError("No video stream found")
+
+    duration = _float(fmt.get('duration')) or video['duration'] or (audio or {}).get('duration')
+    file_size = _int(fmt.get('size'))
+    if file_size is None and path:
+        file_size = os.path.getsize(path)
+    bitrate = _int(fmt.get('bit_rate'))
+    if bitrate is None and file_size and duration:
+        bitrate = int(file_size * 8 / duration)
+
+    fps = video['avg_fps'] or video['fps']
+    vfr = bool(video['fps'] and video['avg_fps'] and abs(video['fps'] - video['avg_fps']) > VFR_TOLERANCE * video['fps'])
+    width, height = video['width'], video['height']
+    if video['rotation'] in (90, 270):
+        # Decoders apply the rotation, so outputs have the displayed orientation
+        width, height = height, width
+
+    return {
+        'container': fmt.get('format_name'),
+        'duration': duration,
+        'start_time': _float(fmt.get('start_time')),
+        'file_size': file_size,
+        'bitrate': bitrate,
+        'width': width,
+        'height': height,
+        'coded_width': video['width'],
+        'coded_height': video['height'],
+        'rotation': video['rotation'],
+        'fps': fps,
+        'vfr': vfr,
+        'codec': video['codec'],
+        'profile': video['profile'],
+        'pix_fmt': video['pix_fmt'],
+        'time_base': video['time_base'],
+        'has_audio': audio is not None,
+        'audio_codec': audio['codec'] if audio else None,
+        'audio_channels': audio['channels'] if audio else None,
+        'audio_sample_rate': audio['sample_rate'] if audio else None,
+        # Filled in from the keyframe index at ingest
+        'keyframe_interval': None,
+        'streams': streams,
+    }
+
+
+def probe_media(path: str) -> Dict[str, Any]:
+    """Run ffprobe once and normalize its output"""
+    return normalize_probe(ffmpeg.probe(path), path)
@@ -0,0 +1,296 @@
+import os
+import stat
+import uuid
+import logging
+import mimetypes
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+# More ranges than this get the whole file: each part costs a seek and a
+# header, so hundreds of tiny ranges would amplify a small request
+MAX_RANGES = 16
+
+# Container types the stdlib table gets wrong or doesn't know
+MEDIA_TYPES = {
+    '.mp4': 'video/mp4',
+    '.m4v': 'video/mp4',
+    '.mov': 'video/quicktime',
+    '.mkv': 'video/x-matroska',
+    '.webm': 'video/webm',
+    '.avi': 'video/x-msvideo',
+    '.flv': 'video/x-flv',
+    '.m4s': 'video/iso.segment',
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.mpd': 'application/dash+xml',
+    '.mp3': 'audio/mpeg',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.srt': 'application/x-subrip',
+    '.vtt': 'text/vtt',
+}
+
+Range = Tuple[int, int]  # inclusive start, inclusive end
+
+
+def guess_media_type(path: Path) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix in MEDIA_TYPES:
+        return MEDIA_TYPES[suffix]
+    return mimetypes.guess_type(str(path))[0] or 'application/octet-stream'
+
+
+def parse_range_header(header: str, size: int) -> Optional[List[Range]]:
+    """Parse a `bytes=` Range header into sorted, merged ranges.
+
+    Returns None when the header is malformed or asks for more than
+    MAX_RANGES ranges (serve the whole file) and an empty list when it is
+    well-formed but unsatisfiable (416).
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec:
+        return None
+    if spec.count(',') >= MAX_RANGES:
+        return None
+
+    ranges = []
+    for part in spec.split(','):
+        start_s, sep, end_s = part.strip().partition('-')
+        if not sep:
+            return None
+        try:
+            if not start_s:
+                # Suffix range: the last N bytes
+                length = int(end_s)
+                if length <= 0:
+                    continue
+                ranges.append((max(0, size - length), size - 1))
+                continue
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+        except ValueError:
+            return None
+        if start >= size:
+            continue
+        if start > end:
+            return None
+        ranges.append((start, min(end, size - 1)))
+
+    # Coalesce overlapping and adjacent ranges
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class MediaFileResponse(Response):
+    """File response with byte ranges, validators and conditional GET support"""
+
+    def __init__(
+        self,
+        path: Path,
+        request: Request,
+        media_type: Optional[str] = None,
+        filename: Optional[str] = None,
+        cache_control: str = 'public, max-age=3600',
+        etag: Optional[str] = None,
+    ):
+        self.path = Path(path)
+        self.request = request
+        self.filename = filename
+        self.cache_control = cache_control
+        self.custom_etag = etag
+        super().__init__(media_type=media_type or guess_media_type(self.path))
+
+    def _validators(self, st: os.stat_result) -> Tuple[str, str]:
+        etag = self.custom_etag or f'{st.st_size:x}-{st.st_mtime_ns:x}'
+        return f'"{etag}"', formatdate(st.st_mtime, usegmt=True)
+
+    def _not_modified(self, etag: str, st: os.stat_result) -> bool:
+        headers = self.request.headers
+        if_none_match = headers.get('if-none-match')
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags
+
+        if_modified_since = headers.get('if-modified-since')
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(st.st_mtime) <= since
+        return False
+
+    def _range_applies(self, etag: str, st: os.stat_result) -> bool:
+        if_range = self.request.headers.get('if-range')
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"') or if_range.startswith('W/'):
+            # Weak validators never match for If-Range
+            return if_range == etag
+        try:
+            return int(st.st_mtime) <= parsedate_to_datetime(if_range).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    def _base_headers(self, etag: str, last_modified: str) -> dict:
+        # Headers set on the response object, less the ones that depend on the range
+        headers = {
+            key.decode('latin-1'): value.decode('latin-1')
+            for key, value in self.raw_headers
+            if key not in (b'content-length', b'content-type')
+        }
+        headers.update({
+            'accept-ranges': 'bytes',
+            'etag': etag,
+            'last-modified': last_modified,
+            'cache-control': self.cache_control,
+        })
+        if self.filename:
+            headers['content-disposition'] = f'attachment; filename="{self.filename}"'
+        return headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await self._respond(scope, receive, send)
+        if self.background is not None:
+            await self.background()
+
+    async def _respond(self, scope: Scope, receive: Receive, send: Send):
+        try:
+            st = await anyio.to_thread.run_sync(os.stat, self.path)
+        except FileNotFoundError:
+            await Response('File not found', status_code=404)(scope, receive, send)
+            return
+        if not stat.S_ISREG(st.st_mode):
+            await Response('File not found', status_code=404)(scope, receive, send)
+            return
+
+        size = st.st_size
+        etag, last_modified = self._validators(st)
+        headers = self._base_headers(etag, last_modified)
+        send_body = scope.get('method', 'GET') != 'HEAD'
+
+        if self._not_modified(etag, st):
+            await self._start(send, 304, headers)
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        ranges = None
+        range_header = self.request.headers.get('range')
+        if range_header and self._range_applies(etag, st):
+            ranges = parse_range_header(range_header, size)
+
+        if ranges == []:
+            headers['content-range'] = f'bytes */{size}'
+            headers['content-length'] = '0'
+            await self._start(send, 416, headers)
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        if not ranges:
+            headers['content-type'] = self.media_type
+            headers['content-length'] = str(size)
+            await self._start(send, 200, headers)
+            if send_body:
+                await self._send_file(scope, send, [(0, size - 1)] if size else [])
+            else:
+                await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            headers['content-type'] = self.media_type
+            headers['content-range'] = f'bytes {start}-{end}/{size}'
+            headers['content-length'] = str(end - start + 1)
+            await self._start(send, 206, headers)
+            if send_body:
+                await self._send_file(scope, send, ranges)
+            else:
+                await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        await self._send_multipart(scope, send, headers, ranges, size, send_body)
+
+    async def _send_multipart(self, scope, send, headers, ranges, size, send_body):
+        boundary = uuid.uuid4().hex
+        part_headers = [
+            (
+                f'--{boundary}\r\n'
+                f'Content-Type: {self.media_type}\r\n'
+                f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+            ).encode('latin-1')
+            for start, end in ranges
+        ]
+        closing = f'\r\n--{boundary}--\r\n'.encode('latin-1')
+        length = sum(len(h) for h in part_headers) + sum(end - start + 1 for start, end in ranges)
+        length += 2 * (len(ranges) - 1) + len(closing)
+
+        headers['content-type'] = f'multipart/byteranges; boundary={boundary}'
+        headers['content-length'] = str(length)
+        await self._start(send, 206, headers)
+        if not send_body:
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        async with await anyio.open_file(self.path, 'rb') as f:
+            for i, (start, end) in enumerate(ranges):
+                prefix = (b'\r\n' if i else b'') + part_headers[i]
+                await send({'type': 'http.response.body', 'body': prefix, 'more_body': True})
+                await self._send_range(f, send, start, end)
+        await send({'type': 'http.response.body', 'body': closing})
+
+    async def _send_file(self, scope: Scope, send: Send, ranges: List[Range]):
+        if not ranges:
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        start, end = ranges[0]
+        if 'http.response.zerocopysend' in scope.get('extensions', {}):
+            # Server can sendfile() straight from our descriptor
+            f = await anyio.to_thread.run_sync(open, self.path, 'rb')
+            try:
+                await send({
+                    'type': 'http.response.zerocopysend',
+                    'file': f,
+                    'offset': start,
+                    'count': end - start + 1,
+                })
+            finally:
+                await anyio.to_thread.run_sync(f.close)
+            return
+
+        async with await anyio.open_file(self.path, 'rb') as f:
+            await self._send_range(f, send, start, end)
+        await send({'type': 'http.response.body', 'body': b''})
+
+    @staticmethod
+    async def _send_range(f, send: Send, start: int, end: int):
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+    async def _start(self, send: Send, status: int, headers: dict):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(k.encode('latin-1'), v.encode('latin-1')) for k, v in headers.items()],
+        })
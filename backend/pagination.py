@@ -0,0 +1,87 @@
+import base64
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+
+logger = logging.getLogger(__name__)
+
+
+class CursorError(ValueError):
+    """A page cursor that is malformed or was issued for a different sort"""
+
+
+class KeysetPage:
+    """One page of a keyset-paginated listing, ordered by (sort_field, id_field).
+
+    The cursor carries the last row's sort key and id, so the next page starts
+    with a range query on an index instead of skipping rows, and rows inserted
+    or deleted meanwhile don't shift it. Both keys are sorted in the same
+    direction, so a compound (sort_field, id_field) index serves either order.
+    """
+
+    def __init__(self, sort_field: str, id_field: str, descending: bool = True,
+                 limit: int = 50, cursor: Optional[str] = None):
+        self.sort_field = sort_field
+        self.id_field = id_field
+        self.descending = descending
+        self.limit = limit
+        self.after = self.decode_cursor(cursor) if cursor else None
+
+    def cursor_for(self, doc: Dict[str, Any]) -> str:
+        payload = json.dumps([self.sort_field, self.descending, doc.get(self.sort_field), doc[self.id_field]])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor: str) -> Tuple[Any, str]:
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            sort_field, descending, value, doc_id = json.loads(base64.urlsafe_b64decode(padded))
+        except (ValueError, TypeError) as e:
+            raise CursorError("Invalid cursor") from e
+        if sort_field != self.sort_field or descending != self.descending:
+            raise CursorError("Cursor was issued for a different sort order")
+        return value, doc_id
+
+    def query(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+        """The caller's filters plus "comes after the cursor" in sort order"""
+        if self.after is None:
+            return filters
+        value, doc_id = self.after
+        beyond = '$lt' if self.descending else '$gt'
+        after = {'$or': [
+            {self.sort_field: {beyond: value}},
+            {self.sort_field: value, self.id_field: {beyond: doc_id}},
+        ]}
+        return {'$and': [filters, after]} if filters else after
+
+    def sort(self) -> List[Tuple[str, int]]:
+        direction = DESCENDING if self.descending else ASCENDING
+        return [(self.sort_field, direction), (self.id_field, direction)]
+
+    def find(self, collection, filters: Dict[str, Any], projection: Dict[str, Any]):
+        # One row past the page tells whether there is a next one
+        return collection.find(self.query(filters), projection).sort(self.sort()).limit(self.limit + 1)
+
+    async def stream(self, cursor, items_key: str) -> AsyncIterator[str]:
+        """Encode the page as a JSON object row by row, rather than building it in memory:
+        {items_key: [...], "count": n, "next_cursor": str | null}
+        """
+        yield f'{{"{items_key}": ['
+        count, last = 0, None
+        try:
+            async for doc in cursor:
+                if count == self.limit:
+                    break
+                yield (',' if count else '') + json.dumps(doc, default=str)
+                count, last = count + 1, doc
+            else:
+                last = None
+        except Exception as e:
+            # Headers are already sent; end the document so clients see a short page
+            logger.error(f"Error streaming {items_key}: {e}")
+            last = None
+        finally:
+            await cursor.close()
+        next_cursor = self.cursor_for(last) if last is not None else None
+        yield f'], "count": {count}, "next_cursor": {json.dumps(next_cursor)}}}'
@@ -1,23 +1,47 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 import os
 import logging
-import shutil
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ConfigDict, ValidationError
+from typing import List, Optional, Dict, Any, Literal, Tuple
 import uuid
 from datetime import datetime, timezone
 from contextlib import asynccontextmanager
 import asyncio
 import json
+import re
+import shutil
 
 # Import video processing modules
 from video_processor import VideoProcessor
 from caption_generator import CaptionGenerator
+from media_executor import MediaExecutor, QueueFullError
+from upload_manager import ChunkedUploadManager, UploadError, copy_and_hash
+from content_index import ContentIndex
+from transcript_cache import TranscriptCache
+from media_server import MediaFileResponse
+from lru_cache import LRUCache
+from document_cache import DocumentCache
+from db_indexes import ensure_indexes
+from storage_manager import StorageManager, shard_name
+from pagination import CursorError, KeysetPage
+from keyframe_index import KeyframeIndex
+from filmstrip import FilmstripLayout
+from subtitle_renderer import SUBTITLE_FORMATS, render_subtitles
+from word_timings import WordTimings
+from edit_list import EditListError, map_cues, normalize_segments
+from encoding_profiles import ENCODING_PROFILES, encoder_threads
+from job_store import (
+    JobStore, JobScheduler, InMemoryJobStore, MongoJobStore, NonRetryableJobError, public_job
+)
+from job_events import JobEventBroadcaster, is_finished
+from job_batches import batch_progress, finished_items
 
 
 ROOT_DIR = Path(__file__).parent
@@ -26,13 +50,73 @@ load_dotenv(ROOT_DIR / '.env')
 # Initialize video processing
 UPLOAD_DIR = ROOT_DIR / 'uploads'
 UPLOAD_DIR.mkdir(exist_ok=True)
-video_processor = VideoProcessor(str(UPLOAD_DIR))
+
+# Blocking FFmpeg calls run on this pool so they never stall the event loop
+media_executor = MediaExecutor.from_env()
+
+# One encode per pool worker can run at once; split the cores between them
+video_processor = VideoProcessor(
+    str(UPLOAD_DIR),
+    progress_interval=float(os.environ.get('FFMPEG_PROGRESS_INTERVAL', '1.0')),
+    threads=int(os.environ.get('ENCODER_THREADS', '0')) or encoder_threads(media_executor.max_workers),
+    profile=os.environ.get('ENCODING_PROFILE', 'balanced')
+)
+
+ALLOWED_VIDEO_EXTENSIONS = ['.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv']
+
+# Stored media never changes under a given id, so caches (and CDNs) may keep it
+MEDIA_CACHE_CONTROL = os.environ.get('MEDIA_CACHE_CONTROL', 'public, max-age=86400')
+
+# (collection, id, field) -> Path; the TTL bounds staleness after deletes in other workers
+media_path_cache = LRUCache(
+    maxsize=int(os.environ.get('MEDIA_PATH_CACHE_SIZE', '10000')),
+    ttl=float(os.environ.get('MEDIA_PATH_CACHE_TTL', '60'))
+)
+
+# Filmstrips and streaming renditions are named after their content and layout, so clients may keep them forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+FILMSTRIP_TILE_WIDTH = int(os.environ.get('FILMSTRIP_TILE_WIDTH', '160'))
+
+# Encode the adaptive streaming ladder in the background after every upload
+RENDITIONS_AUTO = os.environ.get('RENDITIONS_AUTO', '0').lower() in ('1', 'true', 'yes')
+
+# Low-resolution, short-GOP stand-in for editor previews, generated after every upload
+PROXY_AUTO = os.environ.get('PROXY_AUTO', '1').lower() in ('1', 'true', 'yes')
+PROXY_HEIGHT = int(os.environ.get('PROXY_HEIGHT', '540'))
+PROXY_KEYFRAME_INTERVAL = 0.5
+
+# Most operations one POST /batches may queue
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', '500'))
+
+# Files the dash muxer writes into a renditions directory
+RENDITION_FILE_PATTERN = re.compile(r'(master\.m3u8|manifest\.mpd|media_\d+\.m3u8|(init|chunk)-stream\d+(-\d+)?\.m4s)')
+
+# Sprite sheet filename -> in-flight build, so concurrent requests share one decode
+filmstrip_builds: Dict[str, asyncio.Future] = {}
+
+# Sidecar filename -> KeyframeIndex; sidecars are immutable once written
+keyframe_cache = LRUCache(maxsize=int(os.environ.get('KEYFRAME_CACHE_SIZE', '256')))
+
+# Read-through caches of hot documents, so jobs and lookups don't re-query MongoDB
+# (created in lifespan once the database is up)
+video_docs: Optional[DocumentCache] = None
+caption_docs: Optional[DocumentCache] = None
+result_docs: Optional[DocumentCache] = None
+
+# (caption_id, format) -> rendered subtitle bytes; captions never change under an id
+subtitle_cache = LRUCache(maxsize=int(os.environ.get('SUBTITLE_CACHE_SIZE', '512')))
 
 # Caption generator will be initialized after environment is loaded
 caption_generator = None
 
-# Store processing jobs in memory (in production, use Redis or DB)
-processing_jobs: Dict[str, Dict[str, Any]] = {}
+# Job store and scheduler (initialized in lifespan once the database is up)
+job_store: Optional[JobStore] = None
+job_scheduler: Optional[JobScheduler] = None
+job_events: Optional[JobEventBroadcaster] = None
+upload_manager: Optional[ChunkedUploadManager] = None
+content_index: Optional[ContentIndex] = None
+# Sharding, temp sweeping, retention and the disk high-water mark for UPLOAD_DIR
+storage: Optional[StorageManager] = None
 
 # Configure logging
 logging.basicConfig(
@@ -55,7 +139,8 @@ db = None
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events"""
-    global client, db, caption_generator
+    global client, db, caption_generator, job_store, job_scheduler, job_events, upload_manager, content_index
+    global video_docs, caption_docs, result_docs, storage
     
     # Startup
     try:
@@ -68,9 +153,76 @@ async def lifespan(app: FastAPI):
         logger.info("Successfully connected to MongoDB")
         
         # Initialize caption generator
-        caption_generator = CaptionGenerator()
+        transcript_cache = TranscriptCache(
+            db,
+            max_entries=int(os.environ.get('TRANSCRIPT_CACHE_MAX_ENTRIES', '1000')),
+            ttl_days=float(os.environ.get('TRANSCRIPT_CACHE_TTL_DAYS', '30'))
+        )
+        await transcript_cache.ensure_indexes()
+        caption_generator = CaptionGenerator(cache=transcript_cache)
         logger.info("Caption generator initialized")
         
+        media_executor.start()
+        
+        upload_manager = ChunkedUploadManager(
+            db,
+            UPLOAD_DIR,
+            chunk_size=int(os.environ.get('UPLOAD_CHUNK_SIZE', str(16 * 1024 * 1024)))
+        )
+        await upload_manager.ensure_indexes()
+        
+        # Upload parts are only leftovers once their session has expired
+        storage = StorageManager.from_env(
+            UPLOAD_DIR, upload_part_max_age=upload_manager.session_ttl.total_seconds() + 3600
+        )
+        await run_in_threadpool(storage.prepare)
+        storage.start()
+        
+        content_index = ContentIndex(db)
+        await content_index.ensure_indexes()
+        await ensure_indexes(db)
+        
+        # Only ready videos are cached: documents mid-ingest are still changing. The
+        # TTL bounds staleness after changes made by other workers.
+        video_docs = DocumentCache(
+            db.videos, 'video_id',
+            maxsize=int(os.environ.get('VIDEO_CACHE_SIZE', '2048')),
+            ttl=float(os.environ.get('VIDEO_CACHE_TTL', '300')),
+            cacheable=lambda doc: doc.get('status') == 'ready'
+        )
+        # Captions and results never change under an id; word timings are only
+        # read by the JSON download and resegmenting, which query for them
+        caption_docs = DocumentCache(
+            db.captions, 'caption_id', {'words': 0},
+            maxsize=int(os.environ.get('CAPTION_CACHE_SIZE', '256'))
+        )
+        result_docs = DocumentCache(
+            db.processed_videos, 'result_id',
+            maxsize=int(os.environ.get('RESULT_CACHE_SIZE', '4096'))
+        )
+        
+        # Initialize job store and scheduler
+        job_ttl = int(os.environ.get('JOB_TTL_SECONDS', '86400'))
+        if os.environ.get('JOB_STORE', 'mongo') == 'memory':
+            job_store = InMemoryJobStore(ttl_seconds=job_ttl)
+        else:
+            job_store = MongoJobStore(db, ttl_seconds=job_ttl)
+        await job_store.ensure_indexes()
+        
+        # Push job state changes to SSE / WebSocket subscribers
+        job_events = JobEventBroadcaster(job_store)
+        job_events.start()
+        
+        job_scheduler = JobScheduler.from_env(job_store)
+        job_scheduler.register('ingest', process_ingest_job, 'Video ready')
+        job_scheduler.register('trim', process_trim_job, 'Video trimmed successfully')
+        job_scheduler.register('cut', process_cut_job, 'Video cut successfully')
+        job_scheduler.register('render', process_render_job, 'Edit list rendered')
+        job_scheduler.register('caption', process_caption_job, 'Captions generated successfully')
+        job_scheduler.register('proxy', process_proxy_job, 'Proxy ready')
+        job_scheduler.register('renditions', process_renditions_job, 'Renditions ready')
+        job_scheduler.start()
+        
     except Exception as e:
         logger.error(f"Failed to initialize services: {e}")
         raise
@@ -78,6 +230,14 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    if job_scheduler:
+        await job_scheduler.stop()
+    if job_events:
+        await job_events.stop()
+    if storage:
+        await storage.stop()
+    media_executor.shutdown(wait=False)
+    
     if client:
         client.close()
         logger.info("MongoDB connection closed")
@@ -120,10 +280,17 @@ class VideoInfo(BaseModel):
     thumbnail_url: Optional[str] = None
     uploaded_at: datetime
 
+EncodingProfileName = Literal['fast-preview', 'balanced', 'archive']
+
 class TrimRequest(BaseModel):
     video_id: str
     start_time: float
     end_time: float
+    mode: Literal['auto', 'copy', 'smart', 'reencode'] = 'auto'
+    # Render from the proxy (fast, low resolution); export the result later for full quality
+    preview: bool = False
+    # Used for whatever gets re-encoded; defaults to ENCODING_PROFILE
+    profile: Optional[EncodingProfileName] = None
 
 class CutSegment(BaseModel):
     start: float
@@ -132,15 +299,60 @@ class CutSegment(BaseModel):
 class CutRequest(BaseModel):
     video_id: str
     segments: List[CutSegment]
+    # auto: stream-copy when segments start on keyframes, otherwise smart cut
+    mode: Literal['auto', 'copy', 'smart', 'reencode'] = 'auto'
+    preview: bool = False
+    profile: Optional[EncodingProfileName] = None
+
+class SubtitleOverlay(BaseModel):
+    caption_id: str
+    font_size: Optional[int] = Field(None, ge=8, le=200)
+
+class OutputSettings(BaseModel):
+    width: Optional[int] = Field(None, ge=16, le=7680)  # height follows the aspect ratio
+    profile: Optional[EncodingProfileName] = None
+    # Overrides of the profile's settings
+    crf: Optional[int] = Field(None, ge=0, le=51)
+    preset: Optional[Literal['ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow']] = None
+    audio_kbps: Optional[int] = Field(None, ge=32, le=512)
+
+class EditList(BaseModel):
+    # Ordered source ranges; the output plays them back to back
+    segments: List[CutSegment] = Field(min_length=1)
+    subtitles: Optional[SubtitleOverlay] = None
+    output: OutputSettings = Field(default_factory=OutputSettings)
+
+class ProjectCreate(BaseModel):
+    video_id: str
+    name: Optional[str] = None
+    edit_list: EditList
 
 class CaptionRequest(BaseModel):
     video_id: str
     language: Optional[str] = None
 
+class ResegmentRequest(BaseModel):
+    max_chars_per_line: int = Field(42, ge=10, le=200)
+    max_lines: int = Field(2, ge=1, le=4)
+    max_duration: float = Field(7.0, gt=0.5, le=30)
+    max_chars_per_second: float = Field(17.0, gt=1, le=60)  # reading speed
+    pause: float = Field(0.7, gt=0)  # silence that always ends a cue
+
+class BatchItem(BaseModel):
+    video_id: str
+    operation: Literal['trim', 'cut', 'captions']
+    # The body of the matching single-video request, minus video_id
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
 class JobStatus(BaseModel):
     job_id: str
     status: str  # pending, processing, completed, failed
     progress: float
+    speed: Optional[float] = None  # encode speed, x realtime
+    eta: Optional[float] = None  # seconds remaining in the current stage
     message: str
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
@@ -161,6 +373,10 @@ async def health_check():
             "status": "healthy",
             "service": "clipix-backend",
             "database": "connected",
+            "media_executor": media_executor.stats(),
+            "caches": [cache.stats() for cache in (video_docs, caption_docs, result_docs) if cache],
+            "encoding": {'profile': video_processor.default_profile.name, 'threads': video_processor.threads},
+            "speech_to_text": caption_generator.backend.stats() if caption_generator else None,
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
     except Exception as e:
@@ -178,6 +394,33 @@ async def root():
     }
 
 
+@api_router.get("/encoding-profiles")
+async def list_encoding_profiles():
+    """Named encoder settings accepted by trim, cut and project renders"""
+    return {
+        'default': video_processor.default_profile.name,
+        'threads': video_processor.threads,
+        'profiles': [profile.to_dict() for profile in ENCODING_PROFILES.values()]
+    }
+
+
+@api_router.get("/storage")
+async def get_storage_usage():
+    """Disk usage, high/low-water marks, and bytes per artifact type and retention tier"""
+    return await run_in_threadpool(storage.stats)
+
+
+@api_router.post("/storage/sweep")
+async def sweep_storage():
+    """Run the storage sweep now instead of waiting for the next interval"""
+    try:
+        result = await run_in_threadpool(storage.sweep)
+        return {**result, 'usage': await run_in_threadpool(storage.stats)}
+    except Exception as e:
+        logger.error(f"Error sweeping storage: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
     """Create a new status check entry"""
@@ -207,24 +450,51 @@ async def create_status_check(input: StatusCheckCreate):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    """Retrieve all status check entries"""
+def iso_utc(value: datetime) -> str:
+    """A timestamp in the form it is stored: UTC ISO 8601 (naive values are taken as UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def time_range(since: Optional[datetime], until: Optional[datetime]) -> Dict[str, str]:
+    """Mongo bounds for a stored ISO timestamp: since <= t < until"""
+    bounds = {}
+    if since:
+        bounds['$gte'] = iso_utc(since)
+    if until:
+        bounds['$lt'] = iso_utc(until)
+    return bounds
+
+
+@api_router.get("/status")
+async def get_status_checks(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    client_name: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Status checks, newest first, one page at a time; pass next_cursor back for the next page"""
     try:
         if db is None:
             raise HTTPException(status_code=503, detail="Database not available")
         
-        # Exclude MongoDB's _id field from the query results
-        status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
-        
-        # Convert ISO string timestamps back to datetime objects
-        for check in status_checks:
-            if isinstance(check['timestamp'], str):
-                check['timestamp'] = datetime.fromisoformat(check['timestamp'])
-        
-        logger.info(f"Retrieved {len(status_checks)} status checks")
-        return status_checks
+        filters: Dict[str, Any] = {}
+        if client_name:
+            filters['client_name'] = client_name
+        timestamp = time_range(since, until)
+        if timestamp:
+            filters['timestamp'] = timestamp
+        
+        page = KeysetPage('timestamp', 'id', descending=True, limit=limit, cursor=cursor)
+        # Timestamps are stored as UTC ISO strings, which sort chronologically, so
+        # rows are streamed as stored instead of parsed into models and re-encoded
+        rows = page.find(db.status_checks, filters, {'_id': 0})
+        return StreamingResponse(page.stream(rows, 'status_checks'), media_type='application/json')
     
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -236,76 +506,446 @@ async def get_status_checks():
 
 @api_router.post("/video/upload")
 async def upload_video(file: UploadFile = File(...)):
-    """Upload a video file for editing (max 10GB)"""
+    """Upload a video file in one multipart request (see /video/upload/init for large files).
+    
+    Probing and thumbnailing run as an ingest job, as for chunked uploads.
+    """
     try:
         # Validate file type
-        allowed_extensions = ['.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv']
         file_ext = Path(file.filename).suffix.lower()
-        if file_ext not in allowed_extensions:
-            raise HTTPException(status_code=400, detail=f"Unsupported file type. Allowed: {allowed_extensions}")
+        if file_ext not in ALLOWED_VIDEO_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=f"Unsupported file type. Allowed: {ALLOWED_VIDEO_EXTENSIONS}")
+        
+        # The size isn't known up front; refuse while storage is past its high-water mark
+        if not await storage.make_room():
+            raise HTTPException(status_code=507, detail="Insufficient storage")
         
         # Generate unique video ID
         video_id = str(uuid.uuid4())
-        safe_filename = f"{video_id}{file_ext}"
+        safe_filename = shard_name(f"{video_id}{file_ext}")
         file_path = UPLOAD_DIR / safe_filename
         
         # Save uploaded file
         logger.info(f"Uploading video: {file.filename} ({file.size} bytes)")
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Get video information
-        video_info = video_processor.get_video_info(str(file_path))
+        file_size, content_hash = await run_in_threadpool(copy_and_hash, file.file, file_path)
         
-        # Generate thumbnail
-        thumbnail_filename = f"{video_id}_thumb.jpg"
-        thumbnail_path = video_processor.get_thumbnail(
-            str(file_path), 
-            video_info['duration'] / 2,  # Middle of video
-            thumbnail_filename
-        )
+        video_doc = await register_upload(video_id, file.filename, safe_filename, file_size, content_hash)
+        job = await submit_ingest(video_doc)
         
-        # Save to database
-        video_doc = {
-            'video_id': video_id,
-            'filename': file.filename,
-            'stored_filename': safe_filename,
-            'duration': video_info['duration'],
-            'width': video_info['width'],
-            'height': video_info['height'],
-            'fps': video_info['fps'],
-            'codec': video_info['codec'],
-            'has_audio': video_info['has_audio'],
-            'file_size': video_info['file_size'],
-            'thumbnail_filename': thumbnail_filename,
-            'uploaded_at': datetime.now(timezone.utc).isoformat()
-        }
+        logger.info(f"Video uploaded successfully: {video_id}")
+        return upload_response(video_doc, job)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error uploading video: {e}")
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+
+class UploadInitRequest(BaseModel):
+    filename: str
+    size: int
+
+
+def upload_error_response(e: UploadError) -> HTTPException:
+    """Map an UploadError onto an HTTP error, including the resume offset"""
+    detail: Any = str(e)
+    if e.received is not None:
+        detail = {'message': str(e), 'received': e.received}
+    return HTTPException(status_code=e.status_code, detail=detail)
+
+
+@api_router.post("/video/upload/init")
+async def init_chunked_upload(request: UploadInitRequest):
+    """Start a resumable chunked upload"""
+    try:
+        file_ext = Path(request.filename).suffix.lower()
+        if file_ext not in ALLOWED_VIDEO_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=f"Unsupported file type. Allowed: {ALLOWED_VIDEO_EXTENSIONS}")
         
-        await db.videos.insert_one(video_doc)
+        if not await storage.make_room(request.size):
+            raise HTTPException(status_code=507, detail="Insufficient storage")
         
-        logger.info(f"Video uploaded successfully: {video_id}")
+        session = await upload_manager.init(request.filename, request.size)
         return {
-            'video_id': video_id,
-            'filename': file.filename,
-            'duration': video_info['duration'],
-            'width': video_info['width'],
-            'height': video_info['height'],
-            'file_size': video_info['file_size'],
-            'thumbnail_url': f"/api/video/{video_id}/thumbnail"
+            'upload_id': session['upload_id'],
+            'chunk_size': upload_manager.chunk_size,
+            'size': session['size'],
+            'received': session['received']
         }
-    
     except HTTPException:
         raise
+    except UploadError as e:
+        raise upload_error_response(e)
     except Exception as e:
-        logger.error(f"Error uploading video: {e}")
+        logger.error(f"Error starting upload: {e}")
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+
+@api_router.get("/video/upload/{upload_id}")
+async def get_chunked_upload(upload_id: str):
+    """Get upload progress, used by clients to resume"""
+    try:
+        session = await upload_manager.get(upload_id)
+        return {
+            'upload_id': upload_id,
+            'chunk_size': upload_manager.chunk_size,
+            'size': session['size'],
+            'received': session['received'],
+            'status': session['status']
+        }
+    except UploadError as e:
+        raise upload_error_response(e)
+
+
+@api_router.put("/video/upload/{upload_id}")
+async def upload_chunk(upload_id: str, offset: int, request: Request):
+    """Write a chunk of raw bytes starting at offset"""
+    try:
+        session = await upload_manager.write_chunk(upload_id, offset, request.stream())
+        return {'upload_id': upload_id, 'received': session['received'], 'size': session['size']}
+    except UploadError as e:
+        raise upload_error_response(e)
+    except Exception as e:
+        logger.error(f"Error writing upload chunk: {e}")
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+
+@api_router.post("/video/upload/{upload_id}/finalize")
+async def finalize_chunked_upload(upload_id: str):
+    """Complete an upload; probing and thumbnailing run as an ingest job"""
+    try:
+        session = await upload_manager.get(upload_id)
+        file_ext = Path(session['filename']).suffix.lower()
+        video_id = str(uuid.uuid4())
+        safe_filename = shard_name(f"{video_id}{file_ext}")
+        
+        session, content_hash = await upload_manager.finalize(upload_id, safe_filename)
+        
+        video_doc = await register_upload(
+            video_id, session['filename'], safe_filename, session['size'], content_hash
+        )
+        job = await submit_ingest(video_doc)
+        
+        logger.info(f"Chunked upload finalized: {video_id}")
+        return upload_response(video_doc, job)
+    except UploadError as e:
+        raise upload_error_response(e)
+    except Exception as e:
+        logger.error(f"Error finalizing upload: {e}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
+@api_router.delete("/video/upload/{upload_id}")
+async def abort_chunked_upload(upload_id: str):
+    """Abort an upload and discard the partial file"""
+    try:
+        await upload_manager.abort(upload_id)
+        return {'upload_id': upload_id, 'status': 'aborted'}
+    except UploadError as e:
+        raise upload_error_response(e)
+
+
+# Fields probed once per stored blob and shared by every upload of the same bytes
+INGESTED_FIELDS = (
+    'duration', 'width', 'height', 'fps', 'codec', 'bitrate', 'has_audio', 'thumbnail_filename',
+    'keyframes_filename', 'proxy_filename', 'proxy', 'media'
+)
+
+
+async def register_upload(video_id: str, filename: str, stored_filename: str,
+                          file_size: int, content_hash: str) -> Dict[str, Any]:
+    """Deduplicate a freshly stored upload and build its video document"""
+    blob_filename, is_new = await content_index.acquire_blob(content_hash, stored_filename, file_size)
+    
+    video_doc = {
+        'video_id': video_id,
+        'filename': filename,
+        'stored_filename': blob_filename,
+        'file_size': file_size,
+        'content_hash': content_hash,
+        'status': 'processing',
+        'uploaded_at': datetime.now(timezone.utc).isoformat()
+    }
+    
+    if not is_new:
+        # Same bytes already stored: drop our copy and reuse what was probed
+        (UPLOAD_DIR / stored_filename).unlink(missing_ok=True)
+        projection = {'_id': 0, **{field: 1 for field in INGESTED_FIELDS}}
+        sibling = await db.videos.find_one({'content_hash': content_hash, 'status': 'ready'}, projection)
+        if sibling:
+            video_doc.update(sibling, status='ready')
+    
+    return video_doc
+
+
+async def submit_ingest(video_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Store a registered upload's document and queue its ingest job"""
+    await db.videos.insert_one(dict(video_doc))
+    
+    payload = {'video_id': video_doc['video_id']}
+    if video_doc['status'] == 'ready':
+        return await job_scheduler.record_completed('ingest', payload, upload_result(video_doc, video_doc))
+    return await job_scheduler.submit('ingest', payload, message='Reading video metadata...', priority=10)
+
+
+def upload_response(video_doc: Dict[str, Any], job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'video_id': video_doc['video_id'],
+        'filename': video_doc['filename'],
+        'file_size': video_doc['file_size'],
+        'content_hash': video_doc['content_hash'],
+        'status': video_doc['status'],
+        'job_id': job['job_id'],
+        'thumbnail_url': f"/api/video/{video_doc['video_id']}/thumbnail"
+    }
+
+
+async def ingest_video(video_doc: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+    """Probe a stored video and generate its thumbnail; returns the fields to store"""
+    file_path = str(UPLOAD_DIR / video_doc['stored_filename'])
+    content_hash = video_doc.get('content_hash')
+    
+    if job_id:
+        await job_store.update(job_id, progress=0.1, message='Reading video metadata...')
+    video_info = await media_executor.run('probe', video_processor.get_video_info, file_path)
+    
+    if job_id:
+        await job_store.update(job_id, progress=0.3, message='Indexing keyframes...')
+    index = await load_keyframe_index(video_doc)
+    video_info['keyframe_interval'] = index.stats()['average_gop']
+    
+    thumbnail_params = {'position': 'middle'}
+    memo = await content_index.lookup_derived(content_hash, 'thumbnail', thumbnail_params)
+    if memo and (UPLOAD_DIR / memo['thumbnail_filename']).exists():
+        thumbnail_filename = memo['thumbnail_filename']
+    else:
+        if job_id:
+            await job_store.update(job_id, progress=0.5, message='Generating thumbnail...')
+        thumbnail_filename = shard_name(f"{content_hash or video_doc['video_id']}_thumb.jpg")
+        await media_executor.run(
+            'thumbnail',
+            video_processor.get_thumbnail,
+            file_path,
+            video_info['duration'] / 2,  # Middle of video
+            thumbnail_filename
+        )
+        await content_index.store_derived(
+            content_hash, 'thumbnail', thumbnail_params, {'thumbnail_filename': thumbnail_filename}
+        )
+    
+    if job_id:
+        await job_store.update(job_id, progress=0.7, message='Generating filmstrip...')
+    try:
+        await ensure_filmstrip({**video_doc, **video_info})
+    except Exception as e:
+        # The scrubber falls back to the poster thumbnail; don't fail the upload over it
+        logger.warning(f"Filmstrip for {video_doc['video_id']} failed: {e}")
+    
+    return {
+        'duration': video_info['duration'],
+        'width': video_info['width'],
+        'height': video_info['height'],
+        'fps': video_info['fps'],
+        'codec': video_info['codec'],
+        'bitrate': video_info['bitrate'],
+        'has_audio': video_info['has_audio'],
+        'media': video_info,
+        'thumbnail_filename': thumbnail_filename,
+        'keyframes_filename': keyframes_filename(video_doc)
+    }
+
+
+def keyframes_filename(video_doc: Dict[str, Any]) -> str:
+    return video_doc.get('keyframes_filename') or \
+        shard_name(f"{video_doc.get('content_hash') or video_doc['video_id']}.keyframes")
+
+
+async def load_keyframe_index(video_doc: Dict[str, Any]) -> KeyframeIndex:
+    """Keyframe index of a stored video, built on first use and kept as a sidecar file"""
+    filename = keyframes_filename(video_doc)
+    index = keyframe_cache.get(filename)
+    if index is not None:
+        return index
+    
+    path = UPLOAD_DIR / filename
+    try:
+        index = await run_in_threadpool(KeyframeIndex.load, path)
+    except FileNotFoundError:
+        # Uploaded before indexing existed, or the sidecar was lost
+        timestamps = await media_executor.run(
+            'probe', video_processor.get_keyframes, str(UPLOAD_DIR / video_doc['stored_filename'])
+        )
+        index = KeyframeIndex(timestamps)
+        await run_in_threadpool(index.save, path)
+        await content_index.store_derived(
+            video_doc.get('content_hash'), 'keyframes', {}, {'keyframes_filename': filename}
+        )
+        logger.info(f"Keyframe index built: {filename} ({len(index)} keyframes)")
+    
+    keyframe_cache.set(filename, index)
+    return index
+
+
+def filmstrip_layout(video_doc: Dict[str, Any], interval: Optional[float] = None) -> FilmstripLayout:
+    return FilmstripLayout.plan(
+        video_doc['duration'], video_doc['width'], video_doc['height'],
+        interval=interval, tile_width=FILMSTRIP_TILE_WIDTH
+    )
+
+
+def filmstrip_filename(video_doc: Dict[str, Any], layout: FilmstripLayout) -> str:
+    return shard_name(
+        f"{video_doc.get('content_hash') or video_doc['video_id']}_filmstrip_{layout.interval:g}s_{layout.tile_width}.jpg"
+    )
+
+
+async def ensure_filmstrip(video_doc: Dict[str, Any], interval: Optional[float] = None) -> FilmstripLayout:
+    """Build the video's sprite sheet for `interval` unless it already exists"""
+    layout = filmstrip_layout(video_doc, interval)
+    filename = filmstrip_filename(video_doc, layout)
+    if (UPLOAD_DIR / filename).exists():
+        return layout
+    
+    build = filmstrip_builds.get(filename)
+    if build is None:
+        build = asyncio.ensure_future(build_filmstrip(video_doc, layout, filename))
+        filmstrip_builds[filename] = build
+        build.add_done_callback(lambda _: filmstrip_builds.pop(filename, None))
+    # A client that goes away doesn't cancel the build for everyone else
+    await asyncio.shield(build)
+    return layout
+
+
+async def build_filmstrip(video_doc: Dict[str, Any], layout: FilmstripLayout, filename: str):
+    index = await load_keyframe_index(video_doc)
+    average_gop = index.stats()['average_gop']
+    await media_executor.run(
+        'filmstrip',
+        video_processor.generate_filmstrip,
+        str(UPLOAD_DIR / video_doc['stored_filename']),
+        layout,
+        filename,
+        keyframes_only=bool(average_gop) and average_gop <= layout.interval
+    )
+    await content_index.store_derived(
+        video_doc.get('content_hash'), 'filmstrip',
+        {'interval': layout.interval, 'tile_width': layout.tile_width},
+        {'filmstrip_filename': filename}
+    )
+
+
+async def process_ingest_job(job_id: str, video_id: str):
+    """Background task for probing and thumbnailing an uploaded video"""
+    video_doc = await db.videos.find_one({'video_id': video_id})
+    if not video_doc:
+        raise NonRetryableJobError("Video not found")
+    
+    try:
+        fields = await ingest_video(video_doc, job_id)
+    except Exception as e:
+        await db.videos.update_one(
+            {'video_id': video_id},
+            {'$set': {'status': 'failed', 'error': str(e)}}
+        )
+        raise
+    
+    await db.videos.update_one(
+        {'video_id': video_id},
+        {'$set': {**fields, 'status': 'ready', 'error': None}}
+    )
+    video_docs.invalidate(video_id)
+    await queue_derived_media(video_id)
+    
+    return upload_result(video_doc, fields)
+
+
+def upload_result(video_doc: Dict[str, Any], fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'video_id': video_doc['video_id'],
+        'filename': video_doc['filename'],
+        'duration': fields['duration'],
+        'width': fields['width'],
+        'height': fields['height'],
+        'file_size': video_doc['file_size'],
+        'thumbnail_url': f"/api/video/{video_doc['video_id']}/thumbnail"
+    }
+
+
+async def release_video_files(video_doc: Dict[str, Any]):
+    """Drop a video's reference to its stored bytes, deleting them if it was the last"""
+    content_hash = video_doc.get('content_hash')
+    if not content_hash:
+        # Uploaded before deduplication: the files belong to this video alone
+        for key in ('stored_filename', 'thumbnail_filename', 'keyframes_filename', 'proxy_filename'):
+            if video_doc.get(key):
+                (UPLOAD_DIR / video_doc[key]).unlink(missing_ok=True)
+        pattern = f"{video_doc['video_id']}_filmstrip_*.jpg"
+        for path in [*UPLOAD_DIR.glob(pattern), *UPLOAD_DIR.glob(f"*/{pattern}")]:
+            path.unlink(missing_ok=True)
+        dirname = renditions_dirname(video_doc)
+        # Flat, if encoded before sharding
+        for path in (UPLOAD_DIR / dirname, UPLOAD_DIR / Path(dirname).name):
+            shutil.rmtree(path, ignore_errors=True)
+        keyframe_cache.invalidate(keyframes_filename(video_doc))
+        return
+    
+    if await content_index.release_blob(content_hash):
+        (UPLOAD_DIR / video_doc['stored_filename']).unlink(missing_ok=True)
+        entries = await content_index.release_derived(content_hash)
+        # Trim, cut and render outputs: the files and their result documents
+        result_ids = [entry['result']['result_id'] for entry in entries if 'result_id' in entry['result']]
+        if result_ids:
+            async for result_doc in db.processed_videos.find(
+                {'result_id': {'$in': result_ids}}, {'_id': 0, 'result_id': 1, 'output_filename': 1}
+            ):
+                (UPLOAD_DIR / result_doc['output_filename']).unlink(missing_ok=True)
+            await db.processed_videos.delete_many({'result_id': {'$in': result_ids}})
+            for result_id in result_ids:
+                result_docs.invalidate(result_id)
+                invalidate_media_paths('processed_videos', result_id, 'output_filename')
+        for entry in entries:
+            if entry['operation'] == 'thumbnail':
+                (UPLOAD_DIR / entry['result']['thumbnail_filename']).unlink(missing_ok=True)
+            elif entry['operation'] == 'filmstrip':
+                (UPLOAD_DIR / entry['result']['filmstrip_filename']).unlink(missing_ok=True)
+            elif entry['operation'] == 'proxy':
+                (UPLOAD_DIR / entry['result']['proxy_filename']).unlink(missing_ok=True)
+            elif entry['operation'] == 'renditions':
+                shutil.rmtree(UPLOAD_DIR / entry['result']['renditions_dir'], ignore_errors=True)
+            elif entry['operation'] == 'keyframes':
+                (UPLOAD_DIR / entry['result']['keyframes_filename']).unlink(missing_ok=True)
+                keyframe_cache.invalidate(entry['result']['keyframes_filename'])
+
+
+@api_router.delete("/video/{video_id}")
+async def delete_video(video_id: str):
+    """Delete a video; stored bytes go once no other upload references them"""
+    try:
+        video_doc = await db.videos.find_one_and_delete({'video_id': video_id}, {'_id': 0})
+        if not video_doc:
+            raise HTTPException(status_code=404, detail="Video not found")
+        
+        video_docs.invalidate(video_id)
+        await release_video_files(video_doc)
+        invalidate_media_paths(
+            'videos', video_id, 'stored_filename', 'thumbnail_filename', 'proxy_filename', 'renditions_dir'
+        )
+        
+        logger.info(f"Video deleted: {video_id}")
+        return {'video_id': video_id, 'status': 'deleted'}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting video: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @api_router.get("/video/{video_id}/info")
 async def get_video_info(video_id: str):
     """Get video information"""
     try:
-        video_doc = await db.videos.find_one({'video_id': video_id}, {'_id': 0})
+        video_doc = await load_video(video_id)
         if not video_doc:
             raise HTTPException(status_code=404, detail="Video not found")
         
@@ -317,19 +957,56 @@ async def get_video_info(video_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@api_router.get("/video/{video_id}/stream")
-async def stream_video(video_id: str):
-    """Stream video file"""
+@api_router.get("/video/{video_id}/keyframes")
+async def get_video_keyframes(video_id: str):
+    """Keyframe timestamps, so the editor can show where cuts are stream-copied"""
     try:
-        video_doc = await db.videos.find_one({'video_id': video_id})
+        video_doc = await load_video(video_id)
         if not video_doc:
             raise HTTPException(status_code=404, detail="Video not found")
         
-        video_path = UPLOAD_DIR / video_doc['stored_filename']
+        index = await load_keyframe_index(video_doc)
+        return {'video_id': video_id, **index.stats(), 'keyframes': index.timestamps.tolist()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting keyframes: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def resolve_media_path(collection: str, id_field: str, doc_id: str, filename_field: str) -> Optional[Path]:
+    """Look up a stored file path, cached so range requests don't hit MongoDB"""
+    key = (collection, doc_id, filename_field)
+    path = media_path_cache.get(key)
+    if path is None:
+        doc = await db[collection].find_one({id_field: doc_id}, {'_id': 0, filename_field: 1})
+        if not doc or not doc.get(filename_field):
+            return None
+        path = UPLOAD_DIR / doc[filename_field]
+        media_path_cache.set(key, path)
+    # Served files are the ones worth keeping when storage runs short
+    storage.touch(path)
+    return path
+
+
+def invalidate_media_paths(collection: str, doc_id: str, *filename_fields: str):
+    for field in filename_fields:
+        media_path_cache.invalidate((collection, doc_id, field))
+
+
+@api_router.api_route("/video/{video_id}/stream", methods=["GET", "HEAD"])
+async def stream_video(video_id: str, request: Request):
+    """Stream video file with byte-range and conditional request support"""
+    try:
+        video_path = await resolve_media_path('videos', 'video_id', video_id, 'stored_filename')
+        if video_path is None:
+            raise HTTPException(status_code=404, detail="Video not found")
+        
         if not video_path.exists():
+            invalidate_media_paths('videos', video_id, 'stored_filename')
             raise HTTPException(status_code=404, detail="Video file not found")
         
-        return FileResponse(video_path, media_type="video/mp4")
+        return MediaFileResponse(video_path, request, cache_control=MEDIA_CACHE_CONTROL)
     except HTTPException:
         raise
     except Exception as e:
@@ -337,19 +1014,19 @@ async def stream_video(video_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@api_router.get("/video/{video_id}/thumbnail")
-async def get_thumbnail(video_id: str):
+@api_router.api_route("/video/{video_id}/thumbnail", methods=["GET", "HEAD"])
+async def get_thumbnail(video_id: str, request: Request):
     """Get video thumbnail"""
     try:
-        video_doc = await db.videos.find_one({'video_id': video_id})
-        if not video_doc:
+        thumbnail_path = await resolve_media_path('videos', 'video_id', video_id, 'thumbnail_filename')
+        if thumbnail_path is None:
             raise HTTPException(status_code=404, detail="Video not found")
         
-        thumbnail_path = UPLOAD_DIR / video_doc['thumbnail_filename']
         if not thumbnail_path.exists():
+            invalidate_media_paths('videos', video_id, 'thumbnail_filename')
             raise HTTPException(status_code=404, detail="Thumbnail not found")
         
-        return FileResponse(thumbnail_path, media_type="image/jpeg")
+        return MediaFileResponse(thumbnail_path, request, cache_control=MEDIA_CACHE_CONTROL)
     except HTTPException:
         raise
     except Exception as e:
@@ -357,287 +1034,1027 @@ async def get_thumbnail(video_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def process_trim_job(job_id: str, video_id: str, start_time: float, end_time: float):
-    """Background task for trimming video"""
+async def load_video(video_id: str) -> Optional[Dict[str, Any]]:
+    """Video document through video_docs; treat the result as read-only.
+    
+    Ready videos probed before metadata records existed get theirs on first load.
+    """
+    video_doc = await video_docs.get(video_id)
+    if not video_doc or video_doc.get('status') != 'ready' or 'media' in video_doc:
+        return video_doc
+    
     try:
-        processing_jobs[job_id]['status'] = 'processing'
-        processing_jobs[job_id]['progress'] = 0.1
-        
-        # Get video info
-        video_doc = await db.videos.find_one({'video_id': video_id})
-        if not video_doc:
-            raise Exception("Video not found")
-        
-        input_path = str(UPLOAD_DIR / video_doc['stored_filename'])
-        output_filename = f"{video_id}_trimmed_{uuid.uuid4()}.mp4"
-        
-        processing_jobs[job_id]['progress'] = 0.3
-        
-        # Trim video
-        output_path = video_processor.trim_video(input_path, start_time, end_time, output_filename)
-        
-        processing_jobs[job_id]['progress'] = 0.9
-        
-        # Save result
-        result_id = str(uuid.uuid4())
-        await db.processed_videos.insert_one({
-            'result_id': result_id,
-            'original_video_id': video_id,
-            'operation': 'trim',
-            'output_filename': output_filename,
-            'parameters': {'start_time': start_time, 'end_time': end_time},
-            'created_at': datetime.now(timezone.utc).isoformat()
-        })
-        
-        processing_jobs[job_id]['status'] = 'completed'
-        processing_jobs[job_id]['progress'] = 1.0
-        processing_jobs[job_id]['result'] = {
-            'result_id': result_id,
-            'download_url': f"/api/video/download/{result_id}"
-        }
-        
+        media = await media_executor.run(
+            'probe', video_processor.get_video_info, str(UPLOAD_DIR / video_doc['stored_filename'])
+        )
+        await db.videos.update_one({'video_id': video_id}, {'$set': {'media': media}})
+        video_doc = {**video_doc, 'media': media}
+        video_docs.set(video_id, video_doc)
+    except Exception as e:
+        logger.warning(f"Could not probe metadata for {video_id}: {e}")
+    return video_doc
+
+
+async def invalidate_videos(content_hash: Optional[str] = None, video_id: Optional[str] = None):
+    """Drop cached documents after an update, by video or by every upload of the same bytes"""
+    if video_id:
+        video_docs.invalidate(video_id)
+    if content_hash:
+        async for doc in db.videos.find({'content_hash': content_hash}, {'_id': 0, 'video_id': 1}):
+            video_docs.invalidate(doc['video_id'])
+
+
+async def find_ready_video(video_id: str) -> Dict[str, Any]:
+    video_doc = await load_video(video_id)
+    if not video_doc:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if video_doc.get('status') != 'ready':
+        raise HTTPException(status_code=409, detail="Video is still being processed")
+    return video_doc
+
+
+@api_router.get("/video/{video_id}/filmstrip.vtt")
+async def get_filmstrip_index(video_id: str, interval: Optional[float] = Query(None, gt=0, le=3600)):
+    """WebVTT thumbnails track for the timeline scrubber, pointing into one sprite sheet"""
+    try:
+        video_doc = await find_ready_video(video_id)
+        layout = await ensure_filmstrip(video_doc, interval)
+        image_url = f"/api/video/{video_id}/filmstrip.jpg?interval={layout.interval:g}"
+        return Response(
+            layout.to_vtt(image_url),
+            media_type='text/vtt',
+            headers={'Cache-Control': IMMUTABLE_CACHE_CONTROL}
+        )
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        logger.error(f"Trim job failed: {e}")
-        processing_jobs[job_id]['status'] = 'failed'
-        processing_jobs[job_id]['error'] = str(e)
+        logger.error(f"Error getting filmstrip index: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@api_router.api_route("/video/{video_id}/filmstrip.jpg", methods=["GET", "HEAD"])
+async def get_filmstrip(video_id: str, request: Request, interval: Optional[float] = Query(None, gt=0, le=3600)):
+    """Filmstrip sprite sheet: one tile per interval, row by row (see filmstrip.vtt)"""
+    try:
+        video_doc = await find_ready_video(video_id)
+        layout = await ensure_filmstrip(video_doc, interval)
+        path = UPLOAD_DIR / filmstrip_filename(video_doc, layout)
+        storage.touch(path)
+        return MediaFileResponse(path, request, cache_control=IMMUTABLE_CACHE_CONTROL)
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting filmstrip: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class JobProgressReporter:
+    """Thread-safe ffmpeg progress callback mapped onto [start, end] of a job"""
+    
+    def __init__(self, job_id: str, start: float, end: float):
+        self.job_id = job_id
+        self.start = start
+        self.end = end
+        self.loop = asyncio.get_running_loop()
+        self._pending = []
+    
+    def __call__(self, update: Dict[str, Any]):
+        progress = self.start + update['progress'] * (self.end - self.start)
+        self._pending.append(asyncio.run_coroutine_threadsafe(
+            job_store.update(
+                self.job_id,
+                progress=round(progress, 4),
+                speed=update['speed'],
+                eta=update['eta']
+            ),
+            self.loop
+        ))
+    
+    async def drain(self):
+        """Wait for queued updates so none land after the job finishes"""
+        pending, self._pending = self._pending, []
+        await asyncio.gather(*[asyncio.wrap_future(f) for f in pending], return_exceptions=True)
+
+
+def processed_result(result_id: str) -> Dict[str, Any]:
+    return {
+        'result_id': result_id,
+        'download_url': f"/api/video/download/{result_id}"
+    }
+
+
+def renditions_result(video_id: str, rungs: List[Dict[str, int]]) -> Dict[str, Any]:
+    return {
+        'hls_url': f"/api/video/{video_id}/renditions/master.m3u8",
+        'dash_url': f"/api/video/{video_id}/renditions/manifest.mpd",
+        'rungs': rungs
+    }
+
+
+def proxy_result(video_id: str, proxy: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'proxy_url': f"/api/video/{video_id}/proxy",
+        'width': proxy['width'],
+        'height': proxy['height'],
+        'keyframe_interval': proxy['keyframe_interval']
+    }
+
+
+def caption_result(caption_doc: Dict[str, Any]) -> Dict[str, Any]:
+    caption_id = caption_doc['caption_id']
+    return {
+        'caption_id': caption_id,
+        'text': caption_doc['text'],
+        'language': caption_doc.get('language'),
+        'segments': caption_doc['segments'],
+        'srt_url': f"/api/captions/{caption_id}/srt",
+        'vtt_url': f"/api/captions/{caption_id}/vtt",
+        'ass_url': f"/api/captions/{caption_id}/ass",
+        'json_url': f"/api/captions/{caption_id}/json"
+    }
+
+
+async def memoized_job_result(job_type: str, video_id: str, params: Dict[str, Any],
+                              video_doc: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Result of an identical earlier job on the same bytes, if it still exists"""
+    if video_doc is None:
+        video_doc = await load_video(video_id)
+    content_hash = video_doc.get('content_hash') if video_doc else None
+    memo = await content_index.lookup_derived(content_hash, job_type, params)
+    if not memo:
+        return None
+    
+    if 'result_id' in memo:
+        result_doc = await result_docs.get(memo['result_id'])
+        if result_doc and (UPLOAD_DIR / result_doc['output_filename']).exists():
+            return processed_result(memo['result_id'])
+    elif 'proxy_filename' in memo:
+        if (UPLOAD_DIR / memo['proxy_filename']).exists():
+            # Uploads registered while the proxy was encoding haven't recorded it yet
+            await db.videos.update_one({'video_id': video_id}, {'$set': memo})
+            video_docs.invalidate(video_id)
+            return proxy_result(video_id, memo['proxy'])
+    elif 'renditions_dir' in memo:
+        if (UPLOAD_DIR / memo['renditions_dir'] / 'master.m3u8').exists():
+            return renditions_result(video_id, memo['rungs'])
+    elif 'caption_id' in memo:
+        caption_doc = await caption_docs.get(memo['caption_id'])
+        if caption_doc:
+            return caption_result(caption_doc)
+    
+    # The memoized output was removed; forget it and run the job again
+    await content_index.forget_derived(content_hash, job_type, params)
+    return None
+
+
+async def submit_video_job(job_type: str, video_id: str, params: Dict[str, Any], message: str,
+                           priority: int = 0, turn: int = 0,
+                           video_doc: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Queue a job on a video, or return a completed one if the result is memoized"""
+    payload = {'video_id': video_id, **params}
+    result = await memoized_job_result(job_type, video_id, params, video_doc)
+    if result is not None:
+        logger.info(f"Reusing memoized {job_type} result for video {video_id}")
+        return await job_scheduler.record_completed(job_type, payload, result)
+    
+    return await job_scheduler.submit(job_type, payload, message=message, priority=priority, turn=turn)
+
+
+async def keyframes_for_mode(video_doc: Dict[str, Any], mode: str):
+    """Keyframe timestamps for modes that plan around GOPs, from the stored index"""
+    if mode not in ('auto', 'smart'):
+        return None
+    index = await load_keyframe_index(video_doc)
+    return index.timestamps
+
+
+def trim_parameters(start_time: float, end_time: float, mode: str, preview: bool = False,
+                    profile: Optional[str] = None) -> Dict[str, Any]:
+    # Optional settings are only present when set, so earlier memo keys stay valid
+    params = {'start_time': start_time, 'end_time': end_time, 'mode': mode}
+    if preview:
+        params['preview'] = True
+    if profile:
+        params['profile'] = profile
+    return params
+
+
+def cut_parameters(segments: List[Dict], mode: str, preview: bool = False,
+                   profile: Optional[str] = None) -> Dict[str, Any]:
+    params = {'segments': segments, 'mode': mode}
+    if preview:
+        params['preview'] = True
+    if profile:
+        params['profile'] = profile
+    return params
+
+
+def trim_job(request: TrimRequest) -> Tuple[str, Dict[str, Any], str]:
+    """(job type, params, queued message) for a trim request"""
+    params = trim_parameters(request.start_time, request.end_time, request.mode, request.preview, request.profile)
+    return 'trim', params, 'Trim job queued'
+
+
+def cut_job(request: CutRequest) -> Tuple[str, Dict[str, Any], str]:
+    segments = [{'start': seg.start, 'end': seg.end} for seg in request.segments]
+    return 'cut', cut_parameters(segments, request.mode, request.preview, request.profile), 'Cut job queued'
+
+
+def caption_parameters(language: Optional[str]) -> Dict[str, Any]:
+    # The STT engine and model are part of the key, so switching them doesn't serve older captions
+    return {'language': language, 'model': caption_generator.backend.model_id}
+
+
+def caption_job(request: CaptionRequest) -> Tuple[str, Dict[str, Any], str]:
+    return 'caption', caption_parameters(request.language), 'Caption generation queued'
+
+
+def edit_source(video_doc: Dict[str, Any], mode: str, preview: bool) -> Tuple[str, str, str]:
+    """(input path, source, mode) for an edit; previews stream-copy from the proxy when there is one"""
+    if preview and video_doc.get('proxy_filename'):
+        proxy_path = UPLOAD_DIR / video_doc['proxy_filename']
+        if proxy_path.exists():
+            # Proxy keyframes are PROXY_KEYFRAME_INTERVAL apart, so a copy lands close enough
+            return str(proxy_path), 'proxy', 'copy'
+    return str(UPLOAD_DIR / video_doc['stored_filename']), 'original', mode
+
+
+async def process_trim_job(job_id: str, video_id: str, start_time: float, end_time: float, mode: str = 'copy',
+                           preview: bool = False, profile: Optional[str] = None):
+    """Background task for trimming video"""
+    await job_store.update(job_id, progress=0.05, message='Trimming video...')
+    
+    # Get video info
+    video_doc = await load_video(video_id)
+    if not video_doc:
+        raise NonRetryableJobError("Video not found")
+    
+    input_path, source, source_mode = edit_source(video_doc, mode, preview)
+    output_filename = shard_name(f"{video_id}_trimmed_{uuid.uuid4()}.mp4")
+    keyframes = await keyframes_for_mode(video_doc, source_mode)
+    
+    # Trim video
+    reporter = JobProgressReporter(job_id, 0.1, 0.9)
+    try:
+        await media_executor.run(
+            'trim', video_processor.trim_video, input_path, start_time, end_time, output_filename,
+            on_progress=reporter,
+            mode=source_mode,
+            keyframes=keyframes,
+            profile=profile,
+            # The stored record describes the original, not the proxy
+            media=video_doc.get('media') if source == 'original' else None
+        )
+    finally:
+        await reporter.drain()
+    
+    await job_store.update(job_id, progress=0.9, speed=None, eta=None)
+    
+    # Save result; the requested parameters are what an export replays on the original
+    parameters = trim_parameters(start_time, end_time, mode, preview, profile)
+    result_id = str(uuid.uuid4())
+    await db.processed_videos.insert_one({
+        'result_id': result_id,
+        'original_video_id': video_id,
+        'operation': 'trim',
+        'output_filename': output_filename,
+        'parameters': parameters,
+        'preview': preview,
+        'source': source,
+        'created_at': datetime.now(timezone.utc).isoformat()
+    })
+    await content_index.store_derived(
+        video_doc.get('content_hash'), 'trim', parameters, {'result_id': result_id}
+    )
+    
+    return processed_result(result_id)
 
 
 @api_router.post("/video/trim")
-async def trim_video(request: TrimRequest, background_tasks: BackgroundTasks):
+async def trim_video(request: TrimRequest):
     """Trim video between start and end time"""
     try:
-        # Create job
-        job_id = str(uuid.uuid4())
-        processing_jobs[job_id] = {
-            'job_id': job_id,
-            'status': 'pending',
-            'progress': 0.0,
-            'message': 'Trim job queued',
-            'result': None,
-            'error': None
-        }
+        job_type, params, message = trim_job(request)
+        job = await submit_video_job(job_type, request.video_id, params, message)
         
-        # Start background task
-        background_tasks.add_task(
-            process_trim_job,
-            job_id,
-            request.video_id,
-            request.start_time,
-            request.end_time
-        )
-        
-        return {'job_id': job_id, 'status': 'pending'}
+        return {'job_id': job['job_id'], 'status': job['status']}
     
     except Exception as e:
         logger.error(f"Error starting trim job: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def process_cut_job(job_id: str, video_id: str, segments: List[Dict]):
+async def process_cut_job(job_id: str, video_id: str, segments: List[Dict], mode: str = 'auto',
+                          preview: bool = False, profile: Optional[str] = None):
     """Background task for cutting video"""
+    await job_store.update(job_id, progress=0.05, message='Cutting video...')
+    
+    # Get video info
+    video_doc = await load_video(video_id)
+    if not video_doc:
+        raise NonRetryableJobError("Video not found")
+    
+    input_path, source, source_mode = edit_source(video_doc, mode, preview)
+    output_filename = shard_name(f"{video_id}_cut_{uuid.uuid4()}.mp4")
+    keyframes = await keyframes_for_mode(video_doc, source_mode)
+    
+    # Cut video
+    reporter = JobProgressReporter(job_id, 0.1, 0.9)
     try:
-        processing_jobs[job_id]['status'] = 'processing'
-        processing_jobs[job_id]['progress'] = 0.1
-        
-        # Get video info
-        video_doc = await db.videos.find_one({'video_id': video_id})
-        if not video_doc:
-            raise Exception("Video not found")
-        
-        input_path = str(UPLOAD_DIR / video_doc['stored_filename'])
-        output_filename = f"{video_id}_cut_{uuid.uuid4()}.mp4"
-        
-        processing_jobs[job_id]['progress'] = 0.3
-        
-        # Cut video
-        output_path = video_processor.cut_video(input_path, segments, output_filename)
-        
-        processing_jobs[job_id]['progress'] = 0.9
-        
-        # Save result
-        result_id = str(uuid.uuid4())
-        await db.processed_videos.insert_one({
-            'result_id': result_id,
-            'original_video_id': video_id,
-            'operation': 'cut',
-            'output_filename': output_filename,
-            'parameters': {'segments': segments},
-            'created_at': datetime.now(timezone.utc).isoformat()
-        })
-        
-        processing_jobs[job_id]['status'] = 'completed'
-        processing_jobs[job_id]['progress'] = 1.0
-        processing_jobs[job_id]['result'] = {
-            'result_id': result_id,
-            'download_url': f"/api/video/download/{result_id}"
-        }
-        
-    except Exception as e:
-        logger.error(f"Cut job failed: {e}")
-        processing_jobs[job_id]['status'] = 'failed'
-        processing_jobs[job_id]['error'] = str(e)
+        await media_executor.run(
+            'cut', video_processor.cut_video, input_path, segments, output_filename,
+            on_progress=reporter,
+            mode=source_mode,
+            keyframes=keyframes,
+            profile=profile,
+            media=video_doc.get('media') if source == 'original' else None
+        )
+    finally:
+        await reporter.drain()
+    
+    await job_store.update(job_id, progress=0.9, speed=None, eta=None)
+    
+    # Save result
+    parameters = cut_parameters(segments, mode, preview, profile)
+    result_id = str(uuid.uuid4())
+    await db.processed_videos.insert_one({
+        'result_id': result_id,
+        'original_video_id': video_id,
+        'operation': 'cut',
+        'output_filename': output_filename,
+        'parameters': parameters,
+        'preview': preview,
+        'source': source,
+        'created_at': datetime.now(timezone.utc).isoformat()
+    })
+    await content_index.store_derived(
+        video_doc.get('content_hash'), 'cut', parameters, {'result_id': result_id}
+    )
+    
+    return processed_result(result_id)
 
 
 @api_router.post("/video/cut")
-async def cut_video(request: CutRequest, background_tasks: BackgroundTasks):
+async def cut_video(request: CutRequest):
     """Cut video into segments and merge"""
     try:
-        # Create job
-        job_id = str(uuid.uuid4())
-        processing_jobs[job_id] = {
-            'job_id': job_id,
-            'status': 'pending',
-            'progress': 0.0,
-            'message': 'Cut job queued',
-            'result': None,
-            'error': None
-        }
+        job_type, params, message = cut_job(request)
+        job = await submit_video_job(job_type, request.video_id, params, message)
         
-        # Convert Pydantic models to dicts
-        segments = [{'start': seg.start, 'end': seg.end} for seg in request.segments]
-        
-        # Start background task
-        background_tasks.add_task(
-            process_cut_job,
-            job_id,
-            request.video_id,
-            segments
-        )
-        
-        return {'job_id': job_id, 'status': 'pending'}
+        return {'job_id': job['job_id'], 'status': job['status']}
     
     except Exception as e:
         logger.error(f"Error starting cut job: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def process_caption_job(job_id: str, video_id: str, language: Optional[str]):
-    """Background task for generating captions"""
+@api_router.post("/video/export/{result_id}")
+async def export_preview(result_id: str):
+    """Replay a preview's edit against the original video at full quality"""
     try:
-        processing_jobs[job_id]['status'] = 'processing'
-        processing_jobs[job_id]['progress'] = 0.1
-        processing_jobs[job_id]['message'] = 'Extracting audio...'
-        
-        # Get video info
-        video_doc = await db.videos.find_one({'video_id': video_id})
-        if not video_doc:
-            raise Exception("Video not found")
-        
-        video_path = str(UPLOAD_DIR / video_doc['stored_filename'])
-        
-        # Extract audio
-        audio_filename = f"{video_id}_audio.mp3"
-        audio_path = video_processor.extract_audio(video_path, audio_filename)
+        result_doc = await result_docs.get(result_id)
+        if not result_doc:
+            raise HTTPException(status_code=404, detail="Processed video not found")
         
-        processing_jobs[job_id]['progress'] = 0.3
-        processing_jobs[job_id]['message'] = 'Transcribing audio...'
+        parameters = dict(result_doc['parameters'])
+        if not parameters.pop('preview', False):
+            raise HTTPException(status_code=400, detail="Result is not a preview")
         
-        # Generate captions
-        captions = await caption_generator.generate_captions(audio_path, language)
+        operation = result_doc['operation']
+        job = await submit_video_job(
+            operation, result_doc['original_video_id'], parameters, f"{operation.capitalize()} export queued"
+        )
         
-        processing_jobs[job_id]['progress'] = 0.8
-        processing_jobs[job_id]['message'] = 'Generating subtitle files...'
+        return {'job_id': job['job_id'], 'status': job['status']}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting export job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def captions_match_video(caption_doc: Dict[str, Any], video_doc: Dict[str, Any]) -> bool:
+    """Whether captions were made from this video's bytes.
+
+    Memoized caption jobs hand a deduplicated upload the captions made for the
+    first copy, so the owning video_id isn't enough; compare the content hashes.
+    """
+    if caption_doc['video_id'] == video_doc['video_id']:
+        return True
+    content_hash = caption_doc.get('content_hash')
+    if content_hash is None:
+        # Generated before captions recorded their source
+        owner = await load_video(caption_doc['video_id'])
+        content_hash = owner.get('content_hash') if owner else None
+    return content_hash is not None and content_hash == video_doc.get('content_hash')
+
+
+async def validate_edit_list(video_doc: Dict[str, Any], edit_list: EditList) -> Dict[str, Any]:
+    """Edit list as stored and rendered: segments clamped to the video, overlays checked"""
+    try:
+        segments = normalize_segments(
+            [segment.model_dump() for segment in edit_list.segments], video_doc.get('duration')
+        )
+    except EditListError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if edit_list.subtitles:
+        caption_doc = await caption_docs.get(edit_list.subtitles.caption_id)
+        if not caption_doc:
+            raise HTTPException(status_code=404, detail="Captions not found")
+        if not await captions_match_video(caption_doc, video_doc):
+            raise HTTPException(status_code=400, detail="Captions belong to another video")
+    
+    return {**edit_list.model_dump(), 'segments': segments}
+
+
+@api_router.post("/projects")
+async def create_project(request: ProjectCreate):
+    """Create an editing project holding an edit list for one video"""
+    try:
+        video_doc = await find_ready_video(request.video_id)
+        now = datetime.now(timezone.utc).isoformat()
+        project_doc = {
+            'project_id': str(uuid.uuid4()),
+            'video_id': request.video_id,
+            'name': request.name,
+            'edit_list': await validate_edit_list(video_doc, request.edit_list),
+            'revision': 1,
+            'created_at': now,
+            'updated_at': now
+        }
+        await db.projects.insert_one(dict(project_doc))
+        return project_doc
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating project: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@api_router.get("/projects/{project_id}")
+async def get_project(project_id: str):
+    """Get a project and its current edit list"""
+    try:
+        project_doc = await db.projects.find_one({'project_id': project_id}, {'_id': 0})
+        if not project_doc:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return project_doc
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting project: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@api_router.put("/projects/{project_id}/edit-list")
+async def update_edit_list(project_id: str, request: EditList):
+    """Replace a project's edit list; nothing is rendered until asked"""
+    try:
+        project_doc = await db.projects.find_one({'project_id': project_id}, {'_id': 0, 'video_id': 1})
+        if not project_doc:
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        video_doc = await find_ready_video(project_doc['video_id'])
+        project_doc = await db.projects.find_one_and_update(
+            {'project_id': project_id},
+            {
+                '$set': {
+                    'edit_list': await validate_edit_list(video_doc, request),
+                    'updated_at': datetime.now(timezone.utc).isoformat()
+                },
+                '$inc': {'revision': 1}
+            },
+            projection={'_id': 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if not project_doc:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return project_doc
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating edit list: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@api_router.delete("/projects/{project_id}")
+async def delete_project(project_id: str):
+    """Delete a project; renders already made stay downloadable"""
+    try:
+        result = await db.projects.delete_one({'project_id': project_id})
+        if not result.deleted_count:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return {'project_id': project_id, 'status': 'deleted'}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting project: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def process_render_job(job_id: str, video_id: str, edit_list: Dict[str, Any]):
+    """Background task for rendering an edit list in a single pass"""
+    await job_store.update(job_id, progress=0.05, message='Rendering edit list...')
+    
+    video_doc = await load_video(video_id)
+    if not video_doc:
+        raise NonRetryableJobError("Video not found")
+    if video_doc.get('status') != 'ready':
+        raise NonRetryableJobError("Video is not ready")
+    
+    segments = edit_list['segments']
+    output = edit_list['output']
+    output_filename = shard_name(f"{video_id}_render_{uuid.uuid4()}.mp4")
+    subtitle_path = None
+    force_style = None
+    
+    reporter = JobProgressReporter(job_id, 0.1, 0.9)
+    try:
+        overlay = edit_list.get('subtitles')
+        if overlay:
+            caption_doc = await caption_docs.get(overlay['caption_id'])
+            if not caption_doc:
+                raise NonRetryableJobError("Captions not found")
+            # Burned in after the cuts, so the cues move onto the output timeline
+            cues = map_cues(caption_doc['segments'], segments)
+            subtitle_path = UPLOAD_DIR / shard_name(f"render_{uuid.uuid4()}.ass")
+            subtitle_path.write_bytes(render_subtitles(cues, 'ass', caption_doc.get('language')))
+            if overlay.get('font_size'):
+                force_style = f"Fontsize={overlay['font_size']}"
+        
+        await media_executor.run(
+            'render', video_processor.render_edit_list,
+            str(UPLOAD_DIR / video_doc['stored_filename']), segments, output_filename,
+            subtitle_path=str(subtitle_path) if subtitle_path else None,
+            force_style=force_style,
+            width=output.get('width'),
+            profile=output.get('profile'),
+            crf=output.get('crf'),
+            preset=output.get('preset'),
+            audio_kbps=output.get('audio_kbps'),
+            has_audio=video_doc.get('has_audio', True),
+            on_progress=reporter
+        )
+    finally:
+        await reporter.drain()
+        if subtitle_path:
+            subtitle_path.unlink(missing_ok=True)
+    
+    await job_store.update(job_id, progress=0.9, speed=None, eta=None)
+    
+    result_id = str(uuid.uuid4())
+    await db.processed_videos.insert_one({
+        'result_id': result_id,
+        'original_video_id': video_id,
+        'operation': 'render',
+        'output_filename': output_filename,
+        'parameters': {'edit_list': edit_list},
+        'created_at': datetime.now(timezone.utc).isoformat()
+    })
+    await content_index.store_derived(
+        video_doc.get('content_hash'), 'render', {'edit_list': edit_list}, {'result_id': result_id}
+    )
+    
+    return processed_result(result_id)
+
+
+@api_router.post("/projects/{project_id}/render")
+async def render_project(project_id: str):
+    """Render the project's edit list; an unchanged list returns the earlier render"""
+    try:
+        project_doc = await db.projects.find_one(
+            {'project_id': project_id}, {'_id': 0, 'video_id': 1, 'edit_list': 1, 'revision': 1}
+        )
+        if not project_doc:
+            raise HTTPException(status_code=404, detail="Project not found")
         
-        # Generate SRT and VTT files
-        srt_filename = f"{video_id}_captions.srt"
-        vtt_filename = f"{video_id}_captions.vtt"
+        job = await submit_video_job(
+            'render', project_doc['video_id'], {'edit_list': project_doc['edit_list']}, 'Render job queued'
+        )
         
-        srt_path = str(UPLOAD_DIR / srt_filename)
-        vtt_path = str(UPLOAD_DIR / vtt_filename)
+        return {'job_id': job['job_id'], 'status': job['status'], 'revision': project_doc['revision']}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting render job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def proxy_filename(video_doc: Dict[str, Any]) -> str:
+    return shard_name(f"{video_doc.get('content_hash') or video_doc['video_id']}_proxy.mp4")
+
+
+async def process_proxy_job(job_id: str, video_id: str):
+    """Background task for encoding the editing proxy"""
+    await job_store.update(job_id, progress=0.05, message='Encoding editing proxy...')
+    
+    video_doc = await load_video(video_id)
+    if not video_doc:
+        raise NonRetryableJobError("Video not found")
+    if video_doc.get('status') != 'ready':
+        raise NonRetryableJobError("Video is not ready")
+    
+    # Never upscale; even dimensions keep the scaler and chroma subsampling happy
+    height = max(2, min(PROXY_HEIGHT, video_doc['height']) // 2 * 2)
+    width = max(2, round(video_doc['width'] * height / video_doc['height'] / 2) * 2)
+    filename = proxy_filename(video_doc)
+    reporter = JobProgressReporter(job_id, 0.05, 0.95)
+    try:
+        await media_executor.run(
+            'proxy', video_processor.generate_proxy,
+            str(UPLOAD_DIR / video_doc['stored_filename']), filename, width, height,
+            fps=video_doc.get('fps'),
+            keyframe_interval=PROXY_KEYFRAME_INTERVAL,
+            has_audio=video_doc.get('has_audio', True),
+            duration=video_doc.get('duration'),
+            on_progress=reporter
+        )
+    finally:
+        await reporter.drain()
+    
+    # Record the proxy on every upload of the same bytes
+    proxy = {
+        'width': width,
+        'height': height,
+        'keyframe_interval': PROXY_KEYFRAME_INTERVAL,
+        'source_filename': video_doc['stored_filename'],
+        'source_hash': video_doc.get('content_hash'),
+        'created_at': datetime.now(timezone.utc).isoformat()
+    }
+    fields = {'proxy_filename': filename, 'proxy': proxy}
+    if video_doc.get('content_hash'):
+        await db.videos.update_many({'content_hash': video_doc['content_hash']}, {'$set': fields})
+    else:
+        await db.videos.update_one({'video_id': video_id}, {'$set': fields})
+    await invalidate_videos(video_doc.get('content_hash'), video_id)
+    await content_index.store_derived(video_doc.get('content_hash'), 'proxy', {}, fields)
+    
+    return proxy_result(video_id, proxy)
+
+
+@api_router.api_route("/video/{video_id}/proxy", methods=["GET", "HEAD"])
+async def get_proxy(video_id: str, request: Request):
+    """Stream the editing proxy; 404 until it has been encoded"""
+    try:
+        proxy_path = await resolve_media_path('videos', 'video_id', video_id, 'proxy_filename')
+        if proxy_path is None:
+            raise HTTPException(status_code=404, detail="Proxy not found")
         
-        caption_generator.generate_srt(captions['segments'], srt_path)
-        caption_generator.generate_vtt(captions['segments'], vtt_path)
+        if not proxy_path.exists():
+            invalidate_media_paths('videos', video_id, 'proxy_filename')
+            raise HTTPException(status_code=404, detail="Proxy file not found")
         
-        # Save to database
-        caption_id = str(uuid.uuid4())
-        await db.captions.insert_one({
-            'caption_id': caption_id,
-            'video_id': video_id,
-            'text': captions['text'],
-            'language': captions.get('language', language),
-            'segments': captions['segments'],
-            'srt_filename': srt_filename,
-            'vtt_filename': vtt_filename,
-            'created_at': datetime.now(timezone.utc).isoformat()
-        })
-        
-        # Clean up audio file
-        os.remove(audio_path)
-        
-        processing_jobs[job_id]['status'] = 'completed'
-        processing_jobs[job_id]['progress'] = 1.0
-        processing_jobs[job_id]['message'] = 'Captions generated successfully'
-        processing_jobs[job_id]['result'] = {
-            'caption_id': caption_id,
-            'text': captions['text'],
-            'language': captions.get('language', language),
-            'segments': captions['segments'],
-            'srt_url': f"/api/captions/{caption_id}/srt",
-            'vtt_url': f"/api/captions/{caption_id}/vtt"
-        }
+        return MediaFileResponse(proxy_path, request, cache_control=MEDIA_CACHE_CONTROL)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming proxy: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def renditions_dirname(video_doc: Dict[str, Any]) -> str:
+    return shard_name(f"{video_doc.get('content_hash') or video_doc['video_id']}_renditions")
+
+
+async def queue_derived_media(video_id: str):
+    """Queue the editing proxy and streaming ladder for a freshly ingested video, as configured"""
+    try:
+        # Below interactive jobs: editing and playback fall back to the original until they're done
+        if PROXY_AUTO:
+            await submit_video_job('proxy', video_id, {}, 'Proxy encoding queued', priority=-5)
+        if RENDITIONS_AUTO:
+            await submit_video_job('renditions', video_id, {}, 'Rendition encoding queued', priority=-10)
+    except Exception as e:
+        logger.warning(f"Could not queue derived media for {video_id}: {e}")
+
+
+async def process_renditions_job(job_id: str, video_id: str):
+    """Background task for encoding the adaptive streaming ladder"""
+    await job_store.update(job_id, progress=0.05, message='Encoding streaming renditions...')
+    
+    video_doc = await load_video(video_id)
+    if not video_doc:
+        raise NonRetryableJobError("Video not found")
+    if video_doc.get('status') != 'ready':
+        raise NonRetryableJobError("Video is not ready")
+    
+    # Rungs come from the probe data stored at ingest
+    rungs = video_processor.plan_renditions(
+        video_doc['width'], video_doc['height'], video_doc.get('fps'), video_doc.get('bitrate')
+    )
+    dirname = renditions_dirname(video_doc)
+    reporter = JobProgressReporter(job_id, 0.05, 0.95)
+    try:
+        await media_executor.run(
+            'renditions', video_processor.generate_renditions,
+            str(UPLOAD_DIR / video_doc['stored_filename']), rungs, dirname,
+            has_audio=video_doc.get('has_audio', True),
+            fps=video_doc.get('fps'),
+            duration=video_doc.get('duration'),
+            on_progress=reporter
+        )
+    finally:
+        await reporter.drain()
+    
+    await content_index.store_derived(
+        video_doc.get('content_hash'), 'renditions', {}, {'renditions_dir': dirname, 'rungs': rungs}
+    )
+    
+    return renditions_result(video_id, rungs)
+
+
+@api_router.post("/video/{video_id}/renditions")
+async def create_renditions(video_id: str):
+    """Queue HLS / DASH renditions for smooth preview playback"""
+    try:
+        video_doc = await find_ready_video(video_id)
+        job = await submit_video_job(
+            'renditions', video_doc['video_id'], {}, 'Rendition encoding queued', priority=-10
+        )
         
+        return {'job_id': job['job_id'], 'status': job['status']}
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Caption job failed: {e}")
-        processing_jobs[job_id]['status'] = 'failed'
-        processing_jobs[job_id]['error'] = str(e)
-        processing_jobs[job_id]['message'] = f'Failed: {str(e)}'
+        logger.error(f"Error starting renditions job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@api_router.api_route("/video/{video_id}/renditions/{filename}", methods=["GET", "HEAD"])
+async def get_rendition_file(video_id: str, filename: str, request: Request):
+    """Manifests (master.m3u8, manifest.mpd) and fMP4 segments of a video's renditions"""
+    try:
+        if not RENDITION_FILE_PATTERN.fullmatch(filename):
+            raise HTTPException(status_code=404, detail="Not found")
+        
+        # Segment requests arrive every few seconds per viewer; keep the lookup off MongoDB
+        key = ('videos', video_id, 'renditions_dir')
+        renditions_dir = media_path_cache.get(key)
+        if renditions_dir is None:
+            video_doc = await db.videos.find_one({'video_id': video_id}, {'_id': 0, 'video_id': 1, 'content_hash': 1})
+            if not video_doc:
+                raise HTTPException(status_code=404, detail="Video not found")
+            dirname = renditions_dirname(video_doc)
+            renditions_dir = UPLOAD_DIR / dirname
+            if not renditions_dir.exists() and (UPLOAD_DIR / Path(dirname).name).exists():
+                # Encoded before sharding
+                renditions_dir = UPLOAD_DIR / Path(dirname).name
+            media_path_cache.set(key, renditions_dir)
+        
+        path = renditions_dir / filename
+        if not path.exists():
+            raise HTTPException(status_code=404, detail="Renditions not found")
+        storage.touch(path)
+        
+        return MediaFileResponse(path, request, cache_control=IMMUTABLE_CACHE_CONTROL)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error serving rendition file: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def process_caption_job(job_id: str, video_id: str, language: Optional[str], model: Optional[str] = None):
+    """Background task for generating captions.
+
+    `model` is the STT model the job was queued for; results are memoized
+    under the one that actually ran them.
+    """
+    await job_store.update(job_id, progress=0.05, message='Transcribing audio...')
+    
+    # Get video info
+    video_doc = await load_video(video_id)
+    if not video_doc:
+        raise NonRetryableJobError("Video not found")
+    if video_doc.get('has_audio') is False:
+        raise NonRetryableJobError("Video has no audio track")
+    
+    video_path = str(UPLOAD_DIR / video_doc['stored_filename'])
+    
+    async def report_progress(fraction: float):
+        await job_store.update(job_id, progress=round(0.05 + 0.75 * fraction, 4))
+    
+    # Audio is decoded straight into the transcriber; chunks are transcribed while ffmpeg runs
+    async with media_executor.slot('extract_audio'):
+        captions = await caption_generator.generate_captions(
+            video_processor.stream_audio(video_path),
+            language,
+            on_progress=report_progress,
+            duration=video_doc.get('duration')
+        )
+    
+    await job_store.update(job_id, progress=0.9, message='Saving captions...')
+    
+    # Subtitle files are rendered on first download (see download_subtitles)
+    caption_doc = {
+        'caption_id': str(uuid.uuid4()),
+        'video_id': video_id,
+        'content_hash': video_doc.get('content_hash'),
+        'text': captions['text'],
+        'language': captions.get('language', language),
+        'model': caption_generator.backend.model_id,
+        'segments': captions['segments'],
+        # Columnar word timings, for re-segmenting without another transcription
+        'words': WordTimings.from_words(captions.get('words', [])).to_document(),
+        'created_at': datetime.now(timezone.utc).isoformat()
+    }
+    await db.captions.insert_one(dict(caption_doc))
+    await content_index.store_derived(
+        video_doc.get('content_hash'), 'caption', caption_parameters(language),
+        {'caption_id': caption_doc['caption_id']}
+    )
+    
+    return caption_result(caption_doc)
 
 
 @api_router.post("/video/captions")
-async def generate_captions(request: CaptionRequest, background_tasks: BackgroundTasks):
+async def generate_captions(request: CaptionRequest):
     """Generate AI captions for video"""
     try:
-        # Create job
-        job_id = str(uuid.uuid4())
-        processing_jobs[job_id] = {
-            'job_id': job_id,
-            'status': 'pending',
-            'progress': 0.0,
-            'message': 'Caption generation queued',
-            'result': None,
-            'error': None
-        }
+        job_type, params, message = caption_job(request)
+        job = await submit_video_job(job_type, request.video_id, params, message)
         
-        # Start background task
-        background_tasks.add_task(
-            process_caption_job,
-            job_id,
-            request.video_id,
-            request.language
-        )
-        
-        return {'job_id': job_id, 'status': 'pending'}
+        return {'job_id': job['job_id'], 'status': job['status']}
     
     except Exception as e:
         logger.error(f"Error starting caption job: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@api_router.get("/job/{job_id}")
+# operation -> (request model, job builder)
+BATCH_OPERATIONS = {
+    'trim': (TrimRequest, trim_job),
+    'cut': (CutRequest, cut_job),
+    'captions': (CaptionRequest, caption_job),
+}
+
+
+@api_router.post("/batches")
+async def create_batch(request: BatchRequest):
+    """Queue trim / cut / caption operations on many videos in one request"""
+    # Validate every item before queuing any, so a bad entry doesn't leave half a batch running
+    specs, errors = [], []
+    for index, item in enumerate(request.items):
+        model, build = BATCH_OPERATIONS[item.operation]
+        try:
+            specs.append(build(model.model_validate({**item.params, 'video_id': item.video_id})))
+        except ValidationError as e:
+            errors.extend(
+                {'loc': ['body', 'items', index, 'params', *error['loc']], 'msg': error['msg'], 'type': error['type']}
+                for error in e.errors()
+            )
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    
+    try:
+        # Every video in one $in query (cached ones not even that); the jobs reuse the cached documents
+        videos = await video_docs.get_many(item.video_id for item in request.items)
+        
+        async def submit(index: int, item: BatchItem, spec: Tuple[str, Dict[str, Any], str]) -> Dict[str, Any]:
+            entry = {'index': index, 'video_id': item.video_id, 'operation': item.operation,
+                     'job_id': None, 'error': None}
+            video_doc = videos.get(item.video_id)
+            if video_doc is None:
+                entry['error'] = 'Video not found'
+                return entry
+            job_type, params, message = spec
+            # Successive turns interleave this batch with other batches and single requests
+            job = await submit_video_job(job_type, item.video_id, params, message, turn=index, video_doc=video_doc)
+            entry['job_id'] = job['job_id']
+            return entry
+        
+        items = await asyncio.gather(*[
+            submit(index, item, spec) for index, (item, spec) in enumerate(zip(request.items, specs))
+        ])
+        
+        batch_id = str(uuid.uuid4())
+        created_at = datetime.now(timezone.utc).isoformat()
+        await db.batches.insert_one({'batch_id': batch_id, 'items': items, 'created_at': created_at})
+        logger.info(f"Batch {batch_id} queued {sum(1 for item in items if item['job_id'])}/{len(items)} jobs")
+        
+        jobs = await job_store.get_many([item['job_id'] for item in items if item['job_id']])
+        return {'batch_id': batch_id, 'created_at': created_at, **batch_progress(items, jobs)}
+    
+    except Exception as e:
+        logger.error(f"Error starting batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def find_batch(batch_id: str) -> Dict[str, Any]:
+    batch = await db.batches.find_one({'batch_id': batch_id}, {'_id': 0})
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+
+@api_router.get("/batches/{batch_id}")
+async def get_batch(batch_id: str):
+    """Aggregated status and progress of a batch, with each item's job state"""
+    batch = await find_batch(batch_id)
+    jobs = await job_store.get_many([item['job_id'] for item in batch['items'] if item['job_id']])
+    return {'batch_id': batch_id, 'created_at': batch['created_at'], **batch_progress(batch['items'], jobs)}
+
+
+@api_router.get("/batches/{batch_id}/results")
+async def stream_batch_results(batch_id: str, request: Request):
+    """Stream each item's final state as newline-delimited JSON, as its job finishes"""
+    batch = await find_batch(batch_id)
+    
+    async def lines():
+        async for state in finished_items(job_store, batch['items'], request.is_disconnected):
+            yield json.dumps(state, default=str) + "\n"
+    
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@api_router.get("/job/{job_id}", response_model=JobStatus)
 async def get_job_status(job_id: str):
     """Get processing job status"""
-    if job_id not in processing_jobs:
+    job = await job_store.get(job_id)
+    if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return processing_jobs[job_id]
+    return public_job(job)
 
 
-@api_router.get("/video/download/{result_id}")
-async def download_processed_video(result_id: str):
+@api_router.get("/job/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Stream job status changes as Server-Sent Events"""
+    subscription = await job_events.subscribe(job_id)
+    if subscription is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                state = await subscription.get(timeout=15)
+                if state is None:
+                    # Keep proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                yield f"event: status\ndata: {json.dumps(state)}\n\n"
+                if is_finished(state):
+                    break
+        finally:
+            job_events.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@api_router.websocket("/job/{job_id}/ws")
+async def job_status_websocket(websocket: WebSocket, job_id: str):
+    """Push job status changes over a WebSocket"""
+    await websocket.accept()
+    
+    subscription = await job_events.subscribe(job_id)
+    if subscription is None:
+        await websocket.close(code=4404, reason="Job not found")
+        return
+    
+    try:
+        while True:
+            state = await subscription.get()
+            await websocket.send_json(state)
+            if is_finished(state):
+                break
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        job_events.unsubscribe(subscription)
+
+
+@api_router.api_route("/video/download/{result_id}", methods=["GET", "HEAD"])
+async def download_processed_video(result_id: str, request: Request):
     """Download processed video"""
     try:
-        result_doc = await db.processed_videos.find_one({'result_id': result_id})
-        if not result_doc:
+        video_path = await resolve_media_path('processed_videos', 'result_id', result_id, 'output_filename')
+        if video_path is None:
             raise HTTPException(status_code=404, detail="Processed video not found")
         
-        video_path = UPLOAD_DIR / result_doc['output_filename']
         if not video_path.exists():
+            invalidate_media_paths('processed_videos', result_id, 'output_filename')
             raise HTTPException(status_code=404, detail="Video file not found")
         
-        return FileResponse(
+        return MediaFileResponse(
             video_path,
-            media_type="video/mp4",
-            filename=f"clipix_edited_{result_id}.mp4"
+            request,
+            filename=f"clipix_edited_{result_id}{video_path.suffix}",
+            cache_control=MEDIA_CACHE_CONTROL
         )
     except HTTPException:
         raise
@@ -646,60 +2063,151 @@ async def download_processed_video(result_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@api_router.get("/captions/{caption_id}/srt")
-async def download_srt(caption_id: str):
-    """Download SRT subtitle file"""
+@api_router.post("/captions/{caption_id}/resegment")
+async def resegment_captions(caption_id: str, request: ResegmentRequest):
+    """Regroup the stored word timings into new cues; returns a new caption id"""
     try:
-        caption_doc = await db.captions.find_one({'caption_id': caption_id})
-        if not caption_doc:
+        params = request.model_dump()
+        # The same caption and settings always map to the same id, so repeats are free
+        resegmented_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{caption_id}?{json.dumps(params, sort_keys=True)}"))
+        caption_doc = await caption_docs.get(resegmented_id)
+        if caption_doc:
+            return caption_result(caption_doc)
+        
+        source = await db.captions.find_one({'caption_id': caption_id}, {'_id': 0, 'segments': 0})
+        if not source:
             raise HTTPException(status_code=404, detail="Captions not found")
         
-        srt_path = UPLOAD_DIR / caption_doc['srt_filename']
-        if not srt_path.exists():
-            raise HTTPException(status_code=404, detail="SRT file not found")
-        
-        return FileResponse(
-            srt_path,
-            media_type="application/x-subrip",
-            filename=f"captions_{caption_id}.srt"
+        words = WordTimings.from_document(source.get('words'))
+        if not len(words):
+            raise HTTPException(status_code=400, detail="Captions have no word timings; generate them again")
+        
+        segments = await run_in_threadpool(words.segment, **params)
+        caption_doc = {
+            'caption_id': resegmented_id,
+            'video_id': source['video_id'],
+            'content_hash': source.get('content_hash'),
+            'source_caption_id': caption_id,
+            'segmentation': params,
+            'text': source['text'],
+            'language': source.get('language'),
+            'segments': segments,
+            'words': source['words'],
+            'created_at': datetime.now(timezone.utc).isoformat()
+        }
+        await db.captions.update_one(
+            {'caption_id': resegmented_id}, {'$setOnInsert': caption_doc}, upsert=True
         )
+        return caption_result(caption_doc)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error downloading SRT: {e}")
+        logger.error(f"Error resegmenting captions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@api_router.get("/captions/{caption_id}/vtt")
-async def download_vtt(caption_id: str):
-    """Download VTT subtitle file"""
+@api_router.get("/captions/{caption_id}/{subtitle_format}")
+async def download_subtitles(caption_id: str, subtitle_format: Literal['srt', 'vtt', 'ass', 'json']):
+    """Download captions as SRT, VTT, ASS or JSON (rendered once, then served from memory)"""
     try:
-        caption_doc = await db.captions.find_one({'caption_id': caption_id})
-        if not caption_doc:
-            raise HTTPException(status_code=404, detail="Captions not found")
-        
-        vtt_path = UPLOAD_DIR / caption_doc['vtt_filename']
-        if not vtt_path.exists():
-            raise HTTPException(status_code=404, detail="VTT file not found")
-        
-        return FileResponse(
-            vtt_path,
-            media_type="text/vtt",
-            filename=f"captions_{caption_id}.vtt"
+        cache_key = (caption_id, subtitle_format)
+        content = subtitle_cache.get(cache_key)
+        if content is None:
+            if subtitle_format == 'json':
+                caption_doc = await db.captions.find_one(
+                    {'caption_id': caption_id}, {'_id': 0, 'segments': 1, 'language': 1, 'words': 1}
+                )
+            else:
+                caption_doc = await caption_docs.get(caption_id)
+            if not caption_doc:
+                raise HTTPException(status_code=404, detail="Captions not found")
+            
+            segments = caption_doc['segments']
+            if subtitle_format == 'json':
+                segments = WordTimings.from_document(caption_doc.get('words')).attach(segments)
+            content = await run_in_threadpool(
+                render_subtitles, segments, subtitle_format, caption_doc.get('language')
+            )
+            subtitle_cache.set(cache_key, content)
+        
+        media_type, extension = SUBTITLE_FORMATS[subtitle_format]
+        return Response(
+            content,
+            media_type=media_type,
+            headers={
+                'Content-Disposition': f'attachment; filename="captions_{caption_id}.{extension}"',
+                'Cache-Control': MEDIA_CACHE_CONTROL
+            }
         )
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error downloading VTT: {e}")
+        logger.error(f"Error downloading {subtitle_format.upper()} captions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Sort keys for the video listing; each has a (key, video_id) index
+VIDEO_SORT_FIELDS = Literal['uploaded_at', 'duration', 'file_size']
+# Field names a listing may project (plain names only: no paths or operators)
+PROJECTION_FIELD = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def csv_values(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()] if value else []
+
+
 @api_router.get("/videos")
-async def list_videos():
-    """List all uploaded videos"""
+async def list_videos(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: VIDEO_SORT_FIELDS = 'uploaded_at',
+    order: Literal['asc', 'desc'] = 'desc',
+    status: Optional[str] = None,
+    codec: Optional[str] = Query(None, description="Comma-separated, e.g. h264,hevc"),
+    min_duration: Optional[float] = Query(None, ge=0),
+    max_duration: Optional[float] = Query(None, ge=0),
+    min_height: Optional[int] = Query(None, ge=0),
+    max_height: Optional[int] = Query(None, ge=0),
+    uploaded_after: Optional[datetime] = None,
+    uploaded_before: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; video_id is always included")
+):
+    """Uploaded videos one page at a time; pass next_cursor back for the next page"""
     try:
-        videos = await db.videos.find({}, {'_id': 0}).to_list(100)
-        return {'videos': videos, 'count': len(videos)}
+        filters: Dict[str, Any] = {}
+        if status:
+            filters['status'] = status
+        codecs = csv_values(codec)
+        if codecs:
+            filters['codec'] = {'$in': codecs}
+        for field, low, high in (('duration', min_duration, max_duration), ('height', min_height, max_height)):
+            bounds = {op: bound for op, bound in (('$gte', low), ('$lte', high)) if bound is not None}
+            if bounds:
+                filters[field] = bounds
+        uploaded = time_range(uploaded_after, uploaded_before)
+        if uploaded:
+            filters['uploaded_at'] = uploaded
+        if sort != 'uploaded_at':
+            # Videos still being probed have no duration yet; the cursor needs a value to resume from
+            filters.setdefault(sort, {})['$ne'] = None
+        
+        requested = csv_values(fields)
+        invalid = [field for field in requested if not PROJECTION_FIELD.match(field)]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Invalid fields: {', '.join(invalid)}")
+        if requested:
+            projection = {'_id': 0, 'video_id': 1, sort: 1, **{field: 1 for field in requested}}
+        else:
+            # The full probe record is only sent when asked for
+            projection = {'_id': 0, 'media': 0}
+        
+        page = KeysetPage(sort, 'video_id', descending=order == 'desc', limit=limit, cursor=cursor)
+        rows = page.find(db.videos, filters, projection)
+        return StreamingResponse(page.stream(rows, 'videos'), media_type='application/json')
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing videos: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,328 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# New files live in UPLOAD_DIR/<first two hex chars of their name>/, so no
+# directory grows past a few thousand entries. Stored filenames include the
+# shard, so `UPLOAD_DIR / filename` keeps working for sharded and flat files.
+SHARD_WIDTH = 2
+SHARD_DIR = re.compile(r'[0-9a-f]{%d}' % SHARD_WIDTH)
+
+# (artifact type, name pattern); the first match wins
+ARTIFACT_PATTERNS = [
+    # Leftovers of interrupted uploads, cuts, renders and encodes
+    ('upload_part', re.compile(r'upload_.+\.part')),
+    ('temp', re.compile(
+        r'temp_segment_.*|concat_.+\.txt|smartcut_.+\.mp4|render_.+\.ass|.+_audio\.(mp3|wav)'
+        r'|.+\.part(\.\w+)?|.+\.tmp'
+    )),
+    ('output', re.compile(r'.+_(trimmed|cut|render)_[0-9a-f-]{36}\.mp4')),
+    ('proxy', re.compile(r'.+_proxy\.mp4')),
+    ('renditions', re.compile(r'.+_renditions')),
+    ('filmstrip', re.compile(r'.+_filmstrip_.+\.jpg')),
+    ('thumbnail', re.compile(r'.+_thumb\.jpg')),
+    ('keyframes', re.compile(r'.+\.keyframes')),
+    ('subtitles', re.compile(r'.+\.(srt|vtt|ass)')),
+    ('original', re.compile(r'.+\.(mp4|avi|mov|mkv|webm|flv)', re.IGNORECASE)),
+]
+
+# pinned: never removed by the manager (originals, and small files every video needs)
+# cache:  regenerated on demand or optional (playback and previews fall back to the original)
+# output: results users asked for; removed by age or under disk pressure
+# temp:   removed once untouched for longer than any job could be using them
+ARTIFACT_TIERS = {
+    'original': 'pinned', 'thumbnail': 'pinned', 'keyframes': 'pinned', 'other': 'pinned',
+    'proxy': 'cache', 'renditions': 'cache', 'filmstrip': 'cache', 'subtitles': 'cache',
+    'output': 'output',
+    'temp': 'temp', 'upload_part': 'temp',
+}
+
+# Under disk pressure, least recently used first within each tier, cache before output
+EVICTION_ORDER = ('cache', 'output')
+
+# Served files have their access time set at most this often
+TOUCH_INTERVAL = 3600
+
+
+def shard_name(filename: str) -> str:
+    """The stored (relative) name of a new file: its shard directory plus the name"""
+    prefix = filename[:SHARD_WIDTH].lower()
+    if not SHARD_DIR.fullmatch(prefix):
+        prefix = hashlib.sha1(filename.encode()).hexdigest()[:SHARD_WIDTH]
+    return f"{prefix}/{filename}"
+
+
+def artifact_type(name: str) -> str:
+    for kind, pattern in ARTIFACT_PATTERNS:
+        if pattern.fullmatch(name):
+            return kind
+    return 'other'
+
+
+class StorageManager:
+    """Lifecycle of everything under UPLOAD_DIR: sharding, temp sweeping, retention and quotas.
+
+    A background sweep scans the tree, removes temp files nothing has touched
+    for a while, applies per-tier age limits, and evicts cache and output
+    artifacts least recently used first whenever disk use passes the high-water
+    mark, until it is back under the low-water mark. Recency is the later of a
+    file's mtime and atime; serving a file sets its atime (see touch), so it
+    works on noatime mounts and survives restarts.
+    """
+
+    def __init__(self, root: Path, high_water: float = 0.9, low_water: float = 0.8,
+                 quota_bytes: int = 0, temp_max_age: float = 6 * 3600,
+                 upload_part_max_age: float = 25 * 3600,
+                 retention: Optional[Dict[str, float]] = None, sweep_interval: float = 600):
+        self.root = Path(root)
+        self.high_water = high_water
+        self.low_water = min(low_water, high_water)
+        # Cap on the bytes under root (0: only the disk marks apply)
+        self.quota_bytes = quota_bytes
+        self.max_age = {'temp': temp_max_age, 'upload_part': upload_part_max_age}
+        # tier -> seconds since last access before removal (0 or missing: kept)
+        self.retention = retention or {}
+        self.sweep_interval = sweep_interval
+
+        self._touched = LRUCache(maxsize=10000, ttl=TOUCH_INTERVAL)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # From the last scan, plus what make_room admitted since
+        self._usage: Dict[str, Dict[str, Any]] = {}
+        self._total_bytes = 0
+        self._reserved = 0
+        self._scanned_at: Optional[float] = None
+        self._last_sweep: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_env(cls, root: Path, upload_part_max_age: float) -> 'StorageManager':
+        """Build a manager from STORAGE_* environment variables"""
+        day = 86400
+        return cls(
+            root,
+            high_water=float(os.environ.get('STORAGE_HIGH_WATER', '0.9')),
+            low_water=float(os.environ.get('STORAGE_LOW_WATER', '0.8')),
+            quota_bytes=int(os.environ.get('STORAGE_QUOTA_BYTES', '0')),
+            temp_max_age=float(os.environ.get('STORAGE_TEMP_MAX_AGE_HOURS', '6')) * 3600,
+            upload_part_max_age=upload_part_max_age,
+            retention={
+                'cache': float(os.environ.get('STORAGE_CACHE_RETENTION_DAYS', '14')) * day,
+                'output': float(os.environ.get('STORAGE_OUTPUT_RETENTION_DAYS', '30')) * day,
+            },
+            sweep_interval=float(os.environ.get('STORAGE_SWEEP_INTERVAL', '600')),
+        )
+
+    def prepare(self):
+        """Create every shard directory, so writers never have to"""
+        for i in range(16 ** SHARD_WIDTH):
+            (self.root / f"{i:0{SHARD_WIDTH}x}").mkdir(parents=True, exist_ok=True)
+
+    def touch(self, path: Path):
+        """Record that a file was just used, for LRU eviction"""
+        key = str(path)
+        if self._touched.get(key):
+            return
+        self._touched.set(key, True)
+        try:
+            st = path.stat()
+            os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+        except OSError:
+            pass
+
+    def start(self):
+        self._task = asyncio.create_task(self._sweep_loop(), name='storage-sweeper')
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _sweep_loop(self):
+        while True:
+            try:
+                await run_in_threadpool(self.sweep)
+            except Exception as e:
+                logger.error(f"Storage sweep failed: {e}")
+            await asyncio.sleep(self.sweep_interval)
+
+    async def make_room(self, nbytes: int = 0) -> bool:
+        """Evict if storing nbytes more would pass the high-water mark; False if it still would"""
+        if self._over(self._total_bytes + self._reserved, nbytes, self.high_water) <= 0:
+            self._reserved += nbytes
+            return True
+        await run_in_threadpool(self.sweep, nbytes)
+        if self._over(self._total_bytes, nbytes, self.high_water) > 0:
+            return False
+        self._reserved += nbytes
+        return True
+
+    def _over(self, total_bytes: int, extra: int, mark: float) -> int:
+        """Bytes above `mark` (a fraction) of the disk, or of the quota when one is set"""
+        disk = shutil.disk_usage(self.root)
+        over = disk.used + extra - int(mark * disk.total)
+        if self.quota_bytes:
+            over = max(over, total_bytes + extra - int(mark * self.quota_bytes))
+        return over
+
+    def scan(self) -> List[Dict[str, Any]]:
+        """Every top-level artifact under root and in the shard directories"""
+        entries = []
+        for entry in os.scandir(self.root):
+            if entry.is_dir(follow_symlinks=False) and SHARD_DIR.fullmatch(entry.name):
+                entries.extend(os.scandir(entry.path))
+            else:
+                entries.append(entry)
+
+        artifacts = []
+        for entry in entries:
+            try:
+                artifacts.append(self._artifact(entry))
+            except FileNotFoundError:
+                # Finished (renamed into place) or removed while we looked
+                continue
+        return artifacts
+
+    @staticmethod
+    def _artifact(entry: os.DirEntry) -> Dict[str, Any]:
+        kind = artifact_type(entry.name)
+        if entry.is_dir(follow_symlinks=False):
+            # A renditions ladder (or its .part) is used and removed as a unit
+            size, accessed, modified = 0, 0.0, entry.stat(follow_symlinks=False).st_mtime
+            for dirpath, _, filenames in os.walk(entry.path):
+                for name in filenames:
+                    try:
+                        st = os.stat(os.path.join(dirpath, name), follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    size += st.st_size
+                    accessed, modified = max(accessed, st.st_atime), max(modified, st.st_mtime)
+        else:
+            st = entry.stat(follow_symlinks=False)
+            size, accessed, modified = st.st_size, st.st_atime, st.st_mtime
+        return {
+            'path': Path(entry.path),
+            'type': kind,
+            'tier': ARTIFACT_TIERS[kind],
+            'size': size,
+            'modified': modified,
+            'last_used': max(accessed, modified),
+        }
+
+    @staticmethod
+    def _remove(artifact: Dict[str, Any]) -> bool:
+        path = artifact['path']
+        try:
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path)
+            else:
+                path.unlink(missing_ok=True)
+            return True
+        except OSError as e:
+            logger.warning(f"Could not remove {path}: {e}")
+            return False
+
+    def sweep(self, extra: int = 0) -> Dict[str, Any]:
+        """Remove stale temp files and expired artifacts, then evict down to the low-water
+        mark if past the high-water mark (counting `extra` bytes about to be written)"""
+        with self._lock:
+            started = time.time()
+            removed = {'temp': 0, 'expired': 0, 'evicted': 0}
+            freed = 0
+            kept = []
+            for artifact in self.scan():
+                tier = artifact['tier']
+                if tier == 'temp':
+                    # Temp files are written continuously while in use, so mtime tells
+                    stale = started - artifact['modified'] > self.max_age[artifact['type']]
+                    reason = 'temp'
+                else:
+                    limit = self.retention.get(tier)
+                    stale = bool(limit) and started - artifact['last_used'] > limit
+                    reason = 'expired'
+                if stale and self._remove(artifact):
+                    removed[reason] += 1
+                    freed += artifact['size']
+                    logger.debug(f"Removed {reason} {artifact['type']} {artifact['path']}")
+                else:
+                    kept.append(artifact)
+
+            total = sum(artifact['size'] for artifact in kept)
+            candidates = sorted(
+                (artifact for artifact in kept if artifact['tier'] in EVICTION_ORDER),
+                key=lambda artifact: (EVICTION_ORDER.index(artifact['tier']), artifact['last_used'])
+            )
+            evictable = sum(artifact['size'] for artifact in candidates)
+            if extra and self._over(total, extra - evictable, self.high_water) > 0:
+                # Evicting everything still wouldn't make room for it; don't throw derived files away for nothing
+                extra = 0
+            if self._over(total, extra, self.high_water) > 0:
+                excess = self._over(total, extra, self.low_water)
+                for artifact in candidates:
+                    if excess <= 0:
+                        break
+                    if self._remove(artifact):
+                        kept.remove(artifact)
+                        removed['evicted'] += 1
+                        freed += artifact['size']
+                        excess -= artifact['size']
+                if excess > 0:
+                    logger.warning(f"Storage still {excess} bytes over the low-water mark; only pinned files remain")
+
+            self._record_usage(kept)
+            self._last_sweep = {
+                'at': started,
+                'seconds': round(time.time() - started, 3),
+                'removed': removed,
+                'freed_bytes': freed,
+            }
+            if freed:
+                logger.info(f"Storage sweep freed {freed} bytes: {removed}")
+            return self._last_sweep
+
+    def _record_usage(self, artifacts: List[Dict[str, Any]]):
+        usage: Dict[str, Dict[str, Any]] = {}
+        for artifact in artifacts:
+            entry = usage.setdefault(artifact['type'], {'tier': artifact['tier'], 'files': 0, 'bytes': 0})
+            entry['files'] += 1
+            entry['bytes'] += artifact['size']
+        self._usage = usage
+        self._total_bytes = sum(entry['bytes'] for entry in usage.values())
+        self._reserved = 0
+        self._scanned_at = time.time()
+
+    def stats(self) -> Dict[str, Any]:
+        """Disk usage, the marks, and bytes per artifact type and tier as of the last sweep"""
+        disk = shutil.disk_usage(self.root)
+        tiers: Dict[str, int] = {}
+        for entry in self._usage.values():
+            tiers[entry['tier']] = tiers.get(entry['tier'], 0) + entry['bytes']
+        return {
+            'disk': {
+                'total_bytes': disk.total,
+                'used_bytes': disk.used,
+                'free_bytes': disk.free,
+                'usage': round(disk.used / disk.total, 4) if disk.total else None,
+            },
+            'high_water': self.high_water,
+            'low_water': self.low_water,
+            'quota_bytes': self.quota_bytes or None,
+            'stored_bytes': self._total_bytes,
+            'artifacts': self._usage,
+            'tiers': tiers,
+            'scanned_at': self._scanned_at,
+            'last_sweep': self._last_sweep,
+        }
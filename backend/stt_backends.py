@@ -0,0 +1,245 @@
+import io
+import os
+import random
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from transcription import SAMPLE_RATE, decode_wav, find_silences
+
+logger = logging.getLogger(__name__)
+
+
+class SpeechToTextBackend(ABC):
+    """Transcribes one WAV chunk; returned timestamps are relative to the chunk"""
+
+    name = 'base'
+    # Calls worth running at once; used unless TRANSCRIBE_CONCURRENCY overrides it
+    concurrency = 4
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the engine and model that produced a transcript"""
+        return self.name
+
+    @abstractmethod
+    async def transcribe(self, audio: bytes, language: Optional[str] = None) -> Dict[str, Any]:
+        """Return {'text', 'language', 'segments': [{'start', 'end', 'text'}],
+        'words': [{'start', 'end', 'word'}], 'duration'}"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': self.name, 'model': self.model_id, 'concurrency': self.concurrency}
+
+
+class OpenAIWhisperBackend(SpeechToTextBackend):
+    """Hosted Whisper through the Emergent integrations client"""
+
+    name = 'openai'
+
+    def __init__(self, api_key: Optional[str] = None, model: str = 'whisper-1'):
+        api_key = api_key or os.getenv('EMERGENT_LLM_KEY')
+        if not api_key:
+            raise ValueError("EMERGENT_LLM_KEY not found in environment")
+
+        from emergentintegrations.llm.openai import OpenAISpeechToText
+
+        self.stt = OpenAISpeechToText(api_key=api_key)
+        self.model = model
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.name}/{self.model}"
+
+    async def transcribe(self, audio: bytes, language: Optional[str] = None) -> Dict[str, Any]:
+        audio_file = io.BytesIO(audio)
+        audio_file.name = 'chunk.wav'  # The API infers the format from the name
+
+        # Use verbose_json to get timestamps
+        response = await self.stt.transcribe(
+            file=audio_file,
+            model=self.model,
+            response_format="verbose_json",
+            language=language,
+            timestamp_granularities=["segment", "word"]
+        )
+
+        # Extract segments with timestamps
+        segments = []
+        if hasattr(response, 'segments'):
+            for segment in response.segments:
+                segments.append({
+                    'start': segment.start,
+                    'end': segment.end,
+                    'text': segment.text.strip()
+                })
+
+        # Word timings come back as a flat list next to the segments
+        words = [
+            {'start': word.start, 'end': word.end, 'word': word.word.strip()}
+            for word in getattr(response, 'words', None) or []
+        ]
+
+        return {
+            'text': response.text,
+            'language': response.language if hasattr(response, 'language') else language,
+            'segments': segments,
+            'words': words,
+            'duration': response.duration if hasattr(response, 'duration') else None
+        }
+
+
+class LocalWhisperBackend(SpeechToTextBackend):
+    """CPU Whisper via faster-whisper (CTranslate2, int8 by default).
+
+    The model is loaded once per process and shared by every job. Each call
+    runs the batched pipeline, which decodes the chunk's 30 s windows
+    together across `cpu_threads` cores.
+    """
+
+    name = 'local'
+
+    _models: Dict[tuple, Any] = {}
+    _models_lock = threading.Lock()
+
+    def __init__(self, model: str = 'small', compute_type: str = 'int8',
+                 cpu_threads: int = 0, workers: int = 1, batch_size: int = 8, beam_size: int = 1):
+        self.model = model
+        self.compute_type = compute_type
+        self.workers = max(1, workers)
+        # Split the cores between workers so concurrent chunks don't oversubscribe
+        self.cpu_threads = cpu_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.batch_size = batch_size
+        self.beam_size = beam_size
+        self.concurrency = self.workers
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='whisper')
+
+    @classmethod
+    def from_env(cls) -> 'LocalWhisperBackend':
+        return cls(
+            model=os.environ.get('WHISPER_MODEL', 'small'),
+            compute_type=os.environ.get('WHISPER_COMPUTE_TYPE', 'int8'),
+            cpu_threads=int(os.environ.get('WHISPER_CPU_THREADS', '0')),
+            workers=int(os.environ.get('WHISPER_WORKERS', '1')),
+            batch_size=int(os.environ.get('WHISPER_BATCH_SIZE', '8')),
+        )
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.name}/{self.model}-{self.compute_type}"
+
+    def load(self):
+        """Load (or reuse) the shared model; safe to call from any thread"""
+        key = (self.model, self.compute_type, self.cpu_threads, self.workers)
+        with self._models_lock:
+            if key not in self._models:
+                try:
+                    from faster_whisper import BatchedInferencePipeline, WhisperModel
+                except ImportError:
+                    raise RuntimeError("STT_BACKEND=local requires the faster-whisper package")
+
+                logger.info(f"Loading Whisper model {self.model} ({self.compute_type}, {self.cpu_threads} threads)")
+                model = WhisperModel(
+                    self.model,
+                    device='cpu',
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.workers
+                )
+                self._models[key] = BatchedInferencePipeline(model=model)
+            return self._models[key]
+
+    def _transcribe_sync(self, audio: bytes, language: Optional[str]) -> Dict[str, Any]:
+        pipeline = self.load()
+        samples = decode_wav(audio).astype(np.float32) / 32768.0
+        results, info = pipeline.transcribe(
+            samples,
+            language=language,
+            batch_size=self.batch_size,
+            beam_size=self.beam_size,
+            word_timestamps=True
+        )
+        segments = []
+        words = []
+        for segment in results:
+            segments.append({'start': segment.start, 'end': segment.end, 'text': segment.text.strip()})
+            words.extend(
+                {'start': word.start, 'end': word.end, 'word': word.word.strip()}
+                for word in segment.words or []
+            )
+        return {
+            'text': ' '.join(s['text'] for s in segments),
+            'language': info.language,
+            'segments': segments,
+            'words': words,
+            'duration': len(samples) / SAMPLE_RATE
+        }
+
+    async def transcribe(self, audio: bytes, language: Optional[str] = None) -> Dict[str, Any]:
+        # CTranslate2 releases the GIL, so inference threads don't block the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._transcribe_sync, audio, language)
+
+
+class FakeSpeechToText(SpeechToTextBackend):
+    """Offline STT stand-in: one segment per stretch of sound in the chunk.
+
+    Deterministic apart from the optional simulated latency and failures,
+    which make it useful for exercising chunking, retries and stitching.
+    """
+
+    name = 'fake'
+
+    def __init__(self, latency: float = 0.0, realtime_factor: float = 0.0, failure_rate: float = 0.0):
+        self.latency = latency
+        self.realtime_factor = realtime_factor
+        self.failure_rate = failure_rate
+
+    async def transcribe(self, audio: bytes, language: Optional[str] = None) -> Dict[str, Any]:
+        samples = decode_wav(audio)
+        duration = len(samples) / SAMPLE_RATE
+        await asyncio.sleep(self.latency + duration * self.realtime_factor)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ConnectionError("Simulated STT failure")
+
+        segments = []
+        words = []
+        position = 0.0
+        for start, end in find_silences(samples) + [(duration, duration)]:
+            if start - position >= 0.1:
+                text = f"speech {start - position:.1f}s"
+                segments.append({
+                    'start': round(position, 3),
+                    'end': round(start, 3),
+                    'text': text,
+                })
+                # Spread the words evenly over the stretch
+                step = (start - position) / len(text.split())
+                words.extend(
+                    {'start': round(position + i * step, 3), 'end': round(position + (i + 1) * step, 3), 'word': word}
+                    for i, word in enumerate(text.split())
+                )
+            position = end
+        return {
+            'text': ' '.join(s['text'] for s in segments),
+            'language': language or 'en',
+            'segments': segments,
+            'words': words,
+            'duration': duration,
+        }
+
+
+def create_backend(name: Optional[str] = None) -> SpeechToTextBackend:
+    """Backend named by STT_BACKEND: openai (default), local or fake"""
+    name = (name or os.environ.get('STT_BACKEND', 'openai')).lower()
+    if name == 'openai':
+        return OpenAIWhisperBackend(model=os.environ.get('OPENAI_STT_MODEL', 'whisper-1'))
+    if name == 'local':
+        return LocalWhisperBackend.from_env()
+    if name == 'fake':
+        return FakeSpeechToText()
+    raise ValueError(f"Unknown STT_BACKEND: {name}")
@@ -0,0 +1,129 @@
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# format -> (media type, file extension)
+SUBTITLE_FORMATS = {
+    'srt': ('application/x-subrip', 'srt'),
+    'vtt': ('text/vtt', 'vtt'),
+    'ass': ('text/x-ssa', 'ass'),
+    'json': ('application/json', 'json'),
+}
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+WrapStyle: 0
+ScaledBorderAndShadow: yes
+PlayResX: 1920
+PlayResY: 1080
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,56,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,3,1,2,60,60,50,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+def to_millis(seconds: Sequence[float]) -> np.ndarray:
+    """Round second offsets to whole milliseconds (int64, never negative)"""
+    return np.maximum(np.rint(np.asarray(seconds, dtype=np.float64) * 1000), 0).astype(np.int64)
+
+
+def format_timestamps(millis: np.ndarray, pattern: str = '%02d:%02d:%02d,%03d', unit: int = 1) -> List[str]:
+    """Format millisecond timestamps as hours, minutes, seconds and `unit`-ms fractions.
+
+    All fields come from integer division of the same value, so a fraction
+    can never roll over without its second (1999.6 ms is 00:00:02,000).
+    """
+    hours, rest = np.divmod(millis, 3_600_000)
+    minutes, rest = np.divmod(rest, 60_000)
+    seconds, fraction = np.divmod(rest, 1000)
+    fields = np.stack((hours, minutes, seconds, fraction // unit), axis=1).tolist()
+    return [pattern % tuple(row) for row in fields]
+
+
+def _cue_times(segments: List[Dict[str, Any]]):
+    starts = to_millis([s['start'] for s in segments])
+    # Zero-length (or inverted) cues are dropped by most players
+    ends = np.maximum(to_millis([s['end'] for s in segments]), starts + 1)
+    return starts, ends
+
+
+def _cue_text(text: str) -> str:
+    # A blank line would end the cue early in SRT and VTT
+    return '\n'.join(line for line in text.strip().splitlines() if line.strip())
+
+
+def _ass_text(text: str) -> str:
+    # Braces open override blocks in ASS; line breaks are written as \N
+    return _cue_text(text).replace('{', '(').replace('}', ')').replace('\n', '\\N')
+
+
+def render_srt(segments: List[Dict[str, Any]], language: Optional[str] = None) -> str:
+    starts, ends = _cue_times(segments)
+    start_times = format_timestamps(starts)
+    end_times = format_timestamps(ends)
+    return ''.join(
+        f"{i}\n{start} --> {end}\n{_cue_text(segment['text'])}\n\n"
+        for i, (start, end, segment) in enumerate(zip(start_times, end_times, segments), 1)
+    )
+
+
+def render_vtt(segments: List[Dict[str, Any]], language: Optional[str] = None) -> str:
+    starts, ends = _cue_times(segments)
+    start_times = format_timestamps(starts, '%02d:%02d:%02d.%03d')
+    end_times = format_timestamps(ends, '%02d:%02d:%02d.%03d')
+    # Header lines after WEBVTT aren't part of the spec; a NOTE block is
+    header = f"WEBVTT\n\nNOTE language: {language}\n\n" if language else "WEBVTT\n\n"
+    return header + ''.join(
+        f"{start} --> {end}\n"
+        f"{_cue_text(segment['text']).replace('&', '&amp;').replace('<', '&lt;')}\n\n"
+        for start, end, segment in zip(start_times, end_times, segments)
+    )
+
+
+def render_ass(segments: List[Dict[str, Any]], language: Optional[str] = None) -> str:
+    starts, ends = _cue_times(segments)
+    # ASS has centisecond precision and a single-digit hour field
+    start_times = format_timestamps(starts + 5, '%d:%02d:%02d.%02d', unit=10)
+    end_times = format_timestamps(ends + 5, '%d:%02d:%02d.%02d', unit=10)
+    return ASS_HEADER + ''.join(
+        f"Dialogue: 0,{start},{end},Default,,0,0,0,,{_ass_text(segment['text'])}\n"
+        for start, end, segment in zip(start_times, end_times, segments)
+    )
+
+
+def render_json(segments: List[Dict[str, Any]], language: Optional[str] = None) -> str:
+    """Cues with integer-millisecond times, and their words where word timings exist"""
+    starts, ends = _cue_times(segments)
+    cues = []
+    for start, end, segment in zip(starts.tolist(), ends.tolist(), segments):
+        cue = {'start_ms': start, 'end_ms': end, 'text': segment['text']}
+        words = segment.get('words')
+        if words:
+            word_starts = to_millis([w['start'] for w in words]).tolist()
+            word_ends = to_millis([w['end'] for w in words]).tolist()
+            cue['words'] = [
+                {'start_ms': s, 'end_ms': e, 'word': w['word']}
+                for s, e, w in zip(word_starts, word_ends, words)
+            ]
+        cues.append(cue)
+    return json.dumps({'language': language, 'cues': cues}, ensure_ascii=False, separators=(',', ':'))
+
+
+RENDERERS: Dict[str, Callable[[List[Dict[str, Any]], Optional[str]], str]] = {
+    'srt': render_srt,
+    'vtt': render_vtt,
+    'ass': render_ass,
+    'json': render_json,
+}
+
+
+def render_subtitles(segments: List[Dict[str, Any]], subtitle_format: str, language: Optional[str] = None) -> bytes:
+    """Render segments ({'start', 'end', 'text'} in seconds) to one of SUBTITLE_FORMATS"""
+    if subtitle_format not in RENDERERS:
+        raise ValueError(f"Unknown subtitle format: {subtitle_format}")
+    return RENDERERS[subtitle_format](segments, language).encode('utf-8')
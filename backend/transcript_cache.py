@@ -0,0 +1,201 @@
+import uuid
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from bson import Binary
+from pymongo.errors import DuplicateKeyError
+from starlette.concurrency import run_in_threadpool
+
+from audio_fingerprint import HOP_SECONDS, AudioFingerprint, matching_ranges
+from word_timings import WordTimings
+
+logger = logging.getLogger(__name__)
+
+ANCHOR_MIX = 2654435761
+
+
+class TranscriptCache:
+    """Transcripts keyed by audio fingerprint, language and model.
+
+    Sampled frame hashes ("anchors") of every stored transcript vote for
+    (transcript, offset) pairs matching new audio. Anchors are sampled by
+    hash value, about one in anchor_modulus, so new audio only looks up its
+    own hashes that could be anchors. The best pairs are verified
+    frame by frame and the matching ranges returned, so the transcriber can
+    skip chunks inside them: the same audio again, a re-upload, or a
+    trimmed clip of an already transcribed video. The PCM hash keeps
+    identical audio from being stored twice.
+    """
+
+    def __init__(self, db, max_entries: int = 1000, ttl_days: float = 30,
+                 anchor_modulus: int = 16, min_votes: int = 4, max_candidates: int = 4):
+        self.transcripts = db.transcripts
+        self.anchors = db.transcript_anchors
+        self.max_entries = max_entries
+        self.ttl_days = ttl_days
+        self.ttl = timedelta(days=ttl_days) if ttl_days else None
+        self.anchor_modulus = anchor_modulus
+        self.min_votes = min_votes
+        self.max_candidates = max_candidates
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    async def ensure_indexes(self):
+        await self.transcripts.create_index('transcript_id', unique=True)
+        await self.transcripts.create_index([('content_hash', 1), ('key', 1)], unique=True)
+        await self.transcripts.create_index('last_used_at')
+        await self.anchors.create_index([('k', 1), ('h', 1)])
+        await self.anchors.create_index('t')
+
+    @staticmethod
+    def cache_key(language: Optional[str], model: str) -> str:
+        return f"{model}|{language or 'auto'}"
+
+    async def find_known(self, hashes: np.ndarray, duration: float, language: Optional[str],
+                         model: str) -> List[Dict[str, Any]]:
+        """Ranges of this audio found in cached transcripts.
+
+        `hashes` are frame hashes of the audio (see audio_fingerprint);
+        returns [{'start', 'end', 'language', 'segments', 'words'}] on its timeline.
+        """
+        key = self.cache_key(language, model)
+        positions = defaultdict(list)
+        for frame in np.flatnonzero(self._is_anchor(hashes)):
+            positions[int(hashes[frame])].append(int(frame))
+        if not positions:
+            return []
+
+        # Vote for (transcript, frame offset) pairs
+        votes = Counter()
+        unique = list(positions)
+        for first in range(0, len(unique), 5000):
+            cursor = self.anchors.find(
+                {'k': key, 'h': {'$in': unique[first:first + 5000]}},
+                {'_id': 0, 'h': 1, 't': 1, 'f': 1}
+            )
+            async for anchor in cursor:
+                for frame in positions[anchor['h']]:
+                    votes[(anchor['t'], anchor['f'] - frame)] += 1
+
+        candidates = []
+        for (transcript_id, offset), count in votes.most_common():
+            if count < self.min_votes or len(candidates) >= self.max_candidates:
+                break
+            # Neighbouring offsets are the same alignment seen through a shifted grid
+            if any(t == transcript_id and abs(o - offset) <= 1 for t, o in candidates):
+                continue
+            candidates.append((transcript_id, offset))
+
+        known: List[Dict[str, Any]] = []
+        used = set()
+        for transcript_id, offset in candidates:
+            doc = await self.transcripts.find_one({'transcript_id': transcript_id}, {'_id': 0})
+            if not doc:
+                continue
+            source = np.frombuffer(doc['hashes'], dtype='<u4')
+            words = WordTimings.from_document(doc.get('words'))
+            ranges = await run_in_threadpool(matching_ranges, hashes, source, offset)
+            shift = offset * HOP_SECONDS
+            for start_frame, end_frame in ranges:
+                start = start_frame * HOP_SECONDS
+                # Matching through the final frame covers the tail too
+                end = duration if end_frame >= len(hashes) else end_frame * HOP_SECONDS
+                if any(k['start'] <= start and end <= k['end'] for k in known):
+                    continue
+                known.append({
+                    'start': start,
+                    'end': end,
+                    'language': doc.get('detected_language'),
+                    'segments': [
+                        {'start': s['start'] - shift, 'end': s['end'] - shift, 'text': s['text']}
+                        for s in doc['segments']
+                        if s['end'] > start + shift and s['start'] < end + shift
+                    ],
+                    'words': words.between(start + shift, end + shift).to_list(-shift)
+                })
+                used.add(transcript_id)
+
+        if used:
+            await self._touch(list(used))
+        return sorted(known, key=lambda k: k['start'])
+
+    async def store(self, fingerprint: AudioFingerprint, language: Optional[str], model: str,
+                    captions: Dict[str, Any]):
+        if not self.enabled:
+            return
+        transcript_id = str(uuid.uuid4())
+        key = self.cache_key(language, model)
+        now = datetime.now(timezone.utc)
+        try:
+            await self.transcripts.insert_one({
+                'transcript_id': transcript_id,
+                'content_hash': fingerprint.content_hash,
+                'key': key,
+                'model': model,
+                'language': language,
+                'detected_language': captions.get('language'),
+                'duration': fingerprint.duration,
+                'text': captions['text'],
+                'segments': captions['segments'],
+                'words': WordTimings.from_words(captions.get('words', [])).to_document(),
+                'hashes': Binary(fingerprint.hashes.astype('<u4').tobytes()),
+                'created_at': now,
+                'last_used_at': now,
+                'hits': 0,
+            })
+        except DuplicateKeyError:
+            # A concurrent job already cached the same audio
+            return
+
+        hashes = fingerprint.hashes
+        anchors = [
+            {'k': key, 'h': int(hashes[frame]), 't': transcript_id, 'f': int(frame)}
+            for frame in np.flatnonzero(self._is_anchor(hashes)).tolist()
+        ]
+        if anchors:
+            await self.anchors.insert_many(anchors, ordered=False)
+        await self.evict()
+
+    def _is_anchor(self, hashes: np.ndarray) -> np.ndarray:
+        # Neighbouring bands' bits are correlated, so the hash is mixed (Knuth's
+        # multiplicative hash) before sampling; silent frames hash to 0
+        mixed = (hashes.astype('<u4') * np.uint32(ANCHOR_MIX)) >> np.uint32(16)
+        return (hashes != 0) & (mixed % self.anchor_modulus == 0)
+
+    async def _touch(self, transcript_ids: List[str]):
+        await self.transcripts.update_many(
+            {'transcript_id': {'$in': transcript_ids}},
+            {'$set': {'last_used_at': datetime.now(timezone.utc)}, '$inc': {'hits': 1}}
+        )
+
+    async def evict(self) -> int:
+        """Drop transcripts unused for longer than the TTL, then the least recently used over max_entries"""
+        doomed = []
+        if self.ttl:
+            cutoff = datetime.now(timezone.utc) - self.ttl
+            doomed += await self.transcripts.distinct('transcript_id', {'last_used_at': {'$lt': cutoff}})
+
+        excess = await self.transcripts.count_documents({}) - len(doomed) - self.max_entries
+        if excess > 0:
+            cursor = self.transcripts.find(
+                {'transcript_id': {'$nin': doomed}}, {'_id': 0, 'transcript_id': 1}
+            ).sort('last_used_at', 1).limit(excess)
+            doomed += [doc['transcript_id'] async for doc in cursor]
+
+        if doomed:
+            await self.transcripts.delete_many({'transcript_id': {'$in': doomed}})
+            await self.anchors.delete_many({'t': {'$in': doomed}})
+            logger.info(f"Evicted {len(doomed)} cached transcripts")
+        return len(doomed)
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': await self.transcripts.count_documents({}),
+            'max_entries': self.max_entries,
+            'ttl_days': self.ttl_days or None,
+        }
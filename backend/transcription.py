@@ -0,0 +1,401 @@
+import io
+import os
+import wave
+import random
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Whisper works on 16 kHz mono; everything here assumes signed 16-bit PCM at this rate
+SAMPLE_RATE = 16000
+
+Silence = Tuple[float, float]
+ProgressHook = Callable[[float], Awaitable[None]]
+KnownLookup = Callable[[np.ndarray], Awaitable[List[Dict[str, Any]]]]
+
+
+class TranscriptionError(Exception):
+    """Raised when a chunk still fails after all retries"""
+
+
+def read_wav(path: str) -> np.ndarray:
+    """Samples of a 16 kHz mono s16le WAV file"""
+    with wave.open(path, 'rb') as wav:
+        if wav.getframerate() != SAMPLE_RATE or wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise ValueError(f"Expected 16 kHz mono 16-bit WAV: {path}")
+        return np.frombuffer(wav.readframes(wav.getnframes()), dtype='<i2')
+
+
+def encode_wav(samples: np.ndarray) -> bytes:
+    """In-memory WAV for one chunk, the format every STT backend accepts"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.astype('<i2', copy=False).tobytes())
+    return buffer.getvalue()
+
+
+def decode_wav(data: bytes) -> np.ndarray:
+    with wave.open(io.BytesIO(data), 'rb') as wav:
+        return np.frombuffer(wav.readframes(wav.getnframes()), dtype='<i2')
+
+
+def find_silences(samples: np.ndarray, threshold_db: float = -40.0, min_duration: float = 0.3,
+                  frame_seconds: float = 0.02, block_seconds: float = 60.0) -> List[Silence]:
+    """(start, end) of every stretch quieter than threshold_db for at least min_duration"""
+    frame = int(SAMPLE_RATE * frame_seconds)
+    frame_count = len(samples) // frame
+    if frame_count == 0:
+        return []
+
+    # Frame loudness in blocks so an hour of audio never becomes one float array
+    quiet = np.empty(frame_count, dtype=bool)
+    frames_per_block = max(1, int(block_seconds / frame_seconds))
+    threshold = (10 ** (threshold_db / 20)) * 32768.0
+    for first in range(0, frame_count, frames_per_block):
+        last = min(frame_count, first + frames_per_block)
+        block = samples[first * frame:last * frame].astype(np.float32).reshape(-1, frame)
+        quiet[first:last] = np.sqrt(np.mean(block * block, axis=1)) < threshold
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], quiet.view(np.int8), [0]))))
+    starts, ends = edges[::2], edges[1::2]
+    keep = (ends - starts) * frame_seconds >= min_duration
+    return [(float(s * frame_seconds), float(e * frame_seconds)) for s, e in zip(starts[keep], ends[keep])]
+
+
+class StreamingChunker:
+    """Cut a PCM stream into overlapping, silence-aligned chunks as it arrives.
+
+    Each chunk owns [owned_start, owned_end) of the timeline and carries
+    `overlap` extra seconds on both sides, so a word cut by a boundary
+    without silence is still heard whole by one of the chunks. Boundaries
+    land on the pause nearest to every `target` seconds, within half a
+    target either way. Only the audio later chunks still need is buffered.
+    """
+
+    def __init__(self, target: float = 120.0, overlap: float = 1.0):
+        self.target = target
+        self.overlap = overlap
+        self._blocks: List[np.ndarray] = []
+        self._buffer_start = 0  # sample index of the first buffered sample
+        self._buffered = 0
+        self._boundary = 0.0
+        self._index = 0
+
+    @property
+    def received(self) -> float:
+        return (self._buffer_start + self._buffered) / SAMPLE_RATE
+
+    def feed(self, samples: np.ndarray) -> List[Tuple[Dict[str, float], np.ndarray]]:
+        """Add samples; returns the chunks that are now complete"""
+        self._blocks.append(samples)
+        self._buffered += len(samples)
+        ready = []
+        # Wait for two targets so the chunk after a cut is never a sliver
+        while self.received - self._boundary > self.target * 2 + self.overlap:
+            ready.append(self._cut())
+        return ready
+
+    def finish(self) -> List[Tuple[Dict[str, float], np.ndarray]]:
+        """End of stream: returns the remaining chunks"""
+        ready = []
+        while self.received - self._boundary > self.target * 1.5:
+            ready.append(self._cut())
+        if self.received > self._boundary:
+            ready.append(self._emit(self.received))
+        return ready
+
+    @staticmethod
+    def _sample(seconds: float) -> int:
+        return int(round(seconds * SAMPLE_RATE))
+
+    def _buffer(self) -> np.ndarray:
+        if len(self._blocks) > 1:
+            self._blocks = [np.concatenate(self._blocks)]
+        return self._blocks[0] if self._blocks else np.zeros(0, dtype='<i2')
+
+    def _slice(self, start: float, end: float) -> np.ndarray:
+        return self._buffer()[self._sample(start) - self._buffer_start:self._sample(end) - self._buffer_start]
+
+    def _cut(self) -> Tuple[Dict[str, float], np.ndarray]:
+        low = self._boundary + self.target * 0.5
+        high = self._boundary + self.target * 1.5
+        target = self._boundary + self.target
+        midpoints = [low + (start + end) / 2 for start, end in find_silences(self._slice(low, high))]
+        return self._emit(min(midpoints, key=lambda m: abs(m - target)) if midpoints else target)
+
+    def _emit(self, owned_end: float) -> Tuple[Dict[str, float], np.ndarray]:
+        chunk = {
+            'index': self._index,
+            'start': max(0.0, self._boundary - self.overlap),
+            'end': min(self.received, owned_end + self.overlap),
+            'owned_start': self._boundary,
+            'owned_end': owned_end,
+        }
+        samples = self._slice(chunk['start'], chunk['end']).copy()
+        self._index += 1
+        self._boundary = owned_end
+
+        # Drop what no later chunk needs
+        drop = self._sample(max(0.0, owned_end - self.overlap)) - self._buffer_start
+        if drop > 0:
+            self._blocks = [self._buffer()[drop:]]
+            self._buffer_start += drop
+            self._buffered -= drop
+        return chunk, samples
+
+
+def stitch_segments(chunks: List[Dict[str, float]], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge per-chunk segments onto one timeline, dropping overlap duplicates.
+
+    Chunk timestamps are shifted by the chunk's start. A segment is kept only
+    by the chunk that owns its midpoint, which resolves the overlaps; any
+    remaining touch-ups make the timeline monotonic.
+    """
+    segments = []
+    for chunk, result in zip(chunks, results):
+        is_last = chunk['index'] == len(chunks) - 1
+        for segment in result.get('segments', []):
+            start = chunk['start'] + max(0.0, segment['start'])
+            end = min(chunk['start'] + segment['end'], chunk['end'])
+            midpoint = (start + end) / 2
+            if midpoint < chunk['owned_start']:
+                continue
+            if midpoint >= chunk['owned_end'] and not is_last:
+                continue
+            text = segment['text'].strip()
+            if text:
+                segments.append({'start': start, 'end': end, 'text': text})
+
+    segments.sort(key=lambda s: s['start'])
+    stitched = []
+    for segment in segments:
+        if stitched:
+            previous = stitched[-1]
+            if segment['start'] < previous['end']:
+                if segment['text'] == previous['text']:
+                    # Same words heard by both neighbours
+                    previous['end'] = max(previous['end'], segment['end'])
+                    continue
+                segment['start'] = previous['end']
+                if segment['end'] <= segment['start']:
+                    continue
+        stitched.append(segment)
+
+    return [
+        {'start': round(s['start'], 3), 'end': round(s['end'], 3), 'text': s['text']}
+        for s in stitched
+    ]
+
+
+def stitch_words(chunks: List[Dict[str, float]], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge per-chunk word timings the same way as segments (midpoint ownership)"""
+    words = []
+    for chunk, result in zip(chunks, results):
+        is_last = chunk['index'] == len(chunks) - 1
+        for word in result.get('words') or []:
+            start = chunk['start'] + max(0.0, word['start'])
+            end = min(chunk['start'] + word['end'], chunk['end'])
+            midpoint = (start + end) / 2
+            if midpoint < chunk['owned_start']:
+                continue
+            if midpoint >= chunk['owned_end'] and not is_last:
+                continue
+            text = word['word'].strip()
+            if text:
+                words.append({'start': start, 'end': max(start, end), 'word': text})
+
+    words.sort(key=lambda w: w['start'])
+    for previous, word in zip(words, words[1:]):
+        # Keep the timeline monotonic where neighbouring chunks disagree slightly
+        if word['start'] < previous['end']:
+            previous['end'] = word['start']
+    return [
+        {'start': round(w['start'], 3), 'end': round(w['end'], 3), 'word': w['word']}
+        for w in words
+    ]
+
+
+def known_result(chunk: Dict[str, float], known: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Chunk result built from an already transcribed range covering it, if any.
+
+    `known` ranges and their segments are on the chunk's own timeline.
+    """
+    owned_start = chunk['owned_start'] - chunk['start']
+    owned_end = chunk['owned_end'] - chunk['start']
+    length = chunk['end'] - chunk['start']
+    for entry in known:
+        if entry['start'] <= owned_start and owned_end <= entry['end']:
+            segments = [s for s in entry['segments'] if s['end'] > 0 and s['start'] < length]
+            return {
+                'text': ' '.join(s['text'] for s in segments),
+                'language': entry.get('language'),
+                'segments': segments,
+                'words': [w for w in entry.get('words', []) if w['end'] > 0 and w['start'] < length],
+            }
+    return None
+
+
+class ChunkedTranscriber:
+    """Transcribe long audio as overlapping, silence-aligned chunks in parallel.
+
+    `backend` is a SpeechToTextBackend (see stt_backends.py), or anything
+    else with a compatible `async transcribe(audio: bytes, language)`.
+    """
+
+    def __init__(self, backend, concurrency: int = 4, chunk_seconds: float = 120.0,
+                 overlap: float = 1.0, max_retries: int = 3, retry_backoff: float = 1.0):
+        self.backend = backend
+        self.chunk_seconds = chunk_seconds
+        self.overlap = overlap
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        # Shared by every job using this transcriber: bounds calls to the backend overall
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # Chunks a single stream may have in flight before reading pauses
+        self.max_pending = concurrency * 2
+
+    @classmethod
+    def from_env(cls, backend) -> 'ChunkedTranscriber':
+        concurrency = os.environ.get('TRANSCRIBE_CONCURRENCY')
+        return cls(
+            backend,
+            concurrency=int(concurrency) if concurrency else getattr(backend, 'concurrency', 4),
+            chunk_seconds=float(os.environ.get('TRANSCRIBE_CHUNK_SECONDS', '120')),
+            overlap=float(os.environ.get('TRANSCRIBE_OVERLAP_SECONDS', '1.0')),
+            max_retries=int(os.environ.get('TRANSCRIBE_MAX_RETRIES', '3')),
+        )
+
+    async def transcribe_samples(self, samples: np.ndarray, language: Optional[str] = None,
+                                 on_progress: Optional[ProgressHook] = None,
+                                 known_lookup: Optional[KnownLookup] = None) -> Dict[str, Any]:
+        """Transcribe PCM already in memory"""
+        async def blocks():
+            for first in range(0, len(samples), SAMPLE_RATE * 10):
+                yield samples[first:first + SAMPLE_RATE * 10]
+
+        return await self.transcribe_stream(
+            blocks(), language, on_progress, duration=len(samples) / SAMPLE_RATE, known_lookup=known_lookup
+        )
+
+    async def transcribe_stream(self, blocks: AsyncIterator[np.ndarray], language: Optional[str] = None,
+                                on_progress: Optional[ProgressHook] = None, duration: Optional[float] = None,
+                                known_lookup: Optional[KnownLookup] = None) -> Dict[str, Any]:
+        """Transcribe PCM blocks as they are produced.
+
+        Each chunk is dispatched as soon as its audio is complete, so
+        transcription overlaps decoding. `duration`, when known, scales
+        progress. `known_lookup(samples)` may return already transcribed
+        ranges of a chunk ({'start', 'end', 'language', 'segments', 'words'} on the
+        chunk's timeline); chunks fully inside one skip the backend.
+        """
+        chunker = StreamingChunker(self.chunk_seconds, self.overlap)
+        chunks: List[Dict[str, float]] = []
+        results: Dict[int, Dict[str, Any]] = {}
+        tasks: List[asyncio.Future] = []
+        pending = asyncio.Semaphore(self.max_pending)
+        language_ready = asyncio.Event()
+        if language is not None:
+            language_ready.set()
+        failures: List[BaseException] = []
+        failed = asyncio.Event()
+        transcribed = 0.0
+        reused = 0
+
+        async def run(chunk, samples):
+            nonlocal language, transcribed, reused
+            try:
+                result = None
+                if known_lookup is not None:
+                    result = known_result(chunk, await known_lookup(samples))
+                if result is not None:
+                    reused += 1
+                else:
+                    if chunk['index'] > 0:
+                        # Detect the language once so quiet chunks can't each guess differently
+                        await language_ready.wait()
+                    result = await self._transcribe_chunk(chunk, encode_wav(samples), language)
+                if not language_ready.is_set():
+                    language = result.get('language')
+                    language_ready.set()
+
+                results[chunk['index']] = result
+                transcribed += chunk['owned_end'] - chunk['owned_start']
+                if on_progress and duration:
+                    await on_progress(min(1.0, transcribed / duration))
+            except Exception as e:
+                # Stop decoding and the other chunks instead of finishing a doomed job
+                failures.append(e)
+                failed.set()
+                raise
+            finally:
+                pending.release()
+
+        async def dispatch(ready):
+            for chunk, samples in ready:
+                # Backpressure: leave the pipe unread while enough chunks are in flight
+                await pending.acquire()
+                chunks.append(chunk)
+                tasks.append(asyncio.ensure_future(run(chunk, samples)))
+
+        async def feed():
+            async for block in blocks:
+                await dispatch(chunker.feed(block))
+            await dispatch(chunker.finish())
+            await asyncio.gather(*tasks)
+
+        # Reading runs in its own task so a failed chunk can interrupt it without
+        # cancelling ours; a cancellation from outside propagates as is
+        feeding = asyncio.ensure_future(feed())
+        stopped = asyncio.ensure_future(failed.wait())
+        try:
+            await asyncio.wait([feeding, stopped], return_when=asyncio.FIRST_COMPLETED)
+            if failures:
+                raise failures[0]
+            feeding.result()
+        finally:
+            for task in (feeding, stopped, *tasks):
+                task.cancel()
+            await asyncio.gather(feeding, stopped, *tasks, return_exceptions=True)
+            aclose = getattr(blocks, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+
+        logger.info(
+            f"Transcribed {chunker.received:.1f}s of audio as {len(chunks)} chunks"
+            + (f", {reused} from cache" if reused else "")
+        )
+        ordered = [results[chunk['index']] for chunk in chunks]
+        segments = stitch_segments(chunks, ordered)
+        detected = next((r.get('language') for r in ordered if r.get('language')), None)
+        return {
+            'text': ' '.join(segment['text'] for segment in segments),
+            'language': detected or language,
+            'segments': segments,
+            'words': stitch_words(chunks, ordered),
+            'duration': chunker.received,
+        }
+
+    async def _transcribe_chunk(self, chunk: Dict[str, float], audio: bytes,
+                                language: Optional[str]) -> Dict[str, Any]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    return await self.backend.transcribe(audio, language)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise TranscriptionError(
+                        f"Chunk {chunk['index']} ({chunk['start']:.1f}s-{chunk['end']:.1f}s) "
+                        f"failed after {attempt + 1} attempts: {e}"
+                    ) from e
+                # Exponential backoff with jitter, outside the semaphore so other chunks proceed
+                delay = self.retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+                logger.warning(f"Chunk {chunk['index']} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
@@ -0,0 +1,242 @@
+import os
+import uuid
+import hashlib
+import logging
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+logger = logging.getLogger(__name__)
+
+# Writes are issued in multiples of this size regardless of how the client
+# or the ASGI server slices the request body.
+WRITE_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+class UploadError(Exception):
+    """Raised for invalid chunked upload operations"""
+
+    def __init__(self, message: str, status_code: int = 400, received: Optional[int] = None):
+        self.status_code = status_code
+        self.received = received
+        super().__init__(message)
+
+
+def copy_and_hash(source: BinaryIO, dest_path: Path, block_size: int = WRITE_BLOCK_SIZE) -> Tuple[int, str]:
+    """Copy a file object to dest_path, returning (bytes written, sha256 hex)"""
+    hasher = hashlib.sha256()
+    written = 0
+    with open(dest_path, 'wb') as dest:
+        while True:
+            block = source.read(block_size)
+            if not block:
+                break
+            hasher.update(block)
+            dest.write(block)
+            written += len(block)
+    return written, hasher.hexdigest()
+
+
+class ChunkedUploadManager:
+    """Resumable uploads written straight to their final location"""
+
+    def __init__(self, db, upload_dir: Path, chunk_size: int = 16 * 1024 * 1024,
+                 max_size: int = 10 * 1024 ** 3, session_ttl_hours: int = 24):
+        self.collection = db.upload_sessions
+        self.upload_dir = Path(upload_dir)
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.session_ttl = timedelta(hours=session_ttl_hours)
+
+        # Running sha256 per upload, valid while its offset matches the session
+        self._hashers: Dict[str, Tuple[int, Any]] = {}
+
+    async def ensure_indexes(self):
+        await self.collection.create_index('upload_id', unique=True)
+        await self.collection.create_index('expires_at', expireAfterSeconds=0)
+
+    def part_path(self, session: Dict[str, Any]) -> Path:
+        return self.upload_dir / session['part_filename']
+
+    async def init(self, filename: str, size: int) -> Dict[str, Any]:
+        """Start an upload session"""
+        if size <= 0:
+            raise UploadError("Upload size must be positive")
+        if size > self.max_size:
+            raise UploadError(f"File exceeds maximum size of {self.max_size} bytes", status_code=413)
+
+        upload_id = str(uuid.uuid4())
+        now = datetime.now(timezone.utc)
+        session = {
+            'upload_id': upload_id,
+            'filename': filename,
+            'size': size,
+            'received': 0,
+            'part_filename': f"upload_{upload_id}.part",
+            'status': 'uploading',
+            'created_at': now,
+            'expires_at': now + self.session_ttl,
+        }
+
+        # Preallocate so chunk writes never extend the file piecemeal
+        path = self.part_path(session)
+        await run_in_threadpool(self._preallocate, path, size)
+
+        await self.collection.insert_one(dict(session))
+        self._hashers[upload_id] = (0, hashlib.sha256())
+        logger.info(f"Upload session started: {upload_id} ({filename}, {size} bytes)")
+        return session
+
+    @staticmethod
+    def _preallocate(path: Path, size: int):
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            if hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(fd, 0, size)
+                    return
+                except OSError:
+                    pass
+            os.ftruncate(fd, size)
+        finally:
+            os.close(fd)
+
+    async def get(self, upload_id: str) -> Dict[str, Any]:
+        session = await self.collection.find_one({'upload_id': upload_id}, {'_id': 0})
+        if not session:
+            raise UploadError("Upload session not found", status_code=404)
+        return session
+
+    async def write_chunk(self, upload_id: str, offset: int, body: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """Append a chunk that starts at offset; returns the updated session"""
+        session = await self.get(upload_id)
+        if session['status'] != 'uploading':
+            raise UploadError("Upload already finalized", status_code=409)
+        if offset != session['received']:
+            raise UploadError(
+                f"Expected offset {session['received']}, got {offset}",
+                status_code=409,
+                received=session['received']
+            )
+
+        hasher = await self._hasher_at(session, offset)
+        path = self.part_path(session)
+        position = offset
+        buffer = bytearray()
+
+        disconnected = None
+        fd = os.open(path, os.O_WRONLY)
+        try:
+            try:
+                async for data in body:
+                    buffer.extend(data)
+                    if position + len(buffer) > session['size']:
+                        raise UploadError("Chunk extends past declared upload size", status_code=413)
+                    if len(buffer) >= WRITE_BLOCK_SIZE:
+                        # Write whole blocks, keep the remainder for the next round
+                        cut = len(buffer) - len(buffer) % WRITE_BLOCK_SIZE
+                        block = bytes(buffer[:cut])
+                        del buffer[:cut]
+                        await run_in_threadpool(self._write_block, fd, block, position, hasher)
+                        position += len(block)
+            except ClientDisconnect as e:
+                # Keep what arrived so the client resumes from here, not from offset
+                disconnected = e
+
+            if buffer:
+                await run_in_threadpool(self._write_block, fd, bytes(buffer), position, hasher)
+                position += len(buffer)
+        except BaseException:
+            # The running hash may now be ahead of the committed offset
+            self._hashers.pop(upload_id, None)
+            raise
+        finally:
+            os.close(fd)
+
+        # Compare-and-set so two writers racing on one offset can't both win
+        result = await self.collection.update_one(
+            {'upload_id': upload_id, 'received': offset},
+            {'$set': {
+                'received': position,
+                'expires_at': datetime.now(timezone.utc) + self.session_ttl,
+            }}
+        )
+        if result.matched_count != 1:
+            self._hashers.pop(upload_id, None)
+            raise UploadError("Concurrent write to the same upload", status_code=409)
+
+        self._hashers[upload_id] = (position, hasher)
+        session['received'] = position
+        if disconnected is not None:
+            logger.info(f"Upload {upload_id} interrupted at {position} bytes")
+            raise disconnected
+        return session
+
+    @staticmethod
+    def _write_block(fd: int, block: bytes, position: int, hasher):
+        view = memoryview(block)
+        while view:
+            written = os.pwrite(fd, view, position)
+            view = view[written:]
+            position += written
+        hasher.update(block)
+
+    async def _hasher_at(self, session: Dict[str, Any], offset: int):
+        """Hash state at offset, rebuilt from disk after a restart or worker switch"""
+        cached = self._hashers.get(session['upload_id'])
+        if cached and cached[0] == offset:
+            # Work on a copy so a losing concurrent writer can't corrupt it
+            return cached[1].copy()
+
+        logger.info(f"Rebuilding hash state for upload {session['upload_id']} at offset {offset}")
+        return await run_in_threadpool(self._hash_prefix, self.part_path(session), offset)
+
+    @staticmethod
+    def _hash_prefix(path: Path, length: int):
+        hasher = hashlib.sha256()
+        remaining = length
+        with open(path, 'rb') as f:
+            while remaining > 0:
+                block = f.read(min(WRITE_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+        return hasher
+
+    async def finalize(self, upload_id: str, final_filename: str) -> Tuple[Dict[str, Any], str]:
+        """Move a complete upload into place; returns (session, sha256 hex)"""
+        session = await self.get(upload_id)
+        if session['status'] != 'uploading':
+            raise UploadError("Upload already finalized", status_code=409)
+        if session['received'] != session['size']:
+            raise UploadError(
+                f"Upload incomplete: {session['received']} of {session['size']} bytes",
+                status_code=409,
+                received=session['received']
+            )
+
+        hasher = await self._hasher_at(session, session['size'])
+        content_hash = hasher.hexdigest()
+
+        result = await self.collection.update_one(
+            {'upload_id': upload_id, 'status': 'uploading'},
+            {'$set': {'status': 'finalized', 'content_hash': content_hash}}
+        )
+        if result.matched_count != 1:
+            raise UploadError("Upload already finalized", status_code=409)
+
+        await run_in_threadpool(os.replace, self.part_path(session), self.upload_dir / final_filename)
+        self._hashers.pop(upload_id, None)
+        return session, content_hash
+
+    async def abort(self, upload_id: str):
+        """Discard an upload session and its partial file"""
+        session = await self.get(upload_id)
+        self._hashers.pop(upload_id, None)
+        await self.collection.delete_one({'upload_id': upload_id})
+        if session['status'] == 'uploading':
+            self.part_path(session).unlink(missing_ok=True)
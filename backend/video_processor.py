@@ -1,57 +1,118 @@
 import ffmpeg
 import os
+import asyncio
+import shutil
 import uuid
+import bisect
 import subprocess
+import threading
+import collections
 import json
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, AsyncIterator, List, Sequence, Tuple
 import logging
+import numpy as np
+
+from ffmpeg_progress import ProgressParser, ProgressCallback
+from filmstrip import FilmstripLayout
+from encoding_profiles import EncodingProfile, get_profile
+from media_metadata import probe_media
 
 logger = logging.getLogger(__name__)
 
+# Encoders that can produce boundary GOPs splice-compatible with a stream copy
+SMART_CUT_ENCODERS = {'h264': 'libx264', 'hevc': 'libx265'}
+SMART_CUT_ANNEXB_FILTERS = {'h264': 'h264_mp4toannexb', 'hevc': 'hevc_mp4toannexb'}
+# Seek offset that lands on a keyframe rather than the one before it, and ends before one
+KEYFRAME_EPSILON = 0.001
+
+# Adaptive streaming ladder: (height, video kbps at <= 30 fps)
+RENDITION_LADDER = ((1080, 5000), (720, 2800), (480, 1400), (360, 800))
+RENDITION_SEGMENT_SECONDS = 4
+
 class VideoProcessor:
     """Handle video processing operations using FFmpeg"""
     
-    def __init__(self, upload_dir: str):
+    def __init__(self, upload_dir: str, progress_interval: float = 1.0, threads: int = 0,
+                 profile: Optional[str] = None):
         self.upload_dir = Path(upload_dir)
         self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self.progress_interval = progress_interval
+        # Encoder threads per ffmpeg process (0: let ffmpeg use every core)
+        self.threads = threads
+        self.default_profile = get_profile(profile)
+    
+    def _profile(self, name: Optional[str]) -> EncodingProfile:
+        return get_profile(name) if name else self.default_profile
+    
+    def _run(self, stream, duration: Optional[float] = None,
+             on_progress: Optional[ProgressCallback] = None,
+             start: float = 0.0, span: float = 1.0):
+        """Run an ffmpeg-python stream, parsing `-progress` output when a callback is given"""
+        if on_progress is None:
+            return stream.run(capture_stdout=True, capture_stderr=True)
+        
+        args = stream.compile()
+        args[1:1] = ['-progress', 'pipe:1', '-nostats']
+        parser = ProgressParser(duration, on_progress, self.progress_interval, start, span)
+        
+        process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        
+        # Drain stderr concurrently so a chatty ffmpeg can't block on a full pipe
+        stderr_lines = collections.deque(maxlen=200)
+        drain = threading.Thread(target=stderr_lines.extend, args=(process.stderr,), daemon=True)
+        drain.start()
+        
+        for line in process.stdout:
+            parser.feed_line(line.decode('utf-8', 'replace'))
+        
+        process.wait()
+        drain.join()
+        stderr = b''.join(stderr_lines)
+        if process.returncode != 0:
+            raise ffmpeg.Error('ffmpeg', b'', stderr)
+        return b'', stderr
     
     def get_video_info(self, video_path: str) -> Dict[str, Any]:
-        """Get video metadata using ffprobe"""
+        """Probe once with ffprobe; returns the normalized record from media_metadata"""
         try:
-            probe = ffmpeg.probe(video_path)
-            video_info = next(s for s in probe['streams'] if s['codec_type'] == 'video')
-            audio_info = next((s for s in probe['streams'] if s['codec_type'] == 'audio'), None)
-            
-            duration = float(probe['format']['duration'])
-            
-            return {
-                'duration': duration,
-                'width': int(video_info['width']),
-                'height': int(video_info['height']),
-                'fps': eval(video_info['r_frame_rate']),
-                'codec': video_info['codec_name'],
-                'has_audio': audio_info is not None,
-                'audio_codec': audio_info['codec_name'] if audio_info else None,
-                'file_size': int(probe['format']['size']),
-                'bitrate': int(probe['format']['bit_rate'])
-            }
+            info = probe_media(video_path)
+            if not info['duration']:
+                raise ValueError("Could not determine the video duration")
+            return info
+        except ffmpeg.Error as e:
+            logger.error(f"Error getting video info: {e.stderr.decode()}")
+            raise Exception(f"Failed to read video metadata: {e.stderr.decode()}")
         except Exception as e:
             logger.error(f"Error getting video info: {e}")
             raise
     
-    def trim_video(self, input_path: str, start_time: float, end_time: float, output_filename: str) -> str:
-        """Trim video between start and end time"""
+    def trim_video(self, input_path: str, start_time: float, end_time: float, output_filename: str,
+                   on_progress: Optional[ProgressCallback] = None,
+                   mode: str = 'copy', keyframes: Optional[Sequence[float]] = None,
+                   profile: Optional[str] = None, media: Optional[Dict[str, Any]] = None) -> str:
+        """Trim video between start and end time.
+        
+        mode 'copy' is a plain stream copy (snaps to keyframes); any other mode
+        is handled as a single segment cut, see cut_video.
+        """
+        if mode != 'copy':
+            return self.cut_video(
+                input_path, [{'start': start_time, 'end': end_time}], output_filename,
+                on_progress=on_progress, mode=mode, keyframes=keyframes, profile=profile, media=media
+            )
+        
         try:
             output_path = str(self.upload_dir / output_filename)
             
             # Use ffmpeg to trim video
-            (
+            self._run(
                 ffmpeg
                 .input(input_path, ss=start_time, to=end_time)
                 .output(output_path, codec='copy', avoid_negative_ts='make_zero')
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
+                .overwrite_output(),
+                duration=end_time - start_time,
+                on_progress=on_progress
             )
             
             logger.info(f"Video trimmed successfully: {output_path}")
@@ -60,82 +121,464 @@ class VideoProcessor:
             logger.error(f"FFmpeg error during trim: {e.stderr.decode()}")
             raise Exception(f"Failed to trim video: {e.stderr.decode()}")
     
-    def cut_video(self, input_path: str, segments: List[Dict[str, float]], output_filename: str) -> str:
-        """Cut video into segments and concatenate them"""
+    def get_keyframes(self, video_path: str) -> List[float]:
+        """Keyframe timestamps of the first video stream, read from packet flags (no decoding).
+        
+        Times are relative to the container start time, like the -ss seeks and
+        segment times they're compared with.
+        """
         try:
-            temp_files = []
-            concat_file = str(self.upload_dir / f"concat_{uuid.uuid4()}.txt")
+            result = subprocess.run(
+                [
+                    'ffprobe', '-v', 'error',
+                    '-select_streams', 'v:0',
+                    '-show_entries', 'packet=pts_time,flags:format=start_time',
+                    '-of', 'csv',
+                    video_path
+                ],
+                capture_output=True,
+                check=True
+            )
+        except subprocess.CalledProcessError as e:
+            logger.error(f"ffprobe error reading keyframes: {e.stderr.decode()}")
+            raise Exception(f"Failed to read keyframes: {e.stderr.decode()}")
+        
+        keyframes, start_time = [], 0.0
+        for line in result.stdout.decode().splitlines():
+            section, _, fields = line.partition(',')
+            if section == 'format':
+                start_time = float(fields) if fields not in ('', 'N/A') else 0.0
+                continue
+            pts_time, _, flags = fields.partition(',')
+            if 'K' in flags and pts_time not in ('', 'N/A'):
+                keyframes.append(float(pts_time))
+        keyframes.sort()
+        return [round(keyframe - start_time, 6) for keyframe in keyframes]
+    
+    @staticmethod
+    def _starts_on_keyframes(segments: List[Dict[str, float]], keyframes: Sequence[float],
+                             tolerance: float = 0.05) -> bool:
+        """True when every segment starts (within tolerance) on a keyframe"""
+        for segment in segments:
+            index = bisect.bisect_left(keyframes, segment['start'] - tolerance)
+            if index >= len(keyframes) or keyframes[index] > segment['start'] + tolerance:
+                return False
+        return True
+    
+    @staticmethod
+    def _has_audio(video_path: str) -> bool:
+        probe = ffmpeg.probe(video_path, select_streams='a')
+        return bool(probe.get('streams'))
+    
+    @staticmethod
+    def plan_smart_cut(segments: List[Dict[str, float]], keyframes: Sequence[float],
+                       tolerance: float = 0.05) -> List[Tuple[str, float, float]]:
+        """Split segments into ('encode' | 'copy', start, end) pieces.
+        
+        Only the partial GOPs before the first and after the last keyframe of
+        each segment are re-encoded; whole GOPs in between are stream-copied.
+        """
+        pieces = []
+        for segment in segments:
+            start, end = segment['start'], segment['end']
+            i = bisect.bisect_left(keyframes, start - tolerance)
+            j = bisect.bisect_right(keyframes, end + tolerance) - 1
+            first = keyframes[i] if i < len(keyframes) else None
+            last = keyframes[j] if j >= 0 else None
             
-            # Create individual segments
-            for i, segment in enumerate(segments):
-                temp_output = str(self.upload_dir / f"temp_segment_{i}_{uuid.uuid4()}.mp4")
-                
-                (
-                    ffmpeg
-                    .input(input_path, ss=segment['start'], to=segment['end'])
-                    .output(temp_output, codec='copy', avoid_negative_ts='make_zero')
-                    .overwrite_output()
-                    .run(capture_stdout=True, capture_stderr=True)
+            if first is None or last is None or first >= last:
+                # The segment sits inside a single GOP: nothing to copy
+                pieces.append(('encode', start, end))
+                continue
+            
+            if first - start > tolerance:
+                pieces.append(('encode', start, first))
+            pieces.append(('copy', first, last))
+            if end - last > tolerance:
+                pieces.append(('encode', last, end))
+        return pieces
+    
+    def _smart_cut_settings(self, input_path: str, encoding: EncodingProfile,
+                            media: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Encoder options for boundary pieces matching the source, or None when it can't be spliced.
+        
+        media is the source's normalized metadata record; it's probed when not given.
+        """
+        media = media or probe_media(input_path)
+        if media['codec'] not in SMART_CUT_ENCODERS:
+            return None
+        if media['rotation']:
+            # Re-encoded frames come out rotated, copied ones don't
+            return None
+        
+        settings = {
+            'vcodec': SMART_CUT_ENCODERS[media['codec']],
+            'pix_fmt': media['pix_fmt'] or 'yuv420p',
+            's': f"{media['coded_width']}x{media['coded_height']}",
+            # Boundary GOPs sit between copied source frames: never below source-like quality
+            **encoding.video_options(self.threads, crf=min(encoding.crf, 18)),
+            # Parameter sets in every keyframe, so each piece decodes with its own SPS/PPS
+            'bsf:v': SMART_CUT_ANNEXB_FILTERS[media['codec']],
+            'an': None,
+        }
+        # Same timescale keeps the spliced timestamps exact
+        time_base = media['time_base'] or ''
+        if '/' in time_base:
+            settings['video_track_timescale'] = time_base.split('/')[1]
+        profile = (media['profile'] or '').lower().replace('constrained ', '')
+        if media['codec'] == 'h264' and profile in ('baseline', 'main', 'high'):
+            settings['profile:v'] = profile
+        return settings
+    
+    def _copy_gops(self, input_path: str, start: float, end: float, piece: str, settings: Dict[str, Any]):
+        """Stream-copy the video GOPs from keyframe `start` up to keyframe `end` into piece.
+        
+        The segment muxer splits exactly on the keyframe at `end` by presentation
+        time; cutting by `-to` or a concat outpoint goes by decode time, which
+        keeps or drops frames around the keyframe depending on B-frame delay.
+        """
+        pattern = piece[:-len('.mp4')] + '_%d.mp4'
+        try:
+            self._run(
+                ffmpeg
+                # Seeking just past the keyframe lands on it, whatever the rounding of the index
+                .input(input_path, ss=start + KEYFRAME_EPSILON, to=end + 1.0)['v:0']
+                .output(
+                    pattern, vcodec='copy', f='segment', segment_format='mp4', reset_timestamps=1,
+                    segment_times=f"{end - start - 2 * KEYFRAME_EPSILON:.6f}",
+                    **{key: settings[key] for key in ('bsf:v', 'video_track_timescale') if key in settings}
                 )
-                
-                temp_files.append(temp_output)
+                .overwrite_output()
+            )
+            os.replace(pattern % 0, piece)
+        finally:
+            Path(pattern % 0).unlink(missing_ok=True)
+            Path(pattern % 1).unlink(missing_ok=True)
+    
+    @staticmethod
+    def _has_leading_pictures(path: str, packets: int = 64) -> bool:
+        """True when frames decoded after the first keyframe display before it (open GOPs).
+        
+        Those frames reference the GOP before, so a copy starting or ending on
+        such a keyframe shows wrong pictures without any decoder error.
+        """
+        result = subprocess.run(
+            [
+                'ffprobe', '-v', 'error', '-select_streams', 'v:0', '-read_intervals', f'%+#{packets}',
+                '-show_entries', 'packet=pts_time', '-of', 'csv=p=0', path
+            ],
+            capture_output=True,
+            check=True
+        )
+        times = [float(line.strip(',')) for line in result.stdout.decode().split() if line.strip(',') != 'N/A']
+        return any(time < times[0] for time in times[1:])
+    
+    @staticmethod
+    def _decodes_cleanly(path: str, times: Sequence[float]) -> bool:
+        """Decode the video around each of `times` (seconds); False on any decoder error"""
+        for time in times:
+            result = subprocess.run(
+                [
+                    'ffmpeg', '-nostdin', '-v', 'error', '-xerror',
+                    '-ss', f"{max(0.0, time - 1.0):.6f}", '-t', '2', '-i', path,
+                    '-map', '0:v:0', '-f', 'null', '-'
+                ],
+                capture_output=True
+            )
+            if result.returncode != 0 or result.stderr.strip():
+                logger.warning(f"Splice at {time:.3f}s doesn't decode cleanly: {result.stderr.decode()[-500:]}")
+                return False
+        return True
+    
+    def _smart_cut(self, input_path: str, segments: List[Dict[str, float]], keyframes: Sequence[float],
+                   output_path: str, settings: Dict[str, Any], audio_options: Optional[Dict[str, Any]],
+                   on_progress: Optional[ProgressCallback] = None) -> bool:
+        """Join re-encoded boundary pieces and copied GOPs; False when they can't be spliced cleanly.
+        
+        Each piece is written with in-band parameter sets and joined by the
+        concat demuxer, so copied GOPs keep the source's SPS/PPS and boundary
+        pieces carry the encoder's. Audio is re-encoded once over the joined
+        ranges rather than per piece, so there is no AAC priming at the splices.
+        """
+        pieces = self.plan_smart_cut(segments, keyframes)
+        token = uuid.uuid4()
+        piece_files = []
+        concat_file = str(self.upload_dir / f"concat_{token}.txt")
+        try:
+            for i, (kind, start, end) in enumerate(pieces):
+                piece = str(self.upload_dir / f"smartcut_{token}_{i}.mp4")
+                piece_files.append(piece)
+                if kind == 'copy':
+                    self._copy_gops(input_path, start, end, piece, settings)
+                    if self._has_leading_pictures(piece):
+                        logger.info(f"Source has open GOPs, which can't be spliced: {input_path}")
+                        return False
+                else:
+                    self._run(
+                        ffmpeg
+                        .input(input_path, ss=start, to=end + 1.0)['v:0']
+                        # Input -to keeps the frame at `end`, which starts the next piece
+                        .filter('trim', end=f"{end - start - KEYFRAME_EPSILON:.6f}")
+                        .output(piece, fps_mode='passthrough', **settings)
+                        .overwrite_output()
+                    )
             
-            # Create concat file
             with open(concat_file, 'w') as f:
-                for temp_file in temp_files:
-                    f.write(f"file '{temp_file}'\n")
+                for piece in piece_files:
+                    escaped = str(Path(piece).resolve()).replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
             
-            # Concatenate segments
-            output_path = str(self.upload_dir / output_filename)
-            (
-                ffmpeg
-                .input(concat_file, format='concat', safe=0)
-                .output(output_path, codec='copy')
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
+            outputs = [ffmpeg.input(concat_file, format='concat', safe=0).video]
+            options = {'vcodec': 'copy', 'avoid_negative_ts': 'make_zero'}
+            if 'video_track_timescale' in settings:
+                options['video_track_timescale'] = settings['video_track_timescale']
+            
+            # Contiguous pieces are one stretch of source audio
+            spans = []
+            for _, start, end in pieces:
+                if spans and abs(spans[-1][1] - start) < 1e-6:
+                    spans[-1][1] = end
+                else:
+                    spans.append([start, end])
+            if audio_options is not None:
+                parts = [ffmpeg.input(input_path, ss=start, to=end).audio for start, end in spans]
+                outputs.append(ffmpeg.concat(*parts, v=0, a=1).node[0] if len(parts) > 1 else parts[0])
+                options.update(audio_options)
+            
+            self._run(
+                ffmpeg.output(*outputs, output_path, **options).overwrite_output(),
+                duration=sum(end - start for start, end in spans),
+                on_progress=on_progress
             )
+        finally:
+            Path(concat_file).unlink(missing_ok=True)
+            for piece in piece_files:
+                Path(piece).unlink(missing_ok=True)
+        
+        # Output times where one piece ends and the next begins
+        splices, position = [], 0.0
+        for _, start, end in pieces[:-1]:
+            position += end - start
+            splices.append(position)
+        return self._decodes_cleanly(output_path, splices)
+    
+    def cut_video(self, input_path: str, segments: List[Dict[str, float]], output_filename: str,
+                  on_progress: Optional[ProgressCallback] = None,
+                  mode: str = 'auto', keyframes: Optional[Sequence[float]] = None,
+                  profile: Optional[str] = None, media: Optional[Dict[str, Any]] = None) -> str:
+        """Cut video into segments and concatenate them.
+        
+        mode 'copy' stream-copies through the concat demuxer (fast, snaps to
+        keyframes), 'reencode' joins the segments in a filter graph (frame
+        accurate), and 'smart' re-encodes only the partial GOPs at segment
+        boundaries and copies the rest (frame accurate, near copy speed).
+        'auto' copies when every segment starts on a keyframe and cuts smart
+        otherwise. Smart cuts fall back to 'reencode' for codecs that can't be
+        spliced and for results that don't decode cleanly at the splices.
+        Whatever gets re-encoded uses the named encoding profile. media is
+        the source's stored metadata record; without it the source is probed.
+        """
+        encoding = self._profile(profile)
+        total = sum(seg['end'] - seg['start'] for seg in segments) or 1.0
+        output_path = str(self.upload_dir / output_filename)
+        
+        if mode in ('auto', 'smart') and keyframes is None:
+            keyframes = self.get_keyframes(input_path)
+        if mode == 'auto':
+            mode = 'copy' if self._starts_on_keyframes(segments, keyframes) else 'smart'
+        
+        has_audio = None
+        if mode in ('smart', 'reencode'):
+            has_audio = media['has_audio'] if media else self._has_audio(input_path)
+        
+        concat_file = None
+        try:
+            if mode == 'smart':
+                settings = self._smart_cut_settings(input_path, encoding, media)
+                if settings is None:
+                    logger.info(f"Source codec can't be spliced, re-encoding instead: {input_path}")
+                else:
+                    audio_options = None
+                    if has_audio:
+                        audio_options = encoding.audio_options()
+                        if media and media.get('audio_sample_rate'):
+                            audio_options['ar'] = media['audio_sample_rate']
+                        if media and media.get('audio_channels'):
+                            audio_options['ac'] = media['audio_channels']
+                    if self._smart_cut(input_path, segments, keyframes, output_path, settings,
+                                       audio_options, on_progress):
+                        logger.info(f"Video cut successfully (smart): {output_path}")
+                        return output_path
+                    logger.warning(f"Smart cut didn't splice cleanly, re-encoding instead: {input_path}")
+                mode = 'reencode'
+            
+            if mode == 'copy':
+                # One demuxer pass over the source: no per-segment processes
+                concat_file = str(self.upload_dir / f"concat_{uuid.uuid4()}.txt")
+                # In and out points are file timestamps, segments are relative to the start
+                offset = (media or probe_media(input_path))['start_time'] or 0.0
+                with open(concat_file, 'w') as f:
+                    escaped = str(Path(input_path).resolve()).replace("'", "'\\''")
+                    for segment in segments:
+                        f.write(f"file '{escaped}'\n")
+                        f.write(f"inpoint {segment['start'] + offset:.6f}\n")
+                        f.write(f"outpoint {segment['end'] + offset:.6f}\n")
+                
+                stream = (
+                    ffmpeg
+                    .input(concat_file, format='concat', safe=0)
+                    .output(output_path, codec='copy', avoid_negative_ts='make_zero')
+                    .overwrite_output()
+                )
+            else:
+                parts = []
+                for segment in segments:
+                    # Input seeking per segment avoids decoding everything before it
+                    source = ffmpeg.input(input_path, ss=segment['start'], to=segment['end'])
+                    parts.append(source.video)
+                    if has_audio:
+                        parts.append(source.audio)
+                
+                joined = ffmpeg.concat(*parts, v=1, a=1 if has_audio else 0).node
+                outputs = [joined[0], joined[1]] if has_audio else [joined[0]]
+                options = {'c:v': 'libx264', 'pix_fmt': 'yuv420p', **encoding.video_options(self.threads)}
+                if has_audio:
+                    options.update(encoding.audio_options())
+                stream = ffmpeg.output(*outputs, output_path, **options).overwrite_output()
             
-            # Cleanup temp files
-            for temp_file in temp_files:
-                os.remove(temp_file)
-            os.remove(concat_file)
+            self._run(stream, duration=total, on_progress=on_progress)
             
-            logger.info(f"Video cut successfully: {output_path}")
+            logger.info(f"Video cut successfully ({mode}): {output_path}")
             return output_path
+        except ffmpeg.Error as e:
+            logger.error(f"FFmpeg error during cut: {e.stderr.decode()}")
+            Path(output_path).unlink(missing_ok=True)
+            raise Exception(f"Failed to cut video: {e.stderr.decode()}")
         except Exception as e:
             logger.error(f"Error cutting video: {e}")
+            Path(output_path).unlink(missing_ok=True)
             raise
+        finally:
+            if concat_file:
+                Path(concat_file).unlink(missing_ok=True)
     
-    def extract_audio(self, video_path: str, output_filename: str) -> str:
-        """Extract audio from video for transcription"""
+    async def stream_audio(self, video_path: str, block_seconds: float = 1.0) -> AsyncIterator[np.ndarray]:
+        """Decode the soundtrack to 16 kHz mono PCM blocks through a pipe (no temp file)"""
+        args = (
+            ffmpeg
+            .input(video_path)
+            .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar='16000', vn=None)
+            .global_args('-nostdin', '-loglevel', 'error')
+            .compile()
+        )
+        process = await asyncio.create_subprocess_exec(
+            *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stderr = asyncio.ensure_future(process.stderr.read())
+        block_size = int(16000 * block_seconds) * 2
+        remainder = b''
         try:
-            output_path = str(self.upload_dir / output_filename)
+            while True:
+                data = await process.stdout.read(block_size)
+                if not data:
+                    break
+                data = remainder + data
+                usable = len(data) - len(data) % 2
+                remainder = data[usable:]
+                if usable:
+                    yield np.frombuffer(data[:usable], dtype='<i2')
             
-            (
-                ffmpeg
-                .input(video_path)
-                .output(output_path, acodec='libmp3lame', ac=1, ar='16000')
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
+            if await process.wait() != 0:
+                message = (await stderr).decode('utf-8', 'replace')
+                logger.error(f"FFmpeg error during audio extraction: {message}")
+                raise Exception(f"Failed to extract audio: {message}")
+        finally:
+            if process.returncode is None:
+                # Consumer stopped early (failure or cancellation)
+                process.kill()
+                await process.wait()
+            stderr.cancel()
+    
+    def render_edit_list(self, input_path: str, segments: List[Dict[str, float]], output_filename: str,
+                         subtitle_path: Optional[str] = None, force_style: Optional[str] = None,
+                         width: Optional[int] = None, profile: Optional[str] = None,
+                         crf: Optional[int] = None, preset: Optional[str] = None,
+                         audio_kbps: Optional[int] = None, has_audio: bool = True,
+                         on_progress: Optional[ProgressCallback] = None) -> str:
+        """Render a whole edit list in one ffmpeg pass.
+        
+        Segments are seeked and joined in a single filter graph, then scaled
+        and overlaid with subtitles (already on the output timeline) before
+        the only encode, so the source is read once and nothing intermediate
+        is written. crf, preset and audio_kbps override the profile's.
+        """
+        encoding = self._profile(profile)
+        output_path = self.upload_dir / output_filename
+        tmp_path = self.upload_dir / f"{output_filename}.part.mp4"
+        try:
+            parts = []
+            for segment in segments:
+                # Input seeking per segment avoids decoding everything before it
+                source = ffmpeg.input(input_path, ss=segment['start'], to=segment['end'])
+                parts.append(source.video)
+                if has_audio:
+                    parts.append(source.audio)
+            
+            joined = ffmpeg.concat(*parts, v=1, a=1 if has_audio else 0).node
+            video = joined[0]
+            if width:
+                video = video.filter('scale', width, -2)
+            if subtitle_path:
+                if force_style:
+                    video = video.filter('subtitles', subtitle_path, force_style=force_style)
+                else:
+                    video = video.filter('subtitles', subtitle_path)
+            
+            options = {
+                'c:v': 'libx264', 'pix_fmt': 'yuv420p', 'movflags': '+faststart',
+                **encoding.video_options(self.threads, crf=crf, preset=preset),
+            }
+            outputs = [video]
+            if has_audio:
+                outputs.append(joined[1])
+                options.update(encoding.audio_options())
+                if audio_kbps:
+                    options['b:a'] = f"{audio_kbps}k"
+            
+            self._run(
+                ffmpeg.output(*outputs, str(tmp_path), **options).overwrite_output(),
+                duration=sum(segment['end'] - segment['start'] for segment in segments),
+                on_progress=on_progress
             )
+            os.replace(tmp_path, output_path)
             
-            logger.info(f"Audio extracted successfully: {output_path}")
-            return output_path
+            logger.info(f"Edit list rendered: {output_path} ({len(segments)} segments)")
+            return str(output_path)
         except ffmpeg.Error as e:
-            logger.error(f"FFmpeg error during audio extraction: {e.stderr.decode()}")
-            raise Exception(f"Failed to extract audio: {e.stderr.decode()}")
+            logger.error(f"FFmpeg error during render: {e.stderr.decode()}")
+            raise Exception(f"Failed to render edit list: {e.stderr.decode()}")
+        finally:
+            tmp_path.unlink(missing_ok=True)
     
-    def add_subtitles(self, video_path: str, subtitle_path: str, output_filename: str) -> str:
+    def add_subtitles(self, video_path: str, subtitle_path: str, output_filename: str,
+                      duration: Optional[float] = None,
+                      on_progress: Optional[ProgressCallback] = None,
+                      profile: Optional[str] = None) -> str:
         """Add subtitles to video"""
+        encoding = self._profile(profile)
         try:
             output_path = str(self.upload_dir / output_filename)
             
-            (
+            self._run(
                 ffmpeg
                 .input(video_path)
-                .output(output_path, vf=f"subtitles={subtitle_path}")
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
+                .output(
+                    output_path, vf=f"subtitles={subtitle_path}", vcodec='libx264', pix_fmt='yuv420p',
+                    **encoding.video_options(self.threads), **encoding.audio_options()
+                )
+                .overwrite_output(),
+                duration=duration,
+                on_progress=on_progress
             )
             
             logger.info(f"Subtitles added successfully: {output_path}")
@@ -162,3 +605,161 @@ class VideoProcessor:
         except Exception as e:
             logger.error(f"Error generating thumbnail: {e}")
             raise
+    
+    @staticmethod
+    def plan_renditions(width: int, height: int, fps: Optional[float] = None,
+                        bitrate: Optional[int] = None) -> List[Dict[str, int]]:
+        """Ladder rungs for a source: standard heights up to its own, never above its bitrate"""
+        heights = [(h, kbps) for h, kbps in RENDITION_LADDER if h <= height]
+        if not heights:
+            # Smaller than the lowest rung: one rendition at the source size
+            heights = [(height - height % 2, RENDITION_LADDER[-1][1])]
+        
+        rungs = []
+        for rung_height, kbps in heights:
+            if fps and fps > 30:
+                kbps = int(kbps * 1.5)
+            if bitrate:
+                # Re-encoding can't add detail; don't spend more bits than the source has
+                kbps = min(kbps, max(200, int(bitrate / 1000)))
+            if rungs and kbps >= rungs[-1]['video_kbps']:
+                # Capped to the same bitrate as the rung above: nothing gained
+                continue
+            rung_width = max(2, round(width * rung_height / height / 2) * 2)
+            rungs.append({'width': rung_width, 'height': rung_height, 'video_kbps': kbps})
+        return rungs
+    
+    def generate_renditions(self, video_path: str, rungs: List[Dict[str, int]], output_dirname: str,
+                            has_audio: bool = True, fps: Optional[float] = None,
+                            duration: Optional[float] = None,
+                            on_progress: Optional[ProgressCallback] = None,
+                            profile: Optional[str] = None) -> str:
+        """Encode the ladder in one decode as fMP4 segments with DASH and HLS manifests.
+        
+        The dash muxer writes manifest.mpd and, with hls_playlist, master.m3u8
+        over the same segments. Keyframes are forced on segment boundaries so
+        players can switch renditions at any segment. Rungs are bitrate
+        targeted, so only the profile's preset and tuning apply.
+        """
+        encoding = self._profile(profile)
+        output_dir = self.upload_dir / output_dirname
+        tmp_dir = self.upload_dir / f"{output_dirname}.part"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        try:
+            source = ffmpeg.input(video_path)
+            split = source.video.filter_multi_output('split', len(rungs))
+            streams = [split[i].filter('scale', rung['width'], rung['height']) for i, rung in enumerate(rungs)]
+            adaptation_sets = 'id=0,streams=v'
+            audio_options = {}
+            if has_audio:
+                streams.append(source.audio)
+                adaptation_sets += ' id=1,streams=a'
+                audio_options = {**encoding.audio_options(), 'ac': 2}
+            
+            gop = max(1, round((fps or 30) * RENDITION_SEGMENT_SECONDS))
+            video_options = encoding.video_options(self.threads)
+            del video_options['crf']
+            options = {
+                'c:v': 'libx264', 'profile:v': 'main', 'pix_fmt': 'yuv420p', **video_options,
+                'g': gop, 'keyint_min': gop, 'sc_threshold': 0,
+                **audio_options,
+                'f': 'dash', 'seg_duration': RENDITION_SEGMENT_SECONDS,
+                'use_template': 1, 'use_timeline': 1, 'adaptation_sets': adaptation_sets,
+                'hls_playlist': 1, 'hls_master_name': 'master.m3u8',
+            }
+            for i, rung in enumerate(rungs):
+                options[f'b:v:{i}'] = f"{rung['video_kbps']}k"
+                options[f'maxrate:v:{i}'] = f"{int(rung['video_kbps'] * 1.2)}k"
+                options[f'bufsize:v:{i}'] = f"{rung['video_kbps'] * 2}k"
+            
+            self._run(
+                ffmpeg.output(*streams, str(tmp_dir / 'manifest.mpd'), **options).overwrite_output(),
+                duration=duration,
+                on_progress=on_progress
+            )
+            shutil.rmtree(output_dir, ignore_errors=True)
+            os.replace(tmp_dir, output_dir)
+            
+            logger.info(f"Renditions generated: {output_dir} ({len(rungs)} rungs)")
+            return str(output_dir)
+        except ffmpeg.Error as e:
+            logger.error(f"FFmpeg error during renditions: {e.stderr.decode()}")
+            raise Exception(f"Failed to generate renditions: {e.stderr.decode()}")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    def generate_proxy(self, video_path: str, output_filename: str, width: int, height: int,
+                       fps: Optional[float] = None, keyframe_interval: float = 0.5,
+                       has_audio: bool = True, duration: Optional[float] = None,
+                       on_progress: Optional[ProgressCallback] = None,
+                       profile: str = 'fast-preview') -> str:
+        """Low-resolution, short-GOP H.264 stand-in for the original.
+        
+        Cheap to decode and seek in the editor, and stream-copy cuts from it
+        land within keyframe_interval of the requested time.
+        """
+        encoding = self._profile(profile)
+        output_path = self.upload_dir / output_filename
+        tmp_path = self.upload_dir / f"{output_filename}.part.mp4"
+        try:
+            source = ffmpeg.input(video_path)
+            streams = [source.video.filter('scale', width, height)]
+            gop = max(1, round((fps or 30) * keyframe_interval))
+            options = {
+                'c:v': 'libx264', 'pix_fmt': 'yuv420p', **encoding.video_options(self.threads),
+                'g': gop, 'keyint_min': gop, 'sc_threshold': 0, 'movflags': '+faststart',
+            }
+            if has_audio:
+                streams.append(source.audio)
+                options.update({**encoding.audio_options(), 'ac': 2})
+            
+            self._run(
+                ffmpeg.output(*streams, str(tmp_path), **options).overwrite_output(),
+                duration=duration,
+                on_progress=on_progress
+            )
+            os.replace(tmp_path, output_path)
+            
+            logger.info(f"Proxy generated: {output_path} ({width}x{height})")
+            return str(output_path)
+        except ffmpeg.Error as e:
+            logger.error(f"FFmpeg error during proxy: {e.stderr.decode()}")
+            raise Exception(f"Failed to generate proxy: {e.stderr.decode()}")
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    
+    def generate_filmstrip(self, video_path: str, layout: FilmstripLayout, output_filename: str,
+                           keyframes_only: bool = False,
+                           on_progress: Optional[ProgressCallback] = None) -> str:
+        """Render a whole sprite sheet in one decode (fps -> scale -> tile).
+        
+        With keyframes_only the decoder skips everything but keyframes, which
+        is much faster and loses little when keyframes are closer together
+        than the tile interval.
+        """
+        output_path = self.upload_dir / output_filename
+        tmp_path = self.upload_dir / f"{output_filename}.part.jpg"
+        try:
+            input_args = {'skip_frame': 'nokey'} if keyframes_only else {}
+            self._run(
+                ffmpeg
+                .input(video_path, **input_args)
+                .video
+                .filter('fps', fps=f"1/{layout.interval:g}")
+                .filter('scale', layout.tile_width, layout.tile_height)
+                .filter('tile', f"{layout.columns}x{layout.rows}")
+                .output(str(tmp_path), vframes=1, **{'q:v': 5})
+                .overwrite_output(),
+                duration=layout.duration,
+                on_progress=on_progress
+            )
+            os.replace(tmp_path, output_path)
+            
+            logger.info(f"Filmstrip generated: {output_path} ({layout.count} tiles)")
+            return str(output_path)
+        except ffmpeg.Error as e:
+            logger.error(f"FFmpeg error during filmstrip: {e.stderr.decode()}")
+            raise Exception(f"Failed to generate filmstrip: {e.stderr.decode()}")
+        finally:
+            tmp_path.unlink(missing_ok=True)
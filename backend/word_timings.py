@@ -0,0 +1,140 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from bson import Binary
+
+
+class WordTimings:
+    """Word-level timings stored as columns: start/end milliseconds and the words.
+
+    Caption documents keep these as two little-endian uint32 blobs and a
+    list of strings instead of one sub-document per word, which is several
+    times smaller in BSON and decodes with a single numpy call.
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, words: List[str]):
+        self.starts = starts
+        self.ends = ends
+        self.words = words
+
+    @classmethod
+    def from_words(cls, words: List[Dict[str, Any]]) -> 'WordTimings':
+        """From [{'start', 'end', 'word'}] in seconds, as returned by the transcriber"""
+        words = [w for w in words if w['word'].strip()]
+        starts = np.rint(np.array([w['start'] for w in words], dtype=np.float64) * 1000)
+        ends = np.rint(np.array([w['end'] for w in words], dtype=np.float64) * 1000)
+        starts = np.maximum(starts, 0).astype('<u4')
+        ends = np.maximum(ends, starts).astype('<u4')
+        return cls(starts, ends, [w['word'].strip() for w in words])
+
+    @classmethod
+    def from_document(cls, doc: Optional[Dict[str, Any]]) -> 'WordTimings':
+        if not doc:
+            return cls(np.zeros(0, dtype='<u4'), np.zeros(0, dtype='<u4'), [])
+        return cls(
+            np.frombuffer(doc['start_ms'], dtype='<u4'),
+            np.frombuffer(doc['end_ms'], dtype='<u4'),
+            doc['text']
+        )
+
+    def to_document(self) -> Dict[str, Any]:
+        return {
+            'start_ms': Binary(self.starts.astype('<u4').tobytes()),
+            'end_ms': Binary(self.ends.astype('<u4').tobytes()),
+            'text': self.words,
+        }
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def to_list(self, shift: float = 0.0) -> List[Dict[str, Any]]:
+        """[{'start', 'end', 'word'}] in seconds, moved by `shift`"""
+        starts = (self.starts / 1000 + shift).tolist()
+        ends = (self.ends / 1000 + shift).tolist()
+        return [{'start': s, 'end': e, 'word': w} for s, e, w in zip(starts, ends, self.words)]
+
+    def between(self, start: float, end: float) -> 'WordTimings':
+        """Words whose midpoint lies in [start, end) seconds"""
+        midpoints = (self.starts.astype(np.int64) + self.ends) / 2000
+        first, last = np.searchsorted(midpoints, (start, end))
+        return WordTimings(self.starts[first:last], self.ends[first:last], self.words[first:last])
+
+    def attach(self, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Copies of segments with their words, for word-level output formats"""
+        if not len(self):
+            return segments
+        return [
+            {**segment, 'words': self.between(segment['start'], segment['end']).to_list()}
+            for segment in segments
+        ]
+
+    def segment(self, max_chars_per_line: int = 42, max_lines: int = 2, max_duration: float = 7.0,
+                max_chars_per_second: float = 17.0, pause: float = 0.7,
+                min_duration: float = 1.0) -> List[Dict[str, Any]]:
+        """Group words into cues.
+
+        A cue ends at a pause of at least `pause` seconds, after a sentence
+        once it fills half a line, or before a word that would break the
+        line/duration limits. Lines wrap at word boundaries. Each cue is
+        then held long enough to read at `max_chars_per_second` (and at
+        least `min_duration`), without running into the next cue.
+        """
+        count = len(self)
+        if not count:
+            return []
+
+        # Plain ints: the loop below is cheaper without numpy scalars
+        starts = self.starts.tolist()
+        ends = self.ends.tolist()
+        pause_ms = pause * 1000
+        max_duration_ms = max_duration * 1000
+        # A cue can't hold more text than is readable in max_duration
+        max_chars = min(max_chars_per_line * max_lines, int(max_chars_per_second * max_duration))
+        breaks_after = (np.append(self.starts[1:].astype(np.int64) - self.ends[:-1], 0) >= pause_ms).tolist()
+
+        cues = []
+        lines: List[List[str]] = [[]]
+        line_length = 0
+        chars = 0
+        first = 0
+        for index, word in enumerate(self.words):
+            if lines[-1]:
+                fits_line = line_length + 1 + len(word) <= max_chars_per_line
+                too_long = (
+                    (not fits_line and len(lines) >= max_lines)
+                    or chars + 1 + len(word) > max_chars
+                    or ends[index] - starts[first] > max_duration_ms
+                )
+                if too_long:
+                    cues.append((first, index, lines))
+                    lines, chars, first = [[]], 0, index
+                elif not fits_line:
+                    lines.append([])
+
+            if lines[-1]:
+                line_length += 1 + len(word)
+            else:
+                line_length = len(word)
+            chars += len(word) + (1 if chars else 0)
+            lines[-1].append(word)
+
+            sentence_end = word[-1] in '.?!' and chars >= max_chars_per_line // 2
+            if breaks_after[index] or sentence_end:
+                cues.append((first, index + 1, lines))
+                lines, chars, first = [[]], 0, index + 1
+
+        if first < count:
+            cues.append((first, count, lines))
+
+        segments = []
+        for position, (first, last, cue_lines) in enumerate(cues):
+            text = '\n'.join(' '.join(line) for line in cue_lines if line)
+            start = starts[first]
+            end = ends[last - 1]
+            # Stretch short cues to a readable duration, up to the next cue
+            readable = start + int(max(len(text) / max_chars_per_second, min_duration) * 1000)
+            if position + 1 < len(cues):
+                readable = min(readable, starts[cues[position + 1][0]])
+            end = max(end, readable)
+            segments.append({'start': start / 1000, 'end': end / 1000, 'text': text})
+        return segments
@@ -187,11 +187,11 @@ const VideoEditorPage = () => {
         trimEnd
       );
 
-      const finalResult = await videoApiService.pollJobStatus(
+      const finalResult = await videoApiService.watchJobStatus(
         jobResult.job_id,
         (status) => {
           setProcessingProgress(status.progress * 100);
-          setProcessingMessage(status.message || 'Processing...');
+          setProcessingMessage(formatJobMessage(status));
         }
       );
 
@@ -215,11 +215,11 @@ const VideoEditorPage = () => {
     try {
       const jobResult = await videoApiService.generateCaptions(selectedVideo.video_id);
 
-      const finalResult = await videoApiService.pollJobStatus(
+      const finalResult = await videoApiService.watchJobStatus(
         jobResult.job_id,
         (status) => {
           setProcessingProgress(status.progress * 100);
-          setProcessingMessage(status.message || 'Processing...');
+          setProcessingMessage(formatJobMessage(status));
         }
       );
 
@@ -233,6 +233,14 @@ const VideoEditorPage = () => {
     }
   };
 
+  const formatJobMessage = (status) => {
+    const message = status.message || 'Processing...';
+    if (status.status !== 'processing' || status.eta == null || !status.speed) {
+      return message;
+    }
+    return `${message} (${status.speed.toFixed(1)}x, ${formatTime(status.eta)} left)`;
+  };
+
   const formatTime = (seconds) => {
     const mins = Math.floor(seconds / 60);
     const secs = Math.floor(seconds % 60);
@@ -80,7 +80,7 @@ const apiService = {
   getStatusChecks: async () => {
     try {
       const response = await apiClient.get('/status');
-      return response.data;
+      return response.data.status_checks;
     } catch (error) {
       throw new Error('Failed to fetch status checks');
     }
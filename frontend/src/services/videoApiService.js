@@ -3,28 +3,74 @@ import axios from 'axios';
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API_BASE = `${BACKEND_URL}/api`;
 
-const videoApiClient = axios.create({
-  baseURL: API_BASE,
-  timeout: 300000, // 5 minutes for large file uploads
-  headers: {
-    'Content-Type': 'multipart/form-data',
-  },
-});
+const MAX_CHUNK_RETRIES = 5;
 
 const videoApiService = {
-  // Upload video
+  // Upload video in resumable chunks; resolves once the server has probed it
   uploadVideo: async (file, onProgress) => {
-    const formData = new FormData();
-    formData.append('file', file);
-    
-    const response = await videoApiClient.post('/video/upload', formData, {
-      onUploadProgress: (progressEvent) => {
-        const percentCompleted = Math.round((progressEvent.loaded * 100) / progressEvent.total);
-        if (onProgress) onProgress(percentCompleted);
-      },
-    });
-    
-    return response.data;
+    const resumeKey = `clipix-upload:${file.name}:${file.size}:${file.lastModified}`;
+    let session = null;
+
+    // Resume an interrupted upload of the same file, if the server still has it
+    const savedUploadId = localStorage.getItem(resumeKey);
+    if (savedUploadId) {
+      try {
+        const response = await axios.get(`${API_BASE}/video/upload/${savedUploadId}`);
+        if (response.data.status === 'uploading') session = response.data;
+      } catch (error) {
+        localStorage.removeItem(resumeKey);
+      }
+    }
+
+    if (!session) {
+      const response = await axios.post(`${API_BASE}/video/upload/init`, {
+        filename: file.name,
+        size: file.size,
+      });
+      session = response.data;
+      localStorage.setItem(resumeKey, session.upload_id);
+    }
+
+    const reportProgress = (bytes) => {
+      if (onProgress) onProgress(Math.round((bytes * 100) / file.size));
+    };
+
+    let offset = session.received;
+    let retries = 0;
+    reportProgress(offset);
+
+    while (offset < file.size) {
+      const chunkStart = offset;
+      const chunkEnd = Math.min(chunkStart + session.chunk_size, file.size);
+
+      try {
+        const response = await axios.put(
+          `${API_BASE}/video/upload/${session.upload_id}`,
+          file.slice(chunkStart, chunkEnd),
+          {
+            params: { offset: chunkStart },
+            headers: { 'Content-Type': 'application/octet-stream' },
+            timeout: 300000,
+            onUploadProgress: (progressEvent) => reportProgress(chunkStart + progressEvent.loaded),
+          }
+        );
+        offset = response.data.received;
+        retries = 0;
+      } catch (error) {
+        if (++retries > MAX_CHUNK_RETRIES) throw error;
+        await new Promise((resolve) => setTimeout(resolve, 1000 * retries));
+
+        // The server keeps whatever arrived before the failure
+        const response = await axios.get(`${API_BASE}/video/upload/${session.upload_id}`);
+        offset = response.data.received;
+      }
+    }
+
+    const finalized = await axios.post(`${API_BASE}/video/upload/${session.upload_id}/finalize`);
+    localStorage.removeItem(resumeKey);
+
+    const job = await videoApiService.watchJobStatus(finalized.data.job_id);
+    return job.result;
   },
 
   // Get video info
@@ -101,6 +147,42 @@ const videoApiService = {
     });
   },
 
+  // Watch job until complete using Server-Sent Events, falling back to polling
+  watchJobStatus: (jobId, onProgress) => {
+    if (typeof EventSource === 'undefined') {
+      return videoApiService.pollJobStatus(jobId, onProgress);
+    }
+
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(`${API_BASE}/job/${jobId}/events`);
+      let settled = false;
+
+      source.addEventListener('status', (event) => {
+        const status = JSON.parse(event.data);
+
+        if (onProgress) onProgress(status);
+
+        if (status.status === 'completed') {
+          settled = true;
+          source.close();
+          resolve(status);
+        } else if (status.status === 'failed') {
+          settled = true;
+          source.close();
+          reject(new Error(status.error || 'Job failed'));
+        }
+      });
+
+      source.onerror = () => {
+        if (settled) return;
+        // Stream unavailable (proxy, old server); fall back to polling
+        settled = true;
+        source.close();
+        videoApiService.pollJobStatus(jobId, onProgress).then(resolve, reject);
+      };
+    });
+  },
+
   // Download processed video
   getDownloadUrl: (resultId) => {
     return `${API_BASE}/video/download/${resultId}`;
@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from audio_fingerprint import HOP_SECONDS, HOP_SIZE, AudioFingerprint, FingerprintBuilder, matching_ranges
+from transcription import SAMPLE_RATE
+from transcript_cache import TranscriptCache
+
+
+def speech_like(seconds: float, seed: int = 0) -> np.ndarray:
+    """80 ms bursts of random tones, some of them silent"""
+    rng = np.random.default_rng(seed)
+    burst = int(0.08 * SAMPLE_RATE)
+    t = np.arange(burst) / SAMPLE_RATE
+    samples = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    for first in range(0, len(samples) - burst + 1, burst):
+        if rng.random() < 0.15:
+            continue
+        tones = sum(np.sin(2 * np.pi * f * t + rng.uniform(0, 2 * np.pi)) for f in rng.uniform(150, 3500, 4))
+        samples[first:first + burst] = tones * rng.uniform(0.1, 1) * 3000
+    samples += rng.normal(0, 50, len(samples))
+    return samples.astype('<i2')
+
+
+SOURCE = speech_like(60)
+
+
+def test_streamed_fingerprint_matches_the_whole_one():
+    builder = FingerprintBuilder()
+    for first in range(0, len(SOURCE), 12345):
+        builder.feed(SOURCE[first:first + 12345])
+    streamed = builder.result()
+    whole = AudioFingerprint.from_samples(SOURCE)
+
+    assert streamed.content_hash == whole.content_hash
+    assert np.array_equal(streamed.hashes, whole.hashes)
+    assert streamed.duration == pytest.approx(60.0)
+
+
+def test_matching_ranges_recovers_a_known_offset():
+    source = AudioFingerprint.from_samples(SOURCE).hashes
+    # A clip starting on the hop grid, 20 s in
+    offset = int(20 / HOP_SECONDS)
+    clip = AudioFingerprint.from_samples(SOURCE[offset * HOP_SIZE:offset * HOP_SIZE + 15 * SAMPLE_RATE]).hashes
+
+    assert matching_ranges(clip, source, offset) == [(0, len(clip))]
+    # Nothing lines up one block away, or against other audio
+    assert matching_ranges(clip, source, offset + 64) == []
+    assert matching_ranges(clip, AudioFingerprint.from_samples(speech_like(60, seed=1)).hashes, offset) == []
+
+
+def test_matching_ranges_off_the_hop_grid():
+    source = AudioFingerprint.from_samples(SOURCE).hashes
+    # Trimmed at an arbitrary sample: hashes are only close, not equal
+    first = int(12.3456 * SAMPLE_RATE)
+    clip = AudioFingerprint.from_samples(SOURCE[first:first + 15 * SAMPLE_RATE]).hashes
+    offset = round(first / HOP_SIZE)
+
+    assert matching_ranges(clip, source, offset) == [(0, len(clip))]
+
+
+def test_matching_ranges_stops_where_the_audio_differs():
+    source = AudioFingerprint.from_samples(SOURCE).hashes
+    spliced = SOURCE.copy()
+    spliced[30 * SAMPLE_RATE:40 * SAMPLE_RATE] = speech_like(10, seed=2)
+    ranges = matching_ranges(AudioFingerprint.from_samples(spliced).hashes, source, 0)
+
+    assert len(ranges) == 2
+    assert ranges[0][0] == 0 and ranges[0][1] * HOP_SECONDS == pytest.approx(30, abs=2.1)
+    assert ranges[1][0] * HOP_SECONDS == pytest.approx(40, abs=2.1)
+
+
+class FakeCollection:
+    """The collection methods the transcript cache uses when it doesn't evict"""
+
+    def __init__(self):
+        self.docs = []
+
+    def _matches(self, doc, query):
+        for key, condition in query.items():
+            if isinstance(condition, dict):
+                if doc.get(key) not in condition['$in']:
+                    return False
+            elif doc.get(key) != condition:
+                return False
+        return True
+
+    async def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    async def insert_many(self, docs, ordered=True):
+        self.docs += [dict(doc) for doc in docs]
+
+    async def count_documents(self, query):
+        return sum(self._matches(doc, query) for doc in self.docs)
+
+    async def find_one(self, query, projection=None):
+        return next((dict(doc) for doc in self.docs if self._matches(doc, query)), None)
+
+    async def find(self, query, projection=None):
+        for doc in [doc for doc in self.docs if self._matches(doc, query)]:
+            yield dict(doc)
+
+    async def update_many(self, query, update):
+        pass
+
+
+def test_trimmed_clip_is_found_in_the_cache():
+    db = SimpleNamespace(transcripts=FakeCollection(), transcript_anchors=FakeCollection())
+    cache = TranscriptCache(db, ttl_days=0)
+    captions = {
+        'language': 'en', 'text': 'a b',
+        'segments': [{'start': 10.0, 'end': 20.0, 'text': 'a'}, {'start': 30.0, 'end': 40.0, 'text': 'b'}],
+        'words': [],
+    }
+    first = int(12.3456 * SAMPLE_RATE)
+    clip = SOURCE[first:first + 30 * SAMPLE_RATE]
+
+    async def scenario():
+        await cache.store(AudioFingerprint.from_samples(SOURCE), 'en', 'model', captions)
+        fingerprint = AudioFingerprint.from_samples(clip)
+        found = await cache.find_known(fingerprint.hashes, fingerprint.duration, 'en', 'model')
+        missed = await cache.find_known(fingerprint.hashes, fingerprint.duration, 'en', 'other-model')
+        return found, missed
+
+    found, missed = asyncio.run(scenario())
+    anchors = db.transcript_anchors.docs
+    # About one anchor per anchor_modulus frames
+    frames = len(SOURCE) / HOP_SIZE
+    assert frames / cache.anchor_modulus / 2 < len(anchors) < frames / cache.anchor_modulus * 2
+
+    assert missed == []
+    assert len(found) == 1
+    assert found[0]['start'] == 0.0
+    assert found[0]['end'] == pytest.approx(30.0)
+    # Moved onto the clip's timeline
+    shift = 12.3456
+    assert [s['text'] for s in found[0]['segments']] == ['a', 'b']
+    assert found[0]['segments'][1]['start'] == pytest.approx(30.0 - shift, abs=HOP_SECONDS)
@@ -0,0 +1,51 @@
+import pytest
+
+from edit_list import EditListError, map_cues, normalize_segments
+
+
+def test_segments_are_clamped_and_rounded():
+    segments = normalize_segments([{'start': -1.0, 'end': 2.00049}, {'start': 8.12345, 'end': 99.0}], duration=10.0)
+    assert segments == [{'start': 0.0, 'end': 2.0}, {'start': 8.123, 'end': 10.0}]
+
+
+def test_repeated_and_backward_segments_keep_their_order():
+    edits = [{'start': 5.0, 'end': 6.0}, {'start': 1.0, 'end': 2.0}, {'start': 5.0, 'end': 6.0}]
+    assert normalize_segments(edits, duration=10.0) == edits
+
+
+@pytest.mark.parametrize('segments, message', [
+    ([], 'at least one segment'),
+    ([{'start': 0.0, 'end': 1.0}, {'start': 3.0, 'end': 3.01}], 'Segment 1 is empty'),
+    ([{'start': 2.0, 'end': 1.0}], 'Segment 0 is empty'),
+    ([{'start': 10.0, 'end': 11.0}], 'Segment 0 starts after the end'),
+])
+def test_invalid_segments(segments, message):
+    with pytest.raises(EditListError, match=message):
+        normalize_segments(segments, duration=10.0)
+
+
+def test_cue_across_a_cut_is_clipped_on_both_sides():
+    cues = [{'start': 1.0, 'end': 5.0, 'text': 'long'}, {'start': 3.0, 'end': 3.5, 'text': 'cut away'}]
+    segments = [{'start': 0.0, 'end': 2.0}, {'start': 4.0, 'end': 6.0}]
+
+    assert map_cues(cues, segments) == [
+        {'start': 1.0, 'end': 2.0, 'text': 'long'},
+        {'start': 2.0, 'end': 3.0, 'text': 'long'},
+    ]
+
+
+def test_cues_follow_repeated_and_backward_segments():
+    cues = [{'start': 1.0, 'end': 1.5, 'text': 'one'}, {'start': 5.0, 'end': 5.5, 'text': 'five'}]
+    segments = [{'start': 4.0, 'end': 6.0}, {'start': 0.0, 'end': 2.0}, {'start': 4.0, 'end': 6.0}]
+
+    assert map_cues(cues, segments) == [
+        {'start': 1.0, 'end': 1.5, 'text': 'five'},
+        {'start': 3.0, 'end': 3.5, 'text': 'one'},
+        {'start': 5.0, 'end': 5.5, 'text': 'five'},
+    ]
+
+
+def test_cues_touching_a_segment_edge_are_left_out():
+    cues = [{'start': 0.0, 'end': 2.0, 'text': 'before'}, {'start': 4.0, 'end': 5.0, 'text': 'after'}]
+    assert map_cues(cues, [{'start': 2.0, 'end': 4.0}]) == []
+    assert map_cues([], [{'start': 2.0, 'end': 4.0}]) == []
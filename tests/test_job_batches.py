@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from job_batches import batch_progress, finished_items
+from job_store import InMemoryJobStore
+
+
+def item(index, job_id=None, error=None):
+    entry = {'index': index, 'video_id': f'v{index}', 'operation': 'trim'}
+    if job_id:
+        entry['job_id'] = job_id
+    if error:
+        entry['error'] = error
+    return entry
+
+
+def job(job_id, status, progress=None, error=None):
+    return {'job_id': job_id, 'job_type': 'trim', 'status': status, 'progress': progress, 'error': error}
+
+
+def test_mixed_completed_failed_and_missing_jobs():
+    items = [item(0, 'a'), item(1, 'b'), item(2, 'gone'), item(3, error='Video not found')]
+    jobs = {'a': job('a', 'completed', 1.0), 'b': job('b', 'failed', 0.4, 'broken')}
+
+    progress = batch_progress(items, jobs)
+
+    assert progress['status'] == 'partial'
+    assert progress['progress'] == 1.0
+    assert (progress['total'], progress['finished']) == (4, 4)
+    assert progress['counts'] == {'completed': 1, 'failed': 2, 'expired': 1}
+    states = progress['items']
+    assert [state['status'] for state in states] == ['completed', 'failed', 'expired', 'failed']
+    assert states[1]['error'] == 'broken'
+    # Evicted after the job TTL: the id is kept, the outcome isn't known
+    assert (states[2]['job_id'], states[2]['progress']) == ('gone', None)
+    # Rejected at submit: no job at all
+    assert states[3] == {
+        'index': 3, 'video_id': 'v3', 'operation': 'trim',
+        'job_id': None, 'status': 'failed', 'progress': 1.0, 'error': 'Video not found',
+    }
+
+
+def test_unfinished_jobs_keep_the_batch_running():
+    items = [item(0, 'a'), item(1, 'b'), item(2, 'c'), item(3, 'd')]
+    jobs = {
+        'a': job('a', 'completed', 1.0), 'b': job('b', 'processing', 0.5),
+        'c': job('c', 'pending', 0.0), 'd': job('d', 'failed', 0.2),
+    }
+
+    progress = batch_progress(items, jobs)
+    assert progress['status'] == 'processing'
+    # Finished items count in full, running ones by their own progress
+    assert progress['progress'] == pytest.approx((1.0 + 0.5 + 0.0 + 1.0) / 4)
+    assert progress['finished'] == 2
+
+
+@pytest.mark.parametrize('statuses, expected', [
+    (['pending', 'pending'], 'pending'),
+    (['pending', 'completed'], 'processing'),
+    (['pending', 'processing'], 'processing'),
+    (['completed', 'completed'], 'completed'),
+    (['failed', 'failed'], 'failed'),
+    (['completed', 'failed'], 'partial'),
+])
+def test_batch_status(statuses, expected):
+    items = [item(i, str(i)) for i in range(len(statuses))]
+    jobs = {str(i): job(str(i), status, 1.0 if status in ('completed', 'failed') else 0.0)
+            for i, status in enumerate(statuses)}
+    assert batch_progress(items, jobs)['status'] == expected
+
+
+def test_every_item_rejected():
+    progress = batch_progress([item(0, error='Video not found'), item(1, error='Video not found')], {})
+    assert progress['status'] == 'failed'
+    assert progress['progress'] == 1.0
+
+
+def test_empty_batch():
+    assert batch_progress([], {})['progress'] == 1.0
+
+
+def test_finished_items_yield_in_completion_order():
+    async def scenario():
+        store = InMemoryJobStore()
+        first = await store.create('trim', {})
+        second = await store.create('trim', {})
+        items = [item(0, first['job_id']), item(1, second['job_id']), item(2, error='Video not found')]
+
+        async def connected():
+            return False
+
+        async def finish():
+            await asyncio.sleep(0.01)
+            await store.complete(second['job_id'], {'ok': True}, 'Done')
+            await asyncio.sleep(0.01)
+            await store.fail(first['job_id'], 'broken', None)
+
+        finishing = asyncio.create_task(finish())
+        states = [state async for state in finished_items(store, items, connected, resync_interval=5.0)]
+        await finishing
+        return states
+
+    states = asyncio.run(scenario())
+    # Rejected items first; the listener wakes the loop long before the resync interval
+    assert [(state['index'], state['status']) for state in states] == [(2, 'failed'), (1, 'completed'), (0, 'failed')]
@@ -0,0 +1,211 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from job_store import InMemoryJobStore, JobScheduler, NonRetryableJobError
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_claim_order():
+    async def scenario():
+        store = InMemoryJobStore()
+        ids = {}
+        for name, priority, turn in [('old', 0, 0), ('urgent', 5, 0), ('later_turn', 0, 2),
+                                     ('new', 0, 0), ('urgent_later_turn', 5, 1)]:
+            job = await store.create('trim', {'name': name}, priority=priority, turn=turn)
+            ids[job['job_id']] = name
+        await store.create('caption', {'name': 'unhandled'})
+
+        claimed = []
+        while (job := await store.claim('worker', 60, ['trim'])) is not None:
+            claimed.append(ids[job['job_id']])
+            assert job['status'] == 'processing'
+            assert job['attempts'] == 1
+        return claimed
+
+    # Highest priority, then lowest turn, then oldest; other job types are left alone
+    assert run(scenario()) == ['urgent', 'urgent_later_turn', 'old', 'new', 'later_turn']
+
+
+def test_leased_job_is_not_claimed_twice():
+    async def scenario():
+        store = InMemoryJobStore()
+        await store.create('trim', {})
+        first = await store.claim('a', 60, ['trim'])
+        second = await store.claim('b', 60, ['trim'])
+        return first, second
+
+    first, second = run(scenario())
+    assert first is not None
+    assert second is None
+
+
+def test_expired_lease_is_reclaimed():
+    async def scenario():
+        store = InMemoryJobStore()
+        job = await store.create('trim', {})
+        await store.claim('crashed', 60, ['trim'])
+        await store.update(job['job_id'], lease_expires_at=_now() - timedelta(seconds=1))
+
+        reclaimed = await store.claim('survivor', 60, ['trim'])
+        # The first worker finds out at its next heartbeat
+        still_owned = await store.heartbeat(job['job_id'], 'crashed', 60)
+        return reclaimed, still_owned
+
+    reclaimed, still_owned = run(scenario())
+    assert reclaimed['lease_owner'] == 'survivor'
+    assert reclaimed['attempts'] == 2
+    assert still_owned is False
+
+
+def test_lease_lost_on_last_attempt_fails_the_job():
+    async def scenario():
+        store = InMemoryJobStore()
+        scheduler = JobScheduler(store)
+        calls = []
+
+        async def handler(job_id):
+            calls.append(job_id)
+
+        scheduler.register('trim', handler)
+        job = await store.create('trim', {}, max_attempts=1)
+        await store.claim('crashed', 60, ['trim'])
+        await store.update(job['job_id'], lease_expires_at=_now() - timedelta(seconds=1))
+
+        await scheduler._run_job(await store.claim('survivor', 60, ['trim']))
+        return await store.get(job['job_id']), calls
+
+    job, calls = run(scenario())
+    assert job['status'] == 'failed'
+    assert job['error'] == 'Worker lost during processing'
+    assert calls == []
+
+
+def test_retries_back_off_until_the_job_fails():
+    async def scenario():
+        store = InMemoryJobStore()
+        scheduler = JobScheduler(store, retry_backoff=10.0)
+        calls = []
+
+        async def handler(job_id, **payload):
+            calls.append(payload)
+            raise ConnectionError("upstream unavailable")
+
+        scheduler.register('trim', handler)
+        job = await scheduler.submit('trim', {'video_id': 'v'}, max_attempts=3)
+
+        delays = []
+        while (claimed := await store.claim(scheduler.worker_id, 60, ['trim'])) is not None:
+            await scheduler._run_job(claimed)
+            state = await store.get(job['job_id'])
+            if state['status'] != 'pending':
+                break
+            delays.append((state['available_at'] - state['updated_at']).total_seconds())
+            # Not runnable until the backoff passes
+            assert await store.claim(scheduler.worker_id, 60, ['trim']) is None
+            await store.update(job['job_id'], available_at=_now())
+        return await store.get(job['job_id']), calls, delays
+
+    job, calls, delays = run(scenario())
+    assert len(calls) == 3
+    assert calls[0] == {'video_id': 'v'}
+    # retry_backoff * 2 ** (attempt - 1)
+    assert delays == pytest.approx([10.0, 20.0], abs=0.5)
+    assert job['status'] == 'failed'
+    assert job['attempts'] == 3
+    assert job['error'] == 'upstream unavailable'
+
+
+def test_non_retryable_error_fails_at_once():
+    async def scenario():
+        store = InMemoryJobStore()
+        scheduler = JobScheduler(store, retry_backoff=0.0)
+        calls = []
+
+        async def handler(job_id):
+            calls.append(job_id)
+            raise NonRetryableJobError("Video not found")
+
+        scheduler.register('trim', handler)
+        job = await scheduler.submit('trim', {}, max_attempts=3)
+        await scheduler._run_job(await store.claim(scheduler.worker_id, 60, ['trim']))
+        return await store.get(job['job_id']), calls, await store.claim(scheduler.worker_id, 60, ['trim'])
+
+    job, calls, next_job = run(scenario())
+    assert len(calls) == 1
+    assert job['status'] == 'failed'
+    assert job['message'] == 'Failed: Video not found'
+    assert next_job is None
+
+
+def test_workers_run_submitted_jobs():
+    async def scenario():
+        store = InMemoryJobStore()
+        scheduler = JobScheduler(store, concurrency=2, poll_interval=0.01, retry_backoff=0.0)
+        attempts = []
+
+        async def handler(job_id, value):
+            attempts.append(value)
+            if attempts.count(value) == 1 and value == 'flaky':
+                raise ConnectionError("try again")
+            return {'value': value}
+
+        scheduler.register('trim', handler, 'Trimmed')
+        scheduler.start()
+        try:
+            jobs = [await scheduler.submit('trim', {'value': value}) for value in ('steady', 'flaky')]
+            for _ in range(200):
+                states = [await store.get(job['job_id']) for job in jobs]
+                if all(state['status'] == 'completed' for state in states):
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await scheduler.stop()
+        return states, attempts
+
+    states, attempts = run(scenario())
+    assert [state['result'] for state in states] == [{'value': 'steady'}, {'value': 'flaky'}]
+    assert all(state['message'] == 'Trimmed' and state['progress'] == 1.0 for state in states)
+    assert sorted(attempts) == ['flaky', 'flaky', 'steady']
+
+
+def test_finished_jobs_are_evicted_after_their_ttl():
+    async def scenario():
+        store = InMemoryJobStore(ttl_seconds=3600)
+        done = await store.create('trim', {})
+        failed = await store.create('trim', {})
+        running = await store.create('trim', {})
+        await store.complete(done['job_id'], {'ok': True}, 'Done')
+        await store.fail(failed['job_id'], 'broken', None)
+
+        kept = await store.evict_finished()
+        for job in (done, failed):
+            await store.update(job['job_id'], expires_at=_now() - timedelta(seconds=1))
+        evicted = await store.evict_finished()
+        return kept, evicted, [await store.get(job['job_id']) for job in (done, failed, running)]
+
+    kept, evicted, (done, failed, running) = run(scenario())
+    assert kept == 0
+    assert evicted == 2
+    assert done is None and failed is None
+    # Unfinished jobs have no expiry
+    assert running['status'] == 'pending'
+
+
+def test_finished_job_expires_ttl_seconds_after_finishing():
+    async def scenario():
+        store = InMemoryJobStore(ttl_seconds=3600)
+        job = await store.create('trim', {})
+        await store.complete(job['job_id'], None, 'Done')
+        return await store.get(job['job_id'])
+
+    job = run(scenario())
+    assert (job['expires_at'] - job['finished_at']).total_seconds() == pytest.approx(3600)
@@ -0,0 +1,124 @@
+import pytest
+
+from media_metadata import normalize_probe, parse_rational
+
+
+def video_stream(**fields):
+    return {
+        'index': 0, 'codec_type': 'video', 'codec_name': 'h264', 'profile': 'High',
+        'width': 1920, 'height': 1080, 'pix_fmt': 'yuv420p', 'time_base': '1/12800',
+        'r_frame_rate': '30000/1001', 'avg_frame_rate': '30000/1001', 'duration': '10.0',
+        **fields,
+    }
+
+
+def audio_stream(**fields):
+    return {
+        'index': 1, 'codec_type': 'audio', 'codec_name': 'aac', 'sample_rate': '48000',
+        'channels': 2, 'channel_layout': 'stereo', 'duration': '10.0', 'tags': {'language': 'eng'},
+        **fields,
+    }
+
+
+def probe(*streams, **fmt):
+    return {'streams': list(streams), 'format': {'format_name': 'mov,mp4', 'start_time': '0.000000', **fmt}}
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('30000/1001', 30000 / 1001),
+    ('25/1', 25.0),
+    ('25', 25.0),
+    (24, 24.0),
+    ('0/0', None),
+    ('1/0', None),
+    ('0/1', None),
+    ('N/A', None),
+    ('', None),
+    (None, None),
+    ('abc', None),
+    ('-25/1', None),
+])
+def test_parse_rational(value, expected):
+    assert parse_rational(value) == (pytest.approx(expected) if expected else None)
+
+
+def test_normalize_a_typical_probe():
+    record = normalize_probe(probe(video_stream(), audio_stream(), duration='10.0', size='5000000',
+                                   bit_rate='4000000'))
+
+    assert record['duration'] == 10.0
+    assert record['start_time'] == 0.0
+    assert (record['width'], record['height'], record['rotation']) == (1920, 1080, 0)
+    assert record['fps'] == pytest.approx(29.97, abs=0.01)
+    assert record['vfr'] is False
+    assert (record['file_size'], record['bitrate']) == (5000000, 4000000)
+    assert record['has_audio'] is True
+    assert (record['audio_codec'], record['audio_channels'], record['audio_sample_rate']) == ('aac', 2, 48000)
+    assert [stream['type'] for stream in record['streams']] == ['video', 'audio']
+    assert record['streams'][1]['language'] == 'eng'
+
+
+def test_undefined_frame_rates():
+    # Some streams only know one of the two rates
+    record = normalize_probe(probe(video_stream(r_frame_rate='25/1', avg_frame_rate='0/0')))
+    assert record['fps'] == 25.0
+    assert record['vfr'] is False
+
+    record = normalize_probe(probe(video_stream(r_frame_rate='N/A', avg_frame_rate='0/0')))
+    assert record['fps'] is None
+    assert record['vfr'] is False
+
+
+def test_variable_frame_rate():
+    record = normalize_probe(probe(video_stream(r_frame_rate='60/1', avg_frame_rate='2997/100')))
+    assert record['fps'] == pytest.approx(29.97)
+    assert record['vfr'] is True
+
+
+def test_missing_size_and_bit_rate_are_derived(tmp_path):
+    path = tmp_path / 'clip.mkv'
+    path.write_bytes(b'x' * 1000)
+
+    # MKV/WebM often leave both out of the format section
+    record = normalize_probe(probe(video_stream(), duration='8.0'), str(path))
+    assert record['file_size'] == 1000
+    assert record['bitrate'] == 1000
+
+    record = normalize_probe(probe(video_stream(duration=None)))
+    assert record['duration'] is None
+    assert (record['file_size'], record['bitrate']) == (None, None)
+    assert record['start_time'] == 0.0
+
+
+def test_duration_falls_back_to_the_streams():
+    record = normalize_probe(probe(video_stream(duration='N/A'), audio_stream(duration='7.5'), duration='N/A'))
+    assert record['duration'] == 7.5
+
+
+def test_audio_only_input_is_rejected():
+    with pytest.raises(ValueError, match='No video stream'):
+        normalize_probe(probe(audio_stream()))
+
+    # Cover art isn't a picture to edit
+    cover = video_stream(disposition={'attached_pic': 1})
+    with pytest.raises(ValueError, match='No video stream'):
+        normalize_probe(probe(audio_stream(), cover))
+
+
+def test_rotation_from_tags_and_side_data():
+    record = normalize_probe(probe(video_stream(tags={'rotate': '90'})))
+    assert record['rotation'] == 90
+    # Displayed orientation; the coded size is kept separately
+    assert (record['width'], record['height']) == (1080, 1920)
+    assert (record['coded_width'], record['coded_height']) == (1920, 1080)
+
+    # Display matrix rotation is counter-clockwise
+    record = normalize_probe(probe(video_stream(side_data_list=[{'side_data_type': 'Display Matrix',
+                                                                 'rotation': -90}])))
+    assert record['rotation'] == 90
+    record = normalize_probe(probe(video_stream(side_data_list=[{'rotation': 90}])))
+    assert record['rotation'] == 270
+    assert (record['width'], record['height']) == (1080, 1920)
+    record = normalize_probe(probe(video_stream(side_data_list=[{'rotation': 180}])))
+    assert record['rotation'] == 180
+    assert (record['width'], record['height']) == (1920, 1080)
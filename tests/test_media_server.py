@@ -0,0 +1,163 @@
+import asyncio
+import re
+
+import pytest
+from starlette.requests import Request
+
+from media_server import MAX_RANGES, MediaFileResponse, parse_range_header
+
+DATA = bytes(range(256)) * 4
+
+
+def serve(path, headers=None, method='GET'):
+    """Run a MediaFileResponse; returns (status, headers, body)"""
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': '/',
+        'headers': [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()],
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(MediaFileResponse(path, Request(scope))(scope, receive, send))
+    start = messages[0]
+    response_headers = {key.decode(): value.decode() for key, value in start['headers']}
+    return start['status'], response_headers, b''.join(m.get('body', b'') for m in messages[1:])
+
+
+@pytest.fixture
+def media(tmp_path):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(DATA)
+    return path
+
+
+def test_parse_single_and_suffix_ranges():
+    assert parse_range_header('bytes=0-99', 1000) == [(0, 99)]
+    assert parse_range_header('bytes=900-', 1000) == [(900, 999)]
+    assert parse_range_header('bytes=-100', 1000) == [(900, 999)]
+    # Clamped to the file
+    assert parse_range_header('bytes=950-2000', 1000) == [(950, 999)]
+    assert parse_range_header('bytes=-5000', 1000) == [(0, 999)]
+
+
+def test_parse_merges_overlapping_and_adjacent_ranges():
+    assert parse_range_header('bytes=500-599, 0-99, 50-149, 150-199', 1000) == [(0, 199), (500, 599)]
+
+
+def test_parse_malformed_and_unsatisfiable():
+    for header in ('bytes=abc', 'bytes=5', 'bytes=10-5', 'items=0-1', 'bytes='):
+        assert parse_range_header(header, 1000) is None
+    assert parse_range_header('bytes=1000-1100', 1000) == []
+    assert parse_range_header('bytes=-0', 1000) == []
+
+
+def test_parse_too_many_ranges_serves_the_whole_file():
+    within = ','.join(f'{i * 10}-{i * 10 + 1}' for i in range(MAX_RANGES))
+    above = ','.join(f'{i * 10}-{i * 10 + 1}' for i in range(MAX_RANGES + 1))
+    assert len(parse_range_header(f'bytes={within}', 1000)) == MAX_RANGES
+    assert parse_range_header(f'bytes={above}', 1000) is None
+
+
+def test_full_and_single_range_responses(media):
+    status, headers, body = serve(media)
+    assert status == 200
+    assert body == DATA
+    assert headers['content-length'] == str(len(DATA))
+    assert headers['content-type'] == 'video/mp4'
+
+    status, headers, body = serve(media, {'Range': 'bytes=100-199'})
+    assert status == 206
+    assert body == DATA[100:200]
+    assert headers['content-range'] == f'bytes 100-199/{len(DATA)}'
+    assert headers['content-length'] == '100'
+
+
+def test_unsatisfiable_range(media):
+    status, headers, body = serve(media, {'Range': f'bytes={len(DATA)}-'})
+    assert status == 416
+    assert headers['content-range'] == f'bytes */{len(DATA)}'
+    assert body == b''
+
+
+def test_multipart_content_length_matches_the_body(media):
+    status, headers, body = serve(media, {'Range': 'bytes=0-9, 100-109, -5'})
+
+    assert status == 206
+    assert int(headers['content-length']) == len(body)
+    boundary = re.match(r'multipart/byteranges; boundary=(\w+)', headers['content-type']).group(1)
+    parts = body.split(f'--{boundary}'.encode())
+    # Preamble, three parts, closing
+    assert len(parts) == 5
+    assert parts[1].endswith(b'\r\n\r\n' + DATA[0:10] + b'\r\n')
+    assert b'Content-Range: bytes 100-109/1024' in parts[2]
+    assert parts[3].endswith(DATA[-5:] + b'\r\n')
+
+    # HEAD announces the same length without a body
+    status, head_headers, head_body = serve(media, {'Range': 'bytes=0-9, 100-109, -5'}, method='HEAD')
+    assert head_body == b''
+    assert head_headers['content-length'] == headers['content-length']
+
+
+def test_if_none_match(media):
+    _, headers, _ = serve(media)
+    etag = headers['etag']
+
+    status, _, body = serve(media, {'If-None-Match': etag})
+    assert status == 304
+    assert body == b''
+    assert serve(media, {'If-None-Match': f'"other", W/{etag}'})[0] == 304
+    assert serve(media, {'If-None-Match': '*'})[0] == 304
+    assert serve(media, {'If-None-Match': '"other"'})[0] == 200
+
+
+def test_if_range(media):
+    _, headers, _ = serve(media)
+    etag, last_modified = headers['etag'], headers['last-modified']
+
+    assert serve(media, {'Range': 'bytes=0-9', 'If-Range': etag})[0] == 206
+    assert serve(media, {'Range': 'bytes=0-9', 'If-Range': last_modified})[0] == 206
+    # A changed file (or a weak validator) gets the whole of it
+    status, _, body = serve(media, {'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+    assert status == 200
+    assert body == DATA
+    assert serve(media, {'Range': 'bytes=0-9', 'If-Range': f'W/{etag}'})[0] == 200
+    assert serve(media, {'Range': 'bytes=0-9', 'If-Range': 'Thu, 01 Jan 1970 00:00:00 GMT'})[0] == 200
+
+
+def test_headers_set_on_the_response_are_sent(media):
+    scope = {'type': 'http', 'method': 'GET', 'path': '/', 'headers': []}
+    response = MediaFileResponse(media, Request(scope))
+    response.headers['x-extra'] = 'yes'
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(response(scope, None, send))
+    headers = dict(messages[0]['headers'])
+    assert headers[b'x-extra'] == b'yes'
+    assert headers[b'content-length'] == str(len(DATA)).encode()
+
+
+def test_zero_copy_send(media):
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': '/', 'headers': [(b'range', b'bytes=10-19')],
+        'extensions': {'http.response.zerocopysend': {}},
+    }
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(MediaFileResponse(media, Request(scope))(scope, None, send))
+    assert messages[0]['status'] == 206
+    assert messages[1]['offset'] == 10 and messages[1]['count'] == 10
+    # The server is done with the descriptor once send returns
+    assert messages[1]['file'].closed
@@ -0,0 +1,157 @@
+import asyncio
+import json
+from functools import cmp_to_key
+
+import pytest
+
+from pagination import CursorError, KeysetPage
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self.closed = False
+
+    def sort(self, keys):
+        def compare(a, b):
+            for field, direction in keys:
+                if a[field] != b[field]:
+                    return direction if a[field] > b[field] else -direction
+            return 0
+        self.docs = sorted(self.docs, key=cmp_to_key(compare))
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeCollection:
+    """Evaluates the subset of the query language KeysetPage generates"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    @classmethod
+    def matches(cls, doc, query):
+        for key, condition in query.items():
+            if key == '$and':
+                if not all(cls.matches(doc, part) for part in condition):
+                    return False
+            elif key == '$or':
+                if not any(cls.matches(doc, part) for part in condition):
+                    return False
+            elif isinstance(condition, dict):
+                (operator, value), = condition.items()
+                if not {'$lt': doc[key] < value, '$gt': doc[key] > value}[operator]:
+                    return False
+            elif doc[key] != condition:
+                return False
+        return True
+
+    def find(self, query, projection):
+        return FakeCursor([dict(doc) for doc in self.docs if self.matches(doc, query)])
+
+
+def read_page(page, collection, filters=None):
+    async def collect():
+        return ''.join([chunk async for chunk in page.stream(page.find(collection, filters or {}, {}), 'items')])
+    return json.loads(asyncio.run(collect()))
+
+
+def read_all(collection, descending, limit, filters=None):
+    pages, cursor = [], None
+    while True:
+        page = read_page(KeysetPage('size', 'id', descending=descending, limit=limit, cursor=cursor),
+                         collection, filters)
+        pages.append([doc['id'] for doc in page['items']])
+        assert page['count'] == len(page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+# Runs of equal sort values, longer than a page, with ids out of insertion order
+DOCS = [
+    {'id': f'{i:02d}', 'size': size, 'kind': 'even' if i % 2 == 0 else 'odd'}
+    for i, size in zip([7, 3, 11, 0, 5, 9, 1, 10, 2, 8, 4, 6], [5, 5, 5, 5, 5, 2, 2, 9, 9, 9, 2, 5])
+]
+
+
+@pytest.mark.parametrize('descending', [True, False])
+@pytest.mark.parametrize('limit', [1, 2, 3, 5, 12, 50])
+def test_paging_across_equal_sort_values_neither_skips_nor_repeats(descending, limit):
+    pages = read_all(FakeCollection(DOCS), descending, limit)
+    ids = [doc_id for page in pages for doc_id in page]
+
+    expected = [doc['id'] for doc in sorted(DOCS, key=lambda d: (d['size'], d['id']), reverse=descending)]
+    assert ids == expected
+    assert all(len(page) == limit for page in pages[:-1])
+    assert pages[-1]
+
+
+def test_paging_with_filters():
+    pages = read_all(FakeCollection(DOCS), True, 2, filters={'kind': 'even'})
+    ids = [doc_id for page in pages for doc_id in page]
+    assert ids == [doc['id'] for doc in sorted(DOCS, key=lambda d: (d['size'], d['id']), reverse=True)
+                   if doc['kind'] == 'even']
+
+
+def test_rows_inserted_behind_the_cursor_dont_shift_the_next_page():
+    docs = list(DOCS)
+    collection = FakeCollection(docs)
+    first = read_page(KeysetPage('size', 'id', limit=4), collection)
+    # A new row sorting before the cursor position
+    docs.append({'id': '99', 'size': 9, 'kind': 'odd'})
+    second = read_page(KeysetPage('size', 'id', limit=4, cursor=first['next_cursor']), collection)
+
+    seen = [doc['id'] for doc in first['items'] + second['items']]
+    assert len(set(seen)) == 8
+    assert '99' not in seen
+
+
+def test_last_page_has_no_cursor():
+    page = read_page(KeysetPage('size', 'id', limit=len(DOCS)), FakeCollection(DOCS))
+    assert page['count'] == len(DOCS)
+    assert page['next_cursor'] is None
+    assert read_page(KeysetPage('size', 'id'), FakeCollection([])) == {'items': [], 'count': 0, 'next_cursor': None}
+
+
+def test_cursor_round_trip():
+    page = KeysetPage('uploaded_at', 'video_id', descending=False)
+    cursor = page.cursor_for({'uploaded_at': '2026-01-02T03:04:05+00:00', 'video_id': 'v/1'})
+
+    # URL-safe without padding, so it goes into a query string as is
+    assert '=' not in cursor and '+' not in cursor and '/' not in cursor
+    assert KeysetPage('uploaded_at', 'video_id', descending=False, cursor=cursor).after == (
+        '2026-01-02T03:04:05+00:00', 'v/1'
+    )
+    assert KeysetPage('uploaded_at', 'video_id', descending=False, cursor=cursor).query({}) == {'$or': [
+        {'uploaded_at': {'$gt': '2026-01-02T03:04:05+00:00'}},
+        {'uploaded_at': '2026-01-02T03:04:05+00:00', 'video_id': {'$gt': 'v/1'}},
+    ]}
+
+
+@pytest.mark.parametrize('cursor', ['not a cursor!', 'e30', 'WzEsMl0', '%%%', 'W10'])
+def test_malformed_cursor(cursor):
+    # The endpoints turn CursorError into a 400
+    with pytest.raises(CursorError, match='Invalid cursor'):
+        KeysetPage('size', 'id', cursor=cursor)
+
+
+def test_cursor_from_another_sort_is_rejected():
+    cursor = KeysetPage('size', 'id', descending=True).cursor_for({'size': 1, 'id': 'a'})
+    with pytest.raises(CursorError, match='different sort order'):
+        KeysetPage('size', 'id', descending=False, cursor=cursor)
+    with pytest.raises(CursorError, match='different sort order'):
+        KeysetPage('duration', 'id', descending=True, cursor=cursor)
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from subtitle_renderer import format_timestamps, render_subtitles, to_millis
+
+
+def render(segments, subtitle_format, language=None):
+    return render_subtitles(segments, subtitle_format, language).decode('utf-8')
+
+
+def test_fractions_never_roll_over():
+    millis = to_millis([1.9999, 59.9996, 3599.9999, 0.0004, -0.2])
+    assert millis.tolist() == [2000, 60000, 3600000, 0, 0]
+    assert format_timestamps(millis) == [
+        '00:00:02,000', '00:01:00,000', '01:00:00,000', '00:00:00,000', '00:00:00,000',
+    ]
+
+
+def test_srt_rounds_to_whole_milliseconds():
+    srt = render([{'start': 0.0004, 'end': 1.9999, 'text': 'Hello'}], 'srt')
+    assert srt == "1\n00:00:00,000 --> 00:00:02,000\nHello\n\n"
+    assert ',1000' not in srt
+
+
+def test_vtt_and_ass_times():
+    segments = [{'start': 61.2346, 'end': 3661.9996, 'text': 'Hi'}]
+    assert '00:01:01.235 --> 01:01:02.000' in render(segments, 'vtt')
+    # Centiseconds, rounded rather than truncated
+    assert 'Dialogue: 0,0:01:01.24,1:01:02.00,Default' in render(segments, 'ass')
+
+
+def test_empty_cues_last_a_millisecond():
+    cues = json.loads(render([{'start': 5.0, 'end': 4.0, 'text': 'x'}], 'json'))['cues']
+    assert (cues[0]['start_ms'], cues[0]['end_ms']) == (5000, 5001)
+
+
+def test_vtt_header_and_escaping():
+    vtt = render([{'start': 0, 'end': 1, 'text': 'a < b & c\n\n\nnext'}], 'vtt', language='en')
+    # Nothing but the signature on the first line block; the language goes in a NOTE
+    assert vtt.startswith('WEBVTT\n\nNOTE language: en\n\n00:00:00.000 --> 00:00:01.000\n')
+    assert 'a &lt; b &amp; c\nnext\n\n' in vtt
+    assert render([{'start': 0, 'end': 1, 'text': 'x'}], 'vtt').startswith('WEBVTT\n\n00:00:00.000')
+
+
+def test_ass_escapes_override_blocks_and_line_breaks():
+    ass = render([{'start': 0, 'end': 1, 'text': '{\\b1}bold\nline'}], 'ass')
+    assert ass.endswith(',(\\b1)bold\\Nline\n')
+
+
+def test_json_words():
+    segments = [{
+        'start': 0.0, 'end': 1.0, 'text': 'hi there',
+        'words': [{'start': 0.0, 'end': 0.4, 'word': 'hi'}, {'start': 0.5, 'end': 0.9996, 'word': 'there'}],
+    }]
+    document = json.loads(render(segments, 'json', language='en'))
+    assert document['language'] == 'en'
+    assert document['cues'][0]['words'] == [
+        {'start_ms': 0, 'end_ms': 400, 'word': 'hi'},
+        {'start_ms': 500, 'end_ms': 1000, 'word': 'there'},
+    ]
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        render_subtitles([], 'sub')
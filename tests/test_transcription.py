@@ -0,0 +1,187 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from stt_backends import FakeSpeechToText
+from transcription import SAMPLE_RATE, ChunkedTranscriber, StreamingChunker, TranscriptionError
+
+# Sound, with pauses at 9.0-9.6 s and 21.0-21.6 s
+SPEECH = [(0.0, 9.0), (9.6, 21.0), (21.6, 30.0)]
+DURATION = 30.0
+
+
+def synthetic_audio(speech=SPEECH, duration=DURATION) -> np.ndarray:
+    samples = np.zeros(int(duration * SAMPLE_RATE), dtype='<i2')
+    t = np.arange(len(samples)) / SAMPLE_RATE
+    tone = (8000 * np.sin(2 * np.pi * 440 * t)).astype('<i2')
+    for start, end in speech:
+        first, last = int(start * SAMPLE_RATE), int(end * SAMPLE_RATE)
+        samples[first:last] = tone[first:last]
+    return samples
+
+
+class FlakyBackend:
+    """FakeSpeechToText that fails its first `failures` calls"""
+
+    def __init__(self, failures: int):
+        self.backend = FakeSpeechToText()
+        self.failures = failures
+        self.calls = 0
+
+    async def transcribe(self, audio, language=None):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("Simulated STT failure")
+        return await self.backend.transcribe(audio, language)
+
+
+class SlowFirstBackend:
+    """FakeSpeechToText where earlier calls take longer, so chunks finish out of order"""
+
+    def __init__(self):
+        self.backend = FakeSpeechToText()
+        self.calls = 0
+
+    async def transcribe(self, audio, language=None):
+        self.calls += 1
+        await asyncio.sleep(0.05 * (4 - self.calls))
+        return await self.backend.transcribe(audio, language)
+
+
+def transcriber(backend, **options) -> ChunkedTranscriber:
+    options = {'chunk_seconds': 10.0, 'overlap': 1.0, 'retry_backoff': 0.0, **options}
+    return ChunkedTranscriber(backend, **options)
+
+
+def test_chunk_boundaries_land_in_pauses():
+    chunker = StreamingChunker(target=10.0, overlap=1.0)
+    samples = synthetic_audio()
+    chunks = []
+    for first in range(0, len(samples), SAMPLE_RATE * 10):
+        chunks += [chunk for chunk, _ in chunker.feed(samples[first:first + SAMPLE_RATE * 10])]
+    chunks += [chunk for chunk, _ in chunker.finish()]
+
+    # Each boundary is the middle of the pause nearest to every 10 s
+    assert [chunk['owned_end'] for chunk in chunks] == pytest.approx([9.3, 21.3, 30.0])
+    assert [chunk['owned_start'] for chunk in chunks] == pytest.approx([0.0, 9.3, 21.3])
+    assert [chunk['start'] for chunk in chunks] == pytest.approx([0.0, 8.3, 20.3])
+    assert [chunk['end'] for chunk in chunks] == pytest.approx([10.3, 22.3, 30.0])
+
+
+def test_chunk_audio_matches_its_range():
+    chunker = StreamingChunker(target=10.0, overlap=1.0)
+    samples = synthetic_audio()
+    ready = chunker.feed(samples) + chunker.finish()
+    for chunk, chunk_samples in ready:
+        first = int(round(chunk['start'] * SAMPLE_RATE))
+        assert np.array_equal(chunk_samples, samples[first:first + len(chunk_samples)])
+        assert len(chunk_samples) == int(round((chunk['end'] - chunk['start']) * SAMPLE_RATE))
+
+
+def test_overlap_is_stitched_without_duplicates():
+    result = asyncio.run(transcriber(FakeSpeechToText()).transcribe_samples(synthetic_audio(), 'en'))
+
+    # Neighbouring chunks both hear the sound next to each boundary; only one keeps it
+    assert result['segments'] == [
+        {'start': 0.0, 'end': 9.0, 'text': 'speech 9.0s'},
+        {'start': 9.6, 'end': 21.0, 'text': 'speech 11.4s'},
+        {'start': 21.6, 'end': 30.0, 'text': 'speech 8.4s'},
+    ]
+    assert [word['word'] for word in result['words']] == ['speech', '9.0s', 'speech', '11.4s', 'speech', '8.4s']
+    starts = [word['start'] for word in result['words']]
+    assert starts == sorted(starts)
+    assert result['text'] == 'speech 9.0s speech 11.4s speech 8.4s'
+    assert result['duration'] == pytest.approx(DURATION)
+
+
+def test_failed_chunks_are_retried():
+    backend = FlakyBackend(failures=2)
+    result = asyncio.run(transcriber(backend, max_retries=3).transcribe_samples(synthetic_audio(), 'en'))
+    expected = asyncio.run(transcriber(FakeSpeechToText()).transcribe_samples(synthetic_audio(), 'en'))
+
+    assert result['segments'] == expected['segments']
+    # Three chunks plus the two failed attempts
+    assert backend.calls == 5
+
+
+def test_chunk_failing_every_attempt_fails_the_transcription():
+    backend = FlakyBackend(failures=100)
+    with pytest.raises(TranscriptionError, match='failed after 3 attempts'):
+        asyncio.run(transcriber(backend, max_retries=2).transcribe_samples(synthetic_audio(), 'en'))
+
+
+def test_progress_is_reported_in_order():
+    reports = []
+
+    async def on_progress(fraction):
+        reports.append(fraction)
+
+    backend = SlowFirstBackend()
+    asyncio.run(transcriber(backend).transcribe_samples(synthetic_audio(), 'en', on_progress=on_progress))
+
+    # One report per chunk, never going backwards even when chunks finish out of order
+    assert len(reports) == 3
+    assert reports == sorted(reports)
+    assert reports[-1] == pytest.approx(1.0)
+
+
+def test_language_is_detected_once_before_other_chunks():
+    languages = []
+
+    class RecordingBackend(FakeSpeechToText):
+        async def transcribe(self, audio, language=None):
+            languages.append(language)
+            result = await super().transcribe(audio, language)
+            result['language'] = result['language'] if language else 'fr'
+            return result
+
+    result = asyncio.run(transcriber(RecordingBackend()).transcribe_samples(synthetic_audio()))
+
+    assert languages == [None, 'fr', 'fr']
+    assert result['language'] == 'fr'
+
+
+def test_failure_stops_reading_the_stream():
+    closed = []
+
+    async def blocks():
+        try:
+            yield synthetic_audio()
+            # The decoder stalls; the failed chunk must not wait for it
+            await asyncio.Event().wait()
+        finally:
+            closed.append(True)
+
+    async def scenario():
+        stream = transcriber(FlakyBackend(failures=100), max_retries=0).transcribe_stream(blocks(), 'en')
+        return await asyncio.wait_for(stream, timeout=5)
+
+    with pytest.raises(TranscriptionError):
+        asyncio.run(scenario())
+    assert closed == [True]
+
+
+def test_outside_cancellation_propagates():
+    calls = []
+
+    class HangingBackend:
+        async def transcribe(self, audio, language=None):
+            calls.append(language)
+            await asyncio.Event().wait()
+
+    async def scenario():
+        task = asyncio.ensure_future(transcriber(HangingBackend()).transcribe_samples(synthetic_audio(), 'en'))
+        while not calls:
+            await asyncio.sleep(0.01)
+        # e.g. the job's lease was lost
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        return task, others
+
+    task, others = asyncio.run(scenario())
+    assert task.cancelled()
+    # No chunk is left running behind the cancelled job
+    assert others == []
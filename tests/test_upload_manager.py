@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+
+from upload_manager import ChunkedUploadManager, UploadError
+
+DATA = bytes(range(256)) * 40
+
+
+class FakeCollection:
+    """The few collection methods the upload manager uses, over a list of dicts"""
+
+    def __init__(self):
+        self.docs = []
+
+    def _find(self, query):
+        return next((doc for doc in self.docs if all(doc.get(k) == v for k, v in query.items())), None)
+
+    async def create_index(self, *args, **kwargs):
+        pass
+
+    async def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    async def find_one(self, query, projection=None):
+        doc = self._find(query)
+        return dict(doc) if doc else None
+
+    async def update_one(self, query, update):
+        doc = self._find(query)
+        if doc:
+            doc.update(update['$set'])
+        return SimpleNamespace(matched_count=1 if doc else 0)
+
+    async def delete_one(self, query):
+        doc = self._find(query)
+        if doc:
+            self.docs.remove(doc)
+
+
+def manager(tmp_path, db=None) -> ChunkedUploadManager:
+    db = db or SimpleNamespace(upload_sessions=FakeCollection())
+    return ChunkedUploadManager(db, tmp_path, chunk_size=1024)
+
+
+async def body(data: bytes, piece: int = 100):
+    for first in range(0, len(data), piece):
+        yield data[first:first + piece]
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_chunks_are_assembled_and_hashed(tmp_path):
+    async def scenario():
+        uploads = manager(tmp_path)
+        session = await uploads.init('clip.mp4', len(DATA))
+        for first in range(0, len(DATA), 1024):
+            await uploads.write_chunk(session['upload_id'], first, body(DATA[first:first + 1024]))
+        return await uploads.finalize(session['upload_id'], 'clip.mp4')
+
+    session, content_hash = run(scenario())
+    assert session['received'] == len(DATA)
+    assert content_hash == hashlib.sha256(DATA).hexdigest()
+    assert (tmp_path / 'clip.mp4').read_bytes() == DATA
+    assert not (tmp_path / session['part_filename']).exists()
+
+
+def test_chunk_at_the_wrong_offset_is_rejected(tmp_path):
+    async def scenario():
+        uploads = manager(tmp_path)
+        session = await uploads.init('clip.mp4', len(DATA))
+        await uploads.write_chunk(session['upload_id'], 0, body(DATA[:1024]))
+        for offset in (0, 2048):
+            with pytest.raises(UploadError) as error:
+                await uploads.write_chunk(session['upload_id'], offset, body(DATA[offset:offset + 1024]))
+            # The client is told where to resume
+            assert error.value.status_code == 409
+            assert error.value.received == 1024
+        return await uploads.get(session['upload_id'])
+
+    assert run(scenario())['received'] == 1024
+
+
+def test_chunk_past_the_declared_size_is_rejected(tmp_path):
+    async def scenario():
+        uploads = manager(tmp_path)
+        session = await uploads.init('clip.mp4', 1000)
+        with pytest.raises(UploadError) as error:
+            await uploads.write_chunk(session['upload_id'], 0, body(DATA[:1024]))
+        return error.value
+
+    assert run(scenario()).status_code == 413
+
+
+def test_hash_state_is_rebuilt_on_resume(tmp_path):
+    async def scenario():
+        db = SimpleNamespace(upload_sessions=FakeCollection())
+        first_worker = manager(tmp_path, db)
+        session = await first_worker.init('clip.mp4', len(DATA))
+        await first_worker.write_chunk(session['upload_id'], 0, body(DATA[:4096]))
+
+        # Another process, with no running hash, picks the upload up
+        second_worker = manager(tmp_path, db)
+        await second_worker.write_chunk(session['upload_id'], 4096, body(DATA[4096:]))
+        return await second_worker.finalize(session['upload_id'], 'clip.mp4')
+
+    _, content_hash = run(scenario())
+    assert content_hash == hashlib.sha256(DATA).hexdigest()
+
+
+def test_incomplete_upload_cannot_be_finalized(tmp_path):
+    async def scenario():
+        uploads = manager(tmp_path)
+        session = await uploads.init('clip.mp4', len(DATA))
+        await uploads.write_chunk(session['upload_id'], 0, body(DATA[:1024]))
+        with pytest.raises(UploadError) as error:
+            await uploads.finalize(session['upload_id'], 'clip.mp4')
+        return error.value, await uploads.get(session['upload_id'])
+
+    error, session = run(scenario())
+    assert error.status_code == 409
+    assert error.received == 1024
+    assert session['status'] == 'uploading'
+    assert not (tmp_path / 'clip.mp4').exists()
+
+
+def test_finalized_upload_takes_no_more_writes(tmp_path):
+    async def scenario():
+        uploads = manager(tmp_path)
+        session = await uploads.init('clip.mp4', 1024)
+        await uploads.write_chunk(session['upload_id'], 0, body(DATA[:1024]))
+        await uploads.finalize(session['upload_id'], 'clip.mp4')
+        with pytest.raises(UploadError) as error:
+            await uploads.finalize(session['upload_id'], 'clip.mp4')
+        return error.value
+
+    assert run(scenario()).status_code == 409
@@ -0,0 +1,176 @@
+import json
+import logging
+import shutil
+import subprocess
+
+import pytest
+
+from video_processor import VideoProcessor
+
+needs_ffmpeg = pytest.mark.skipif(
+    shutil.which('ffmpeg') is None or shutil.which('ffprobe') is None,
+    reason="ffmpeg and ffprobe are required"
+)
+
+FPS = 25
+
+
+def make_clip(path, duration=8, video_options=('-c:v', 'libx264', '-profile:v', 'main', '-bf', '2')):
+    """Synthetic clip with a keyframe every second and an AAC soundtrack"""
+    subprocess.run(
+        [
+            'ffmpeg', '-nostdin', '-v', 'error', '-y',
+            '-f', 'lavfi', '-i', f'testsrc=duration={duration}:size=320x240:rate={FPS}',
+            '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+            *video_options, '-g', str(FPS), '-pix_fmt', 'yuv420p', '-c:a', 'aac', '-shortest', str(path),
+        ],
+        check=True
+    )
+    return path
+
+
+def probe_streams(path):
+    result = subprocess.run(
+        [
+            'ffprobe', '-v', 'error', '-count_packets',
+            '-show_entries', 'stream=codec_type,nb_read_packets,duration', '-of', 'json', str(path),
+        ],
+        capture_output=True, check=True
+    )
+    return {stream['codec_type']: stream for stream in json.loads(result.stdout)['streams']}
+
+
+def decode_errors(path):
+    result = subprocess.run(
+        ['ffmpeg', '-nostdin', '-v', 'error', '-i', str(path), '-f', 'null', '-'],
+        capture_output=True
+    )
+    return result.returncode, result.stderr.decode()
+
+
+@needs_ffmpeg
+def test_smart_cut_decodes_cleanly(tmp_path, caplog):
+    # Baseline CAVLC source: boundary GOPs come from x264 with other parameter sets
+    source = make_clip(tmp_path / 'source.mp4', video_options=(
+        '-c:v', 'libx264', '-profile:v', 'baseline', '-x264-params', 'ref=1:cabac=0',
+    ))
+    processor = VideoProcessor(str(tmp_path / 'out'))
+    segments = [{'start': 0.3, 'end': 2.7}, {'start': 3.45, 'end': 6.2}]
+
+    with caplog.at_level(logging.INFO, logger='video_processor'):
+        output = processor.cut_video(str(source), segments, 'cut.mp4', mode='smart')
+
+    assert 'Video cut successfully (smart)' in caplog.text
+    assert decode_errors(output) == (0, '')
+    streams = probe_streams(output)
+    # Frames starting in [0.3, 2.7) and [3.45, 6.2): 0.32-2.68 and 3.48-6.16
+    assert int(streams['video']['nb_read_packets']) == 60 + 68
+    assert float(streams['audio']['duration']) == pytest.approx(5.15, abs=0.05)
+    # Only the output is left behind
+    assert [path.name for path in (tmp_path / 'out').iterdir()] == ['cut.mp4']
+
+
+@needs_ffmpeg
+def test_smart_cut_with_b_frames(tmp_path, caplog):
+    source = make_clip(tmp_path / 'source.mp4')
+    processor = VideoProcessor(str(tmp_path / 'out'))
+
+    with caplog.at_level(logging.INFO, logger='video_processor'):
+        output = processor.cut_video(str(source), [{'start': 0.5, 'end': 5.5}], 'cut.mp4', mode='smart')
+
+    assert 'Video cut successfully (smart)' in caplog.text
+    assert decode_errors(output) == (0, '')
+    assert int(probe_streams(output)['video']['nb_read_packets']) == 5 * FPS
+
+
+@needs_ffmpeg
+def test_smart_cut_falls_back_when_splices_dont_decode(tmp_path, caplog):
+    # Open GOPs: the leading pictures of a copied GOP reference frames that were cut away
+    source = make_clip(tmp_path / 'source.mp4', video_options=(
+        '-c:v', 'libx265', '-x265-params', 'open-gop=1:log-level=error',
+    ))
+    processor = VideoProcessor(str(tmp_path / 'out'))
+
+    with caplog.at_level(logging.INFO, logger='video_processor'):
+        output = processor.cut_video(str(source), [{'start': 0.3, 'end': 4.7}], 'cut.mp4', mode='smart')
+
+    assert "re-encoding instead" in caplog.text
+    assert decode_errors(output) == (0, '')
+    assert [path.name for path in (tmp_path / 'out').iterdir()] == ['cut.mp4']
+
+
+# Keyframes every 2 s
+KEYFRAMES = [0.0, 2.0, 4.0, 6.0, 8.0]
+
+
+def test_plan_segment_inside_a_single_gop():
+    assert VideoProcessor.plan_smart_cut([{'start': 2.5, 'end': 3.5}], KEYFRAMES) == [('encode', 2.5, 3.5)]
+    # Reaching the next keyframe still leaves no whole GOP to copy
+    assert VideoProcessor.plan_smart_cut([{'start': 2.5, 'end': 4.5}], KEYFRAMES) == [
+        ('encode', 2.5, 4.5),
+    ]
+
+
+def test_plan_segment_starting_on_a_keyframe():
+    assert VideoProcessor.plan_smart_cut([{'start': 2.0, 'end': 7.0}], KEYFRAMES) == [
+        ('copy', 2.0, 6.0), ('encode', 6.0, 7.0),
+    ]
+    # Within the tolerance counts as on the keyframe
+    assert VideoProcessor.plan_smart_cut([{'start': 1.98, 'end': 7.0}], KEYFRAMES) == [
+        ('copy', 2.0, 6.0), ('encode', 6.0, 7.0),
+    ]
+
+
+def test_plan_segment_ending_within_tolerance_of_a_keyframe():
+    assert VideoProcessor.plan_smart_cut([{'start': 1.0, 'end': 6.03}], KEYFRAMES) == [
+        ('encode', 1.0, 2.0), ('copy', 2.0, 6.0),
+    ]
+    assert VideoProcessor.plan_smart_cut([{'start': 1.0, 'end': 5.97}], KEYFRAMES) == [
+        ('encode', 1.0, 2.0), ('copy', 2.0, 6.0),
+    ]
+
+
+def test_plan_multiple_segments():
+    segments = [{'start': 0.5, 'end': 4.5}, {'start': 4.6, 'end': 5.0}, {'start': 6.0, 'end': 8.0}]
+    assert VideoProcessor.plan_smart_cut(segments, KEYFRAMES) == [
+        ('encode', 0.5, 2.0), ('copy', 2.0, 4.0), ('encode', 4.0, 4.5),
+        ('encode', 4.6, 5.0),
+        ('copy', 6.0, 8.0),
+    ]
+
+
+def test_starts_on_keyframes():
+    assert VideoProcessor._starts_on_keyframes([{'start': 0.0, 'end': 1.0}, {'start': 4.02, 'end': 5.0}], KEYFRAMES)
+    assert not VideoProcessor._starts_on_keyframes([{'start': 0.0, 'end': 1.0}, {'start': 4.5, 'end': 5.0}], KEYFRAMES)
+    assert not VideoProcessor._starts_on_keyframes([{'start': 9.0, 'end': 10.0}], KEYFRAMES)
+
+
+@needs_ffmpeg
+def test_keyframes_are_relative_to_the_start_time(tmp_path):
+    source = make_clip(tmp_path / 'source.mp4', duration=4, video_options=(
+        '-c:v', 'libx264', '-output_ts_offset', '1.4',
+    ))
+
+    # The AAC priming starts the file slightly before the first frame
+    assert VideoProcessor(str(tmp_path / 'out')).get_keyframes(str(source)) == pytest.approx(
+        [0.0, 1.0, 2.0, 3.0], abs=0.03
+    )
+
+
+@needs_ffmpeg
+def test_copy_cut_of_a_source_with_a_start_time(tmp_path):
+    processor = VideoProcessor(str(tmp_path / 'out'))
+    packets = []
+    for name, offset in (('plain.mp4', '0'), ('offset.mp4', '1.4')):
+        source = make_clip(tmp_path / name, duration=4, video_options=(
+            '-c:v', 'libx264', '-output_ts_offset', offset,
+        ))
+        keyframes = processor.get_keyframes(str(source))
+        output = processor.cut_video(
+            str(source), [{'start': keyframes[1], 'end': keyframes[3]}], f'cut_{name}', mode='copy'
+        )
+        packets.append(int(probe_streams(output)['video']['nb_read_packets']))
+
+    # The same two GOPs whatever the file's first timestamp
+    assert packets[0] == packets[1]
+    assert packets[0] >= 2 * FPS
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from word_timings import WordTimings
+
+
+def timings(words, duration=0.3, gap=0.0, start=0.0):
+    """Words back to back, each `duration` long with `gap` between them"""
+    entries = []
+    for word in words:
+        entries.append({'start': start, 'end': start + duration, 'word': word})
+        start += duration + gap
+    return WordTimings.from_words(entries)
+
+
+def test_document_round_trip():
+    original = WordTimings.from_words([
+        {'start': 0.0004, 'end': 0.5, 'word': ' hello'},
+        {'start': 0.6, 'end': 0.55, 'word': 'world '},
+        {'start': 0.7, 'end': 0.8, 'word': '  '},
+    ])
+    restored = WordTimings.from_document(original.to_document())
+
+    # Blank words are dropped and an end never precedes its start
+    assert restored.to_list() == [
+        {'start': 0.0, 'end': 0.5, 'word': 'hello'},
+        {'start': 0.6, 'end': 0.6, 'word': 'world'},
+    ]
+    assert len(WordTimings.from_document(None)) == 0
+
+
+def test_between_uses_word_midpoints():
+    words = timings(['a', 'b', 'c', 'd'], duration=1.0)
+    assert words.between(0.6, 2.6).words == ['b', 'c']
+    # Half-open: c's midpoint is 2.5
+    assert words.between(0.6, 2.5).words == ['b']
+    assert words.between(1.5, 1.6).words == ['b']
+    assert words.between(4.0, 5.0).words == []
+
+
+def test_lines_wrap_at_max_chars_per_line():
+    cues = timings(['aaaa'] * 6).segment(max_chars_per_line=10, max_lines=2)
+
+    assert [cue['text'] for cue in cues] == ['aaaa aaaa\naaaa aaaa', 'aaaa aaaa']
+    assert all(len(line) <= 10 for cue in cues for line in cue['text'].split('\n'))
+
+
+def test_max_lines():
+    cues = timings(['aaaa'] * 6).segment(max_chars_per_line=10, max_lines=1)
+    assert [cue['text'] for cue in cues] == ['aaaa aaaa'] * 3
+
+
+def test_max_duration():
+    cues = timings(['word'] * 7, duration=1.0).segment(max_duration=3.0)
+
+    assert [cue['text'] for cue in cues] == ['word word word', 'word word word', 'word']
+    assert [(cue['start'], cue['end']) for cue in cues[:2]] == [(0.0, 3.0), (3.0, 6.0)]
+
+
+def test_max_chars_is_capped_by_reading_speed():
+    # 17 chars/s for 2 s: no more than 34 characters, whatever the line limits
+    cues = timings(['abcdefgh'] * 8, duration=0.1).segment(max_duration=2.0, max_chars_per_line=42, max_lines=2)
+    assert all(len(cue['text'].replace('\n', ' ')) <= 34 for cue in cues)
+    assert [cue['text'].replace('\n', ' ') for cue in cues][0] == 'abcdefgh abcdefgh abcdefgh'
+
+
+def test_pause_ends_a_cue():
+    words = WordTimings.from_words([
+        {'start': 0.0, 'end': 0.3, 'word': 'before'},
+        {'start': 0.3, 'end': 0.6, 'word': 'the'},
+        {'start': 1.3, 'end': 1.6, 'word': 'pause'},
+    ])
+    cues = words.segment(pause=0.7, min_duration=0.1)
+
+    assert [cue['text'] for cue in cues] == ['before the', 'pause']
+    # A shorter gap doesn't break
+    assert len(words.segment(pause=0.8)) == 1
+
+
+def test_sentence_end_breaks_once_half_a_line_is_filled():
+    cues = timings('This is a longer sentence. And the next one'.split()).segment(max_chars_per_line=42)
+    assert [cue['text'] for cue in cues] == ['This is a longer sentence.', 'And the next one']
+
+    for mark in '?!':
+        cues = timings(f'Is this a longer sentence{mark} Then more'.split()).segment(max_chars_per_line=42)
+        assert len(cues) == 2
+
+    # Too short to stand alone
+    cues = timings('Hi. How are you'.split()).segment(max_chars_per_line=42)
+    assert [cue['text'] for cue in cues] == ['Hi. How are you']
+
+
+def test_short_cues_are_held_until_readable_without_overlapping():
+    words = WordTimings.from_words([
+        {'start': 0.0, 'end': 0.2, 'word': 'Hi'},
+        {'start': 1.0, 'end': 1.2, 'word': 'there'},
+        {'start': 1.5, 'end': 1.7, 'word': 'friend'},
+    ])
+    cues = words.segment(pause=0.3, min_duration=1.0)
+
+    # Held for min_duration, but never past the next cue's start
+    assert [(cue['start'], cue['end']) for cue in cues] == [(0.0, 1.0), (1.0, 1.5), (1.5, 2.5)]
+
+
+def test_every_word_lands_in_one_cue_in_order():
+    rng = np.random.default_rng(0)
+    words = [''.join(rng.choice(list('abcdefgh'), rng.integers(1, 12))) for _ in range(300)]
+    text = ' '.join(cue['text'].replace('\n', ' ') for cue in timings(words, gap=0.05).segment())
+    assert text == ' '.join(words)
+
+
+def test_no_words():
+    assert WordTimings.from_words([]).segment() == []
+
+
+@pytest.mark.parametrize('max_chars_per_line, max_lines', [(20, 1), (32, 2), (42, 3)])
+def test_limits_hold_for_long_text(max_chars_per_line, max_lines):
+    rng = np.random.default_rng(1)
+    words = [''.join(rng.choice(list('xyz'), rng.integers(1, 10))) for _ in range(200)]
+    for cue in timings(words, duration=0.2).segment(max_chars_per_line=max_chars_per_line, max_lines=max_lines):
+        lines = cue['text'].split('\n')
+        assert len(lines) <= max_lines
+        assert all(len(line) <= max_chars_per_line for line in lines)